@@ -4,6 +4,8 @@ import subprocess
 import sys
 import tempfile
 
+import numpy as np
+
 from tableconv.adapters.df.base import Adapter, register_adapter
 from tableconv.adapters.df.file_adapter_mixin import FileAdapterMixin
 from tableconv.parameter_parsing_utils import strtobool
@@ -221,6 +223,10 @@ class ASCIIAdapter(FileAdapterMixin, Adapter):
         if scheme in TABULATE_TABLEFMT:
             from tabulate import tabulate
 
+            # (Nullable and Arrow-backed columns hold pd.NA for nulls, which tabulate cannot handle)
+            df = df.apply(
+                lambda col: (col if isinstance(col.dtype, np.dtype) else col.astype(object).where(col.notna(), None))
+            )
             return tabulate(
                 df.values.tolist(),
                 list(df.columns),
@@ -1,3 +1,9 @@
+import contextlib
+import io
+import itertools
+import json
+import operator
+from collections.abc import Iterator
 from io import IOBase
 from typing import IO, Any, cast
 
@@ -5,6 +11,8 @@ import pandas as pd
 
 from tableconv.adapters.df.base import Adapter, register_adapter
 from tableconv.adapters.df.file_adapter_mixin import FileAdapterMixin
+from tableconv.exceptions import InvalidParamsError
+from tableconv.json_data_model import iter_record_chunks
 
 
 def _pandas_dtype_to_avro_type(dtype) -> dict[str, str] | str:
@@ -22,7 +30,7 @@ def _pandas_dtype_to_avro_type(dtype) -> dict[str, str] | str:
 
 
 def _infer_avro_schema_from_df(
-    df: pd.DataFrame, schema_name: str = "DynamicSchema", namespace: str = "pandas.avro"
+    df: pd.DataFrame, schema_name: str = "DynamicSchema", namespace: str = "pandas.avro", all_nullable: bool = False
 ) -> dict:
     fields: list[dict] = []
     for column_name, dtype in df.dtypes.items():
@@ -30,7 +38,7 @@ def _infer_avro_schema_from_df(
         # Make all fields nullable by default, union with null
         # Check if column has NaN values to decide if it should be nullable.
         # A more robust way might be to always make them nullable or provide an option.
-        is_nullable = df[column_name].isnull().any()
+        is_nullable = all_nullable or df[column_name].isnull().any()
         if is_nullable:
             field_type: Any = ["null", avro_type]
             # Ensure "null" is the first type in the union if a default is to be provided
@@ -49,33 +57,181 @@ def _infer_avro_schema_from_df(
     }
 
 
+CODECS = ("null", "deflate", "bzip2", "xz", "snappy", "zstandard", "lz4")
+CODEC_ALIASES = {"zstd": "zstandard"}
+# (Approximate size of each block of records, in bytes. Same as the fastavro default)
+DEFAULT_SYNC_INTERVAL = 16000
+
+# Avro timestamp logical types: the unit of the long integer, and whether the timestamp is in UTC (as opposed to local)
+TIMESTAMP_LOGICAL_TYPES = {
+    "timestamp-millis": ("ms", True),
+    "timestamp-micros": ("us", True),
+    "timestamp-nanos": ("ns", True),
+    "local-timestamp-millis": ("ms", False),
+    "local-timestamp-micros": ("us", False),
+    "local-timestamp-nanos": ("ns", False),
+}
+
+
+# (From the Avro specification)
+AVRO_HEADER_SCHEMA = {
+    "type": "record",
+    "name": "org.apache.avro.file.Header",
+    "fields": [
+        {"name": "magic", "type": {"type": "fixed", "name": "Magic", "size": 4}},
+        {"name": "meta", "type": {"type": "map", "values": "bytes"}},
+        {"name": "sync", "type": {"type": "fixed", "name": "Sync", "size": 16}},
+    ],
+}
+
+
+def _strip_timestamp_logical_types(schema: dict) -> tuple[dict, dict[str, tuple[str, bool]]]:
+    """
+    Strip the timestamp logical types from the fields of a record schema, so that they are decoded as plain long
+    integers, to be converted to datetimes a whole column at a time, rather than into a datetime object for every value.
+    Returns the stripped schema, and the timestamp fields' units.
+    """
+    fields = []
+    timestamp_fields = {}
+    for field in schema["fields"]:
+        field_type = field["type"]
+        types = field_type if isinstance(field_type, list) else [field_type]
+        timestamp_types = [t for t in types if isinstance(t, dict) and t.get("logicalType") in TIMESTAMP_LOGICAL_TYPES]
+        if len(timestamp_types) == 1 and all(t == "null" or t in timestamp_types for t in types):
+            timestamp_fields[field["name"]] = TIMESTAMP_LOGICAL_TYPES[timestamp_types[0]["logicalType"]]
+            types = ["null" if t == "null" else "long" for t in types]
+            field = {**field, "type": types if isinstance(field_type, list) else types[0]}
+        fields.append(field)
+    return {**schema, "fields": fields}, timestamp_fields
+
+
+def _timestamps_to_datetimes(values: list, unit: str, utc: bool) -> pd.Series:
+    integers = pd.array(values, dtype="Int64")
+    datetimes = pd.Series(integers.to_numpy(dtype="int64", na_value=0).astype(f"datetime64[{unit}]"))
+    datetimes[integers.isna()] = pd.NaT
+    with contextlib.suppress(pd.errors.OutOfBoundsDatetime):
+        # (Nanoseconds, like pandas datetimes usually are, unless out of range of that)
+        datetimes = datetimes.astype("datetime64[ns]")
+    return datetimes.dt.tz_localize("UTC") if utc else datetimes
+
+
+class _PrefixedReader:
+    """A binary stream of the bytes ``prefix``, followed by the rest of the stream ``f``."""
+
+    def __init__(self, prefix: bytes, f: IO[bytes]):
+        self.prefix = prefix
+        self.f = f
+        self.position = 0
+
+    def tell(self) -> int:
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        if not self.prefix:
+            data = self.f.read(size)
+        elif size < 0:
+            data = self.prefix + self.f.read()
+            self.prefix = b""
+        else:
+            data, self.prefix = self.prefix[:size], self.prefix[size:]
+            if len(data) < size:
+                data += self.f.read(size - len(data))
+        self.position += len(data)
+        return data
+
+
+def _read_avro(f: IO[bytes]) -> pd.DataFrame:
+    import fastavro
+
+    # fastavro always converts values of logical types to Python objects (e.g. a datetime object for every timestamp),
+    # even given a reader schema without them. So instead, give it a copy of the container file header with the
+    # timestamp logical types stripped out of the schema, followed by the (untouched) blocks of the file.
+    header_schema = fastavro.parse_schema(AVRO_HEADER_SCHEMA)
+    header = cast(dict[str, Any], fastavro.schemaless_reader(f, header_schema))
+    writer_schema = json.loads(header["meta"]["avro.schema"])
+    timestamp_fields: dict[str, tuple[str, bool]] = {}
+    if isinstance(writer_schema, dict) and writer_schema.get("type") == "record":
+        writer_schema, timestamp_fields = _strip_timestamp_logical_types(writer_schema)
+        header["meta"]["avro.schema"] = json.dumps(writer_schema).encode()
+    header_bytes = io.BytesIO()
+    fastavro.schemaless_writer(header_bytes, header_schema, header)
+    # (Duck-typed: fastavro only needs read() and tell())
+    stream = cast(IO[bytes], _PrefixedReader(header_bytes.getvalue(), f))
+
+    if not isinstance(writer_schema, dict) or writer_schema.get("type") != "record" or not writer_schema["fields"]:
+        return pd.DataFrame(list(fastavro.reader(stream)))
+    names = [field["name"] for field in writer_schema["fields"]]
+    columns: dict[str, list] = {name: [] for name in names}
+    get_values = operator.itemgetter(*names)
+    # Decode a block of records at a time, and transpose each block into the columns.
+    for block in fastavro.block_reader(stream):
+        records = cast(Iterator[dict[str, Any]], block)
+        if len(names) == 1:
+            columns[names[0]].extend(map(get_values, records))
+            continue
+        for column, values in zip(columns.values(), zip(*map(get_values, records), strict=True), strict=False):
+            column.extend(values)
+    df = pd.DataFrame(columns)
+    for name, (unit, utc) in timestamp_fields.items():
+        df[name] = _timestamps_to_datetimes(columns[name], unit, utc)
+    return df
+
+
+def _to_avro_values(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert datetime columns to integer microseconds (i.e. timestamp-micros), all at once."""
+    datetime_columns = [column for column, dtype in df.dtypes.items() if pd.api.types.is_datetime64_any_dtype(dtype)]
+    if not datetime_columns:
+        return df
+    df = df.copy(deep=False)
+    for column in datetime_columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.DatetimeTZDtype):
+            series = series.dt.tz_convert("UTC").dt.tz_localize(None)
+        micros = series.to_numpy().astype("datetime64[us]").astype("int64")
+        df[column] = pd.array(micros, dtype="Int64")
+        df.loc[series.isna().to_numpy(), column] = pd.NA
+    return df
+
+
 @register_adapter(["avro"])
 class AvroAdapter(FileAdapterMixin, Adapter):
 
     @classmethod
     def load_file(cls, scheme: str, path: str | IOBase, params: dict[str, Any]) -> pd.DataFrame:
-        import fastavro
-
-        def buf_to_df(buf: IO) -> pd.DataFrame:  # TODO: Why doesn't FileAdapterMixin cover this normalization?
-            records = []
-            for record in fastavro.reader(buf):
-                records.append(record)
-            return pd.DataFrame(records)
-
         if isinstance(path, IOBase):
-            buf = cast(IO, path)
-            return buf_to_df(buf)
-        else:
-            with open(path, "rb") as buf:
-                return buf_to_df(buf)
+            return _read_avro(cast(IO, getattr(path, "buffer", path)))
+        with open(path, "rb") as buf:
+            return _read_avro(buf)
 
     @classmethod
     def dump_file(cls, df: pd.DataFrame, scheme: str, path: str, params: dict[str, Any]) -> None:
-        import fastavro
+        cls.dump_file_batches(iter([df]), scheme, path, params)
 
-        # Infer schema from DataFrame
-        schema = fastavro.parse_schema(_infer_avro_schema_from_df(df, schema_name="default"))
+    @classmethod
+    def dump_file_batches(cls, batches: Iterator[pd.DataFrame], scheme: str, path: str, params: dict[str, Any]) -> None:
+        import fastavro
 
-        records = df.to_dict(orient="records")
+        codec = CODEC_ALIASES.get(params.get("codec", "null"), params.get("codec", "null"))
+        if codec not in CODECS:
+            raise InvalidParamsError(f"?codec must be one of: {', '.join(CODECS)}")
+        # Some codecs need optional libraries. Check that before the destination gets truncated.
+        try:
+            fastavro.writer(io.BytesIO(), {"type": "record", "name": "probe", "fields": []}, [{}], codec=codec)
+        except ValueError as exc:
+            raise InvalidParamsError(f"?codec={codec} is not available: {exc}") from exc
+        sync_interval = int(params.get("sync_interval", DEFAULT_SYNC_INTERVAL))
+
+        batches = iter(batches)
+        first_batch = next(batches)
+        second_batch = next(batches, None)
+        # Infer schema from DataFrame. (When streaming multiple batches, later batches may have nulls where the first
+        # one doesn't, so then all fields are nullable)
+        schema = fastavro.parse_schema(
+            _infer_avro_schema_from_df(first_batch, schema_name="default", all_nullable=second_batch is not None)
+        )
+        dfs = itertools.chain([first_batch], [second_batch] if second_batch is not None else [], batches)
+        records = itertools.chain.from_iterable(
+            itertools.chain.from_iterable(iter_record_chunks(_to_avro_values(df)) for df in dfs)
+        )
         with open(path, "wb") as f:
-            fastavro.writer(f, schema, records)
+            fastavro.writer(f, schema, records, codec=codec, sync_interval=sync_interval)
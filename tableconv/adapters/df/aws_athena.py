@@ -1,3 +1,4 @@
+import concurrent.futures
 import contextlib
 import datetime
 import logging
@@ -8,13 +9,14 @@ import time
 import uuid
 
 from tableconv.adapters.df.base import Adapter, register_adapter
-from tableconv.adapters.df.pandas_io import CSVAdapter, ParquetAdapter
+from tableconv.adapters.df.pandas_io import CSVAdapter, ParquetAdapter, write_parquet_dataset
 from tableconv.exceptions import (
     AppendSchemeConflictError,
     InvalidParamsError,
     InvalidQueryError,
     TableAlreadyExistsError,
 )
+from tableconv.schema_inference import infer_json_schema
 from tableconv.uri import parse_uri
 
 logger = logging.getLogger(__name__)
@@ -112,20 +114,6 @@ class AWSAthenaAdapter(Adapter):
                     os.remove(local_filename)
             return df
 
-    @staticmethod
-    def _get_json_schema(df):
-        """
-        TODO: Update aws_athena to not be a df-level adapter, and instead use IntermediateExchangeTable, so we don't
-        have to duplicate this logic.
-        """
-        from genson import SchemaBuilder
-
-        builder = SchemaBuilder()
-        builder.add_schema({"type": "object", "properties": {}})
-        for row in df.to_dict(orient="records"):
-            builder.add_object(row)
-        return builder.to_schema()
-
     @staticmethod
     def resolve_presto_type(json_schema, column_name=None, top_level=False):
         presto_types = set()
@@ -178,16 +166,22 @@ class AWSAthenaAdapter(Adapter):
         return presto_types.pop()
 
     @staticmethod
-    def _gen_schema(df, data_format, table_name, s3_base_url):
+    def _gen_schema(df, data_format, table_name, s3_base_url, partition_by=()):
         schema = f"CREATE EXTERNAL TABLE `{table_name}` (\n"
         field_schema_lines = []
+        partition_schema_lines = []
         columns = []
-        for column, json_schema in AWSAthenaAdapter._get_json_schema(df)["properties"].items():
+        for column, json_schema in infer_json_schema(df)["properties"].items():
             presto_type = AWSAthenaAdapter.resolve_presto_type(json_schema, column_name=column, top_level=True)
+            if column in partition_by:
+                partition_schema_lines.append(f"  `{column}` {presto_type}")
+                continue
             field_schema_lines.append(f"  `{column}` {presto_type}")
             columns.append(column)
         schema += ",\n".join(field_schema_lines)
         schema += "\n)"
+        if partition_schema_lines:
+            schema += "\nPARTITIONED BY (\n" + ",\n".join(partition_schema_lines) + "\n)"
         schema += FORMAT_SQL_MAPPING[data_format]
         schema += f"LOCATION\n  '{s3_base_url}'"
         return schema, columns
@@ -228,20 +222,44 @@ class AWSAthenaAdapter(Adapter):
         if data_format not in FORMAT_SQL_MAPPING:
             raise InvalidParamsError(f"Only formats {FORMAT_SQL_MAPPING.keys()} supported")
         s3_base_url = f"s3://{os.path.join(s3_bucket, s3_bucket_prefix)}"
+        partition_by = (
+            [column.strip() for column in uri.query["partition_by"].split(",")] if "partition_by" in uri.query else []
+        )
+        write_dataset = bool(partition_by) or "max_rows_per_file" in uri.query
+        if write_dataset and data_format != "parquet":
+            raise InvalidParamsError("partition_by and max_rows_per_file are only supported for data_format=parquet")
+        if set(partition_by) - set(df.columns):
+            raise InvalidParamsError(f"Unknown partition_by columns: {set(partition_by) - set(df.columns)}")
 
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Dump to temp file on  disk
-            filename = f"{uuid.uuid4()}.{data_format}"
-            temp_file_path = os.path.join(temp_dir, filename)
-            if data_format == "csv":
-                CSVAdapter.dump(df, uri=temp_file_path)
-            elif data_format == "parquet":
-                ParquetAdapter.dump(df, uri=temp_file_path)
+            # Dump to temp file(s) on disk, as (local path, path relative to the table's s3 prefix) pairs
+            if write_dataset:
+                import pyarrow
+
+                ParquetAdapter._normalize_column_types(df)
+                dataset_dir = os.path.join(temp_dir, "dataset")
+                temp_file_paths = write_parquet_dataset(
+                    pyarrow.Table.from_pandas(df, preserve_index=False),
+                    dataset_dir,
+                    partition_by=partition_by,
+                    max_rows_per_file=int(uri.query.get("max_rows_per_file", 0)) or None,
+                    # (Unique file names, so that the files never overwrite those of earlier appends)
+                    if_exists="append",
+                )
+                files = [(file_path, os.path.relpath(file_path, dataset_dir)) for file_path in temp_file_paths]
             else:
-                raise AssertionError
+                filename = f"{uuid.uuid4()}.{data_format}"
+                temp_file_path = os.path.join(temp_dir, filename)
+                if data_format == "csv":
+                    CSVAdapter.dump(df, uri=temp_file_path)
+                elif data_format == "parquet":
+                    ParquetAdapter.dump(df, uri=temp_file_path)
+                else:
+                    raise AssertionError
+                files = [(temp_file_path, filename)]
 
             # Manage Table DDL
-            schema_ddl, columns = AWSAthenaAdapter._gen_schema(df, data_format, table_name, s3_base_url)
+            schema_ddl, columns = AWSAthenaAdapter._gen_schema(df, data_format, table_name, s3_base_url, partition_by)
 
             try:
                 table_metadata = athena_client.get_table_metadata(
@@ -258,7 +276,10 @@ class AWSAthenaAdapter(Adapter):
                     raise TableAlreadyExistsError(f"{database}{table_name} already exists")
                 elif if_exists == "append":
                     pre_existing_columns = [col["Name"] for col in table_metadata["TableMetadata"]["Columns"]]
-                    if not pre_existing_columns == columns:
+                    pre_existing_partition_by = [
+                        col["Name"] for col in table_metadata["TableMetadata"].get("PartitionKeys", [])
+                    ]
+                    if not pre_existing_columns == columns or pre_existing_partition_by != partition_by:
                         raise AppendSchemeConflictError("Cannot append to existing table - schema mismatch")
                     pre_existing_s3_base_url = table_metadata["TableMetadata"]["Parameters"]["location"].strip("/")
                     if pre_existing_s3_base_url != s3_base_url.strip("/"):
@@ -280,7 +301,7 @@ class AWSAthenaAdapter(Adapter):
                 elif if_exists == "replace":
                     s3_bucket_prefix = os.path.join(s3_bucket_prefix, str(uuid.uuid4()))
                     s3_base_url = f"s3://{os.path.join(s3_bucket, s3_bucket_prefix)}"
-                    schema_ddl, _ = AWSAthenaAdapter._gen_schema(df, data_format, table_name, s3_base_url)
+                    schema_ddl, _ = AWSAthenaAdapter._gen_schema(df, data_format, table_name, s3_base_url, partition_by)
                     logger.warning(
                         f"Deleting table definition for {database}.{table_name}. Leaving old data behind and changing "
                         + f"prefix to {s3_bucket_prefix}/."
@@ -326,8 +347,24 @@ class AWSAthenaAdapter(Adapter):
                     athena_client=athena_client,
                 )
 
-            # Upload temp file to s3
+            # Upload temp file(s) to s3
             s3_client = boto3.client("s3")
-            s3_object_key = os.path.join(s3_bucket_prefix, filename)
-            logger.info(f"Uploading data to s3://{os.path.join(s3_bucket, s3_object_key)}")
-            s3_client.upload_file(temp_file_path, s3_bucket, s3_object_key)
+
+            def upload(file):
+                temp_file_path, relative_path = file
+                s3_object_key = os.path.join(s3_bucket_prefix, relative_path)
+                logger.info(f"Uploading data to s3://{os.path.join(s3_bucket, s3_object_key)}")
+                s3_client.upload_file(temp_file_path, s3_bucket, s3_object_key)
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(files), 16)) as executor:
+                list(executor.map(upload, files))
+
+            if partition_by:
+                # Register the (new) partitions with the table
+                AWSAthenaAdapter._run_athena_query(
+                    query=f"MSCK REPAIR TABLE `{table_name}`",
+                    aws_region=aws_region,
+                    catalog="AwsDataCatalog",
+                    database=database,
+                    athena_client=athena_client,
+                )
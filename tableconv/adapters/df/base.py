@@ -1,15 +1,33 @@
-from collections.abc import Iterator
+import contextlib
+import logging
+from collections.abc import Callable, Iterator
+from typing import TYPE_CHECKING
 
 import pandas as pd
 
 from tableconv.in_memory_query import query_in_memory
 
+if TYPE_CHECKING:
+    import pyarrow
+
+logger = logging.getLogger(__name__)
+
 
 class NoConfigurationOptionsAvailable(Exception):
     pass
 
 
 class Adapter:
+    # Set on adapters that natively implement load_arrow/dump_arrow, for columnar (pyarrow.Table) data exchange that
+    # never passes through pandas or Python objects.
+    arrow_native = False
+    # Set on adapters whose `query` is a DuckDB SQL query run in-memory on the whole loaded table (rather than a query
+    # in the source's own query language). The interactive shell loads these sources just once and reuses them.
+    in_memory_queries = False
+    # Set on adapters whose loading/dumping is mostly CPU-bound (e.g. parsing files), rather than waiting on a network
+    # service. `--multitable --jobs N` parallelizes conversions between such adapters using processes, not threads.
+    cpu_bound = False
+
     @classmethod
     def get_configuration_options_description(cls):
         raise NoConfigurationOptionsAvailable(str(cls.__name__))
@@ -37,13 +55,75 @@ class Adapter:
         raise NotImplementedError
 
     @classmethod
-    def load_multitable(cls, uri: str) -> Iterator[tuple[str, pd.DataFrame]]:
+    def load_arrow(cls, uri: str, query: str | None) -> "pyarrow.Table":
         raise NotImplementedError
 
     @classmethod
-    def dump_multitable(cls, df_multitable: Iterator[tuple[str, pd.DataFrame]], uri: str) -> str:
+    def dump_arrow(cls, table: "pyarrow.Table", uri: str) -> str | None:
         raise NotImplementedError
 
+    @classmethod
+    def load_batches(cls, uri: str, query: str | None, batch_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Streaming variant of ``load``, yielding the table as a series of DataFrames of roughly ``batch_size`` rows
+        each. Adapters that cannot stream fall back to yielding the entire table as a single batch.
+        """
+        yield cls.load(uri, query)
+
+    @classmethod
+    def dump_batches(cls, batches: Iterator[pd.DataFrame], uri: str) -> str | None:
+        """
+        Streaming variant of ``dump``. Adapters that cannot stream fall back to concatenating all the batches together
+        and then dumping that in one shot.
+        """
+        return cls.dump(pd.concat(list(batches), ignore_index=True), uri)
+
+    @classmethod
+    def push_down_filter(cls, uri: str, query: str | None, filter_sql: str) -> tuple[str | None, str | None]:
+        """
+        Override to push (parts of) the intermediate ``filter_sql`` down into the source ``query``, so that less data
+        needs to be loaded. Returns the rewritten query, and the filter that must still be run in-memory after loading
+        (or None, if the filter was fully pushed down). By default, nothing is pushed down.
+        """
+        return query, filter_sql
+
+    @classmethod
+    def list_multitable(cls, uri: str) -> list[tuple[str, str]]:
+        """
+        List the tables of a multitable source, as (table name, URI of just that table) pairs, so that the tables can
+        be loaded independently of each other (e.g. in parallel).
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def load_multitable(cls, uri: str) -> Iterator[tuple[str, pd.DataFrame]]:
+        for table_name, table_uri in cls.list_multitable(uri):
+            logger.info(f"Loading table {table_uri}")
+            yield table_name, cls.load(table_uri, query=None)
+
+    @classmethod
+    def open_multitable(cls, uri: str) -> contextlib.AbstractContextManager[Callable[[str], str]]:
+        """
+        Prepare a multitable destination. Returns a context manager yielding a function mapping a table name to the URI
+        to dump that table to, so that the tables can be dumped independently of each other (e.g. in parallel). Any
+        finalization of the destination happens once all tables have been dumped and the context exits.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def allows_concurrent_dumps(cls, uri: str) -> bool:
+        """Whether multiple tables of the multitable destination can be dumped to at the same time."""
+        return True
+
+    @classmethod
+    def dump_multitable(cls, df_multitable: Iterator[tuple[str, pd.DataFrame]], uri: str) -> str | None:
+        with cls.open_multitable(uri) as get_table_uri:
+            for table_name, df in df_multitable:
+                table_uri = get_table_uri(table_name)
+                logger.info(f"Dumping table {table_uri}")
+                cls.dump(df, table_uri)
+        return uri
+
 
 adapters: dict[str, Adapter] = {}
 read_adapters: dict[str, Adapter] = {}
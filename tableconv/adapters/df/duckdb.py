@@ -5,7 +5,7 @@ import uuid
 
 from tableconv.adapters.df.base import Adapter, register_adapter
 from tableconv.exceptions import InvalidQueryError
-from tableconv.in_memory_query import flatten_arrays_for_duckdb
+from tableconv.in_memory_query import prepare_df_for_duckdb
 from tableconv.uri import parse_uri
 
 logger = logging.getLogger(__name__)
@@ -53,8 +53,7 @@ class DuckDBFileAdapter(Adapter):
         db_path = os.path.abspath(os.path.expanduser(parsed_uri.path))
         conn = duckdb.connect(database=db_path, read_only=False)
 
-        flatten_arrays_for_duckdb(df)
         temp_table = str(uuid.uuid4().hex)
-        conn.register(temp_table, df)
+        conn.register(temp_table, prepare_df_for_duckdb(df))
         conn.execute(f'CREATE TABLE "{table_name}" AS SELECT * FROM "{temp_table}"')
         return db_path
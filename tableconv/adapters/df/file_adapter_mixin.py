@@ -1,56 +1,268 @@
+import concurrent.futures
+import contextlib
 import copy
+import glob
+import itertools
 import logging
+import multiprocessing
 import os
 import shlex
 import shutil
 import subprocess
 import sys
+from collections.abc import Iterator
 from io import IOBase
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
+import numpy as np
 import pandas as pd
 
 from tableconv.exceptions import URLInaccessibleError
+from tableconv.in_memory_query import (
+    TRANSPOSE_MACRO,
+    DuckDBCopy,
+    DuckDBScan,
+    UnsupportedScanError,
+    query_duckdb_scan,
+    query_in_memory,
+)
+from tableconv.parameter_parsing_utils import strtobool
 from tableconv.uri import encode_uri, parse_uri
 
+if TYPE_CHECKING:
+    import pyarrow
+
 logger = logging.getLogger(__name__)
 
+# Name of the column added by the ``source_file=true`` param.
+SOURCE_FILE_COLUMN = "_source_file"
+# Multi-file sources smaller than this (in total) are loaded sequentially, as starting up worker processes to parse the
+# files in parallel would take longer than it saves.
+PARALLEL_LOAD_MIN_BYTES = 32 * 1024**2
+
 
 class FileAdapterMixin:
+    in_memory_queries = True
+    cpu_bound = True
+    # Whether the adapter loads a directory itself, as one dataset (e.g. Hive-partitioned Parquet files), rather than as
+    # the list of the files in the directory.
+    dataset_directories = False
 
     @staticmethod
     def get_example_url(scheme):
         return f"example.{scheme}"
 
     @classmethod
-    def load(cls, uri: str, query: str | None) -> pd.DataFrame:
-        parsed_uri = parse_uri(uri)
+    def _resolve_load_path(cls, parsed_uri) -> str | IOBase | list[str]:
+        """
+        Returns the path of the file (or dataset directory) to load, or stdin, or (for a glob pattern like
+        ``/exports/2026-*.csv``, or for a directory) the sorted list of paths of the files to load together as one
+        table.
+        """
         if parsed_uri.authority == "-" or parsed_uri.path == "-" or parsed_uri.path == "/dev/fd/0":
-            path: str | IOBase = sys.stdin  # type: ignore[assignment]
             if os.environ.get("TABLECONV_MY_DAEMON_SUPERVISOR_PID"):
                 raise URLInaccessibleError(
                     "Error: STDIN does not yet work in daemon mode, sorry! Please restructure your command to buffer "
                     "the data to a file, or alternatively `tableconv --kill-daemon`"
                 )
+            return sys.stdin  # type: ignore[return-value]
+        path = os.path.expanduser(parsed_uri.path)
+        if os.path.isdir(path) and cls.dataset_directories:
+            return path
+        if os.path.isdir(path):
+            paths = [os.path.join(path, file) for file in sorted(os.listdir(path)) if not file.startswith(".")]
+        elif glob.has_magic(path) and not os.path.exists(path):
+            paths = sorted(glob.glob(path, recursive=True))
         else:
-            path = os.path.expanduser(parsed_uri.path)
-        df = cls.load_file(parsed_uri.scheme, path, parsed_uri.query)
+            return path
+        paths = [path for path in paths if os.path.isfile(path)]
+        if not paths:
+            raise URLInaccessibleError(f"No files found in {parsed_uri.path}")
+        return paths
+
+    @staticmethod
+    def _pop_source_file_column(params: dict[str, Any]) -> str | None:
+        """Handle the ``source_file=true`` param: add a column with the path of the file each row was loaded from."""
+        if strtobool(params.pop("source_file", "false")):
+            return SOURCE_FILE_COLUMN
+        return None
+
+    @classmethod
+    def load(cls, uri: str, query: str | None) -> pd.DataFrame:
+        parsed_uri = parse_uri(uri)
+        path = cls._resolve_load_path(parsed_uri)
+        source_file_column = cls._pop_source_file_column(parsed_uri.query)
+        params = parsed_uri.query
+        if query:
+            result = cls._query_via_duckdb_scan(parsed_uri.scheme, path, params, query, source_file_column)
+            if result is not None:
+                return result
+            params = cls.push_down_query(params, query)
+        df = cls._load_files(parsed_uri.scheme, path, params, source_file_column)
         return cls._query_in_memory(df, query)  # type: ignore[attr-defined]
 
+    @classmethod
+    def _load_files(
+        cls, scheme: str, path: str | IOBase | list[str], params: dict[str, Any], source_file_column: str | None
+    ) -> pd.DataFrame:
+        if not isinstance(path, list):
+            df = cls.load_file(scheme, path, params)
+            if source_file_column:
+                df[source_file_column] = path if isinstance(path, str) else "-"
+            return df
+        # (load_file may modify the params, so each file gets its own copy)
+        if len(path) > 1 and sum(os.path.getsize(file) for file in path) >= PARALLEL_LOAD_MIN_BYTES:
+            # Parsing is CPU-bound, so parse the files in parallel in worker processes.
+            logger.debug(f"Loading {len(path)} files in parallel")
+            with concurrent.futures.ProcessPoolExecutor(
+                min(len(path), os.cpu_count() or 1), mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                dfs = list(executor.map(cls.load_file, itertools.repeat(scheme), path, [dict(params) for _ in path]))
+        else:
+            dfs = [cls.load_file(scheme, file, dict(params)) for file in path]
+        # (Columns missing from some of the files are filled in with nulls)
+        df = pd.concat(dfs, ignore_index=True)
+        if source_file_column:
+            df[source_file_column] = np.repeat(path, [len(file_df) for file_df in dfs])
+        return df
+
+    @classmethod
+    def get_duckdb_scan(cls, scheme: str, path: str | list[str], params: dict[str, Any]) -> DuckDBScan | None:
+        """
+        Override to let DuckDB natively scan the file(s) when queried, instead of first loading them all via pandas.
+        Return None if the file format or any of the params cannot be exactly expressed in DuckDB.
+        """
+        return None
+
+    @classmethod
+    def get_duckdb_copy(cls, scheme: str, path: str, params: dict[str, Any]) -> DuckDBCopy | None:
+        """
+        Override to let DuckDB natively write the file, when converting from a file that DuckDB can natively scan.
+        Return None if the file format or any of the params cannot be exactly expressed in DuckDB.
+        """
+        return None
+
+    @classmethod
+    def push_down_query(cls, params: dict[str, Any], query: str) -> dict[str, Any]:
+        """
+        Override to pass (parts of) the ``query`` down to ``load_file``, so that it can skip loading data that the query
+        does not need, when the file is loaded in order to run the query in-memory. Returns the params to load the
+        file(s) with. The full query is still run in-memory afterwards. By default, nothing is pushed down.
+        """
+        return params
+
+    @classmethod
+    def get_source_duckdb_scan(cls, parsed_uri) -> DuckDBScan | None:
+        """The DuckDB scan of the file(s) of the source URI, if they are local files that DuckDB can natively scan."""
+        if parsed_uri.authority:
+            return None
+        path = cls._resolve_load_path(parsed_uri)
+        params = dict(parsed_uri.query)
+        source_file_column = cls._pop_source_file_column(params)
+        if not isinstance(path, str | list) or (isinstance(path, str) and not os.path.exists(path)):
+            return None
+        scan = cls.get_duckdb_scan(parsed_uri.scheme, path, params)
+        if scan is not None:
+            scan.source_file_column = source_file_column
+        return scan
+
+    @classmethod
+    def _query_via_duckdb_scan(
+        cls,
+        scheme: str,
+        path: str | IOBase | list[str],
+        params: dict[str, Any],
+        query: str,
+        source_file_column: str | None,
+        as_arrow: bool = False,
+    ):
+        import duckdb  # inline import for performance
+
+        if isinstance(path, IOBase) or (isinstance(path, str) and not os.path.exists(path)) or TRANSPOSE_MACRO in query:
+            return None
+        scan = cls.get_duckdb_scan(scheme, path, params)
+        if scan is None:
+            return None
+        scan.source_file_column = source_file_column
+        try:
+            return query_duckdb_scan(scan, query, as_arrow=as_arrow)
+        except (
+            duckdb.InvalidInputException,
+            duckdb.ConversionException,
+            duckdb.IOException,
+            UnsupportedScanError,
+        ) as exc:
+            logger.debug(f"DuckDB is unable to natively scan {path}, falling back to loading it via pandas: {exc}")
+            return None
+
+    @classmethod
+    def load_batches(cls, uri: str, query: str | None, batch_size: int) -> Iterator[pd.DataFrame]:
+        if query:
+            # In-memory queries need to see the whole table at once.
+            yield cls.load(uri, query)
+            return
+        parsed_uri = parse_uri(uri)
+        path = cls._resolve_load_path(parsed_uri)
+        source_file_column = cls._pop_source_file_column(parsed_uri.query)
+        for file in path if isinstance(path, list) else [path]:
+            for batch in cls.load_file_batches(parsed_uri.scheme, file, dict(parsed_uri.query), batch_size):
+                if source_file_column:
+                    batch[source_file_column] = file if isinstance(file, str) else "-"
+                yield batch
+
+    @classmethod
+    def load_arrow(cls, uri: str, query: str | None) -> "pyarrow.Table":
+        import pyarrow  # inline import for performance
+
+        parsed_uri = parse_uri(uri)
+        path = cls._resolve_load_path(parsed_uri)
+        source_file_column = cls._pop_source_file_column(parsed_uri.query)
+        params = parsed_uri.query
+        if query:
+            result = cls._query_via_duckdb_scan(
+                parsed_uri.scheme, path, params, query, source_file_column, as_arrow=True
+            )
+            if result is not None:
+                return result
+            params = cls.push_down_query(params, query)
+        files = path if isinstance(path, list) else [path]
+        tables = [cls.load_file_arrow(parsed_uri.scheme, file, dict(params)) for file in files]
+        table = tables[0] if len(tables) == 1 else pyarrow.concat_tables(tables, promote_options="permissive")
+        if source_file_column:
+            files = [file if isinstance(file, str) else "-" for file in files]
+            values = np.repeat(files, [len(file_table) for file_table in tables])
+            table = table.append_column(source_file_column, pyarrow.array(values, pyarrow.string()))
+        if query:
+            return query_in_memory([("data", table)], query, as_arrow=True)
+        return table
+
+    @classmethod
+    def dump_arrow(cls, table: "pyarrow.Table", uri: str) -> str | None:
+        return cls._dump(cls.dump_file_arrow, table, uri)
+
     @classmethod
     def dump(cls, df, uri: str):
+        return cls._dump(cls.dump_file, df, uri)
+
+    @classmethod
+    def dump_batches(cls, batches: Iterator[pd.DataFrame], uri: str) -> str | None:
+        return cls._dump(cls.dump_file_batches, batches, uri)
+
+    @staticmethod
+    def _dump(dump_file_func, data, uri: str) -> str | None:
         parsed_uri = parse_uri(uri)
         if parsed_uri.authority == "-" or parsed_uri.path == "-" or parsed_uri.path == "/dev/fd/1":
             parsed_uri.path = "/dev/fd/1"
         try:
-            cls.dump_file(df, parsed_uri.scheme, parsed_uri.path, parsed_uri.query)
+            dump_file_func(data, parsed_uri.scheme, parsed_uri.path, parsed_uri.query)
         except BrokenPipeError:
             if parsed_uri.path == "/dev/fd/1":
                 # Ignore broken pipe error when outputting to stdout
-                return
+                return None
             raise
         if parsed_uri.path != "/dev/fd/1":
             return parsed_uri.path
+        return None
 
     @classmethod
     def load_file(cls, scheme: str, path: str | IOBase, params: dict[str, Any]) -> pd.DataFrame:
@@ -80,6 +292,26 @@ class FileAdapterMixin:
             # start of the buffer. Need to fix that first.
             print()
 
+    @classmethod
+    def load_file_batches(
+        cls, scheme: str, path: str | IOBase, params: dict[str, Any], batch_size: int
+    ) -> Iterator[pd.DataFrame]:
+        """Override to support streaming reads. By default, the whole file is loaded as a single batch."""
+        yield cls.load_file(scheme, path, params)
+
+    @classmethod
+    def dump_file_batches(cls, batches: Iterator[pd.DataFrame], scheme: str, path: str, params: dict[str, Any]) -> None:
+        """Override to support streaming writes. By default, all the batches are concatenated and dumped at once."""
+        cls.dump_file(pd.concat(list(batches), ignore_index=True), scheme, path, params)
+
+    @classmethod
+    def load_file_arrow(cls, scheme: str, path: str | IOBase, params: dict[str, Any]) -> "pyarrow.Table":
+        raise NotImplementedError
+
+    @classmethod
+    def dump_file_arrow(cls, table: "pyarrow.Table", scheme: str, path: str, params: dict[str, Any]) -> None:
+        raise NotImplementedError
+
     @classmethod
     def load_text_data(cls, scheme: str, data: str, params: dict[str, Any]) -> pd.DataFrame:
         raise NotImplementedError
@@ -89,7 +321,7 @@ class FileAdapterMixin:
         raise NotImplementedError
 
     @classmethod
-    def load_multitable(cls, uri):
+    def list_multitable(cls, uri):
         """Experimental feature. Undocumented. Low Quality."""
         parsed_uri = parse_uri(uri)
         parsed_uri.path, ext = os.path.splitext(parsed_uri.path)
@@ -105,16 +337,17 @@ class FileAdapterMixin:
                     "archive formats."
                 )
 
-        for file in os.listdir(parsed_uri.path):
+        tables = []
+        for file in sorted(os.listdir(parsed_uri.path)):
             table_name = os.path.splitext(file)[0]
             table_uri_parsed = copy.copy(parsed_uri)
             table_uri_parsed.path = os.path.join(parsed_uri.path, file)
-            logger.info(f"Loading table {encode_uri(table_uri_parsed)}")
-            df = cls.load(encode_uri(table_uri_parsed), query=None)
-            yield table_name, df
+            tables.append((table_name, encode_uri(table_uri_parsed)))
+        return tables
 
     @classmethod
-    def dump_multitable(cls, df_multitable, uri):
+    @contextlib.contextmanager
+    def open_multitable(cls, uri):
         """Experimental feature. Undocumented. Low Quality."""
         parsed_uri = parse_uri(uri)
 
@@ -129,13 +362,14 @@ class FileAdapterMixin:
                     "archive formats."
                 )
 
+        def get_table_uri(table_name):
+            table_uri_parsed = copy.copy(parsed_uri)
+            table_uri_parsed.path = os.path.join(parsed_uri.path, f"{table_name}.{parsed_uri.scheme}")
+            return encode_uri(table_uri_parsed)
+
         os.makedirs(parsed_uri.path, exist_ok=False)
         try:
-            for table_name, df in df_multitable:
-                table_uri_parsed = copy.copy(parsed_uri)
-                table_uri_parsed.path = os.path.join(table_uri_parsed.path, f"{table_name}.{parsed_uri.scheme}")
-                logger.info(f"Dumping table {encode_uri(table_uri_parsed)}")
-                cls.dump(df, encode_uri(table_uri_parsed))
+            yield get_table_uri
 
             if archive_format:
                 # TODO: this archiving tool is not packaged with tableconv. Find a good one..
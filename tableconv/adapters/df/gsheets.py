@@ -59,6 +59,8 @@ def get_sheet_properties(spreadsheet_data, sheet_name):
 
 @register_adapter(["gsheets"])
 class GoogleSheetsAdapter(Adapter):
+    in_memory_queries = True
+
     @staticmethod
     def get_example_url(scheme):
         return "gsheets://:new:"
@@ -164,19 +166,19 @@ class GoogleSheetsAdapter(Adapter):
         return cls._query_in_memory(df, query)
 
     @classmethod
-    def load_multitable(cls, uri):
+    def list_multitable(cls, uri):
         """Experimental feature. Undocumented. Low Quality."""
         parsed_uri = parse_uri(uri)
         spreadsheet_id = parsed_uri.authority
         assert parsed_uri.path.strip("/") == ""
         googlesheets = cls._get_googleapiclient_client("sheets", "v4")
         table_names = cls._get_sheet_names(googlesheets, spreadsheet_id)
+        tables = []
         for table_name in table_names:
             table_uri_parsed = copy.copy(parsed_uri)
             table_uri_parsed.path = f"/{table_name}"
-            logger.info(f"Loading table {encode_uri(table_uri_parsed)}")
-            df = cls.load(encode_uri(table_uri_parsed), query=None)
-            yield table_name, df
+            tables.append((table_name, encode_uri(table_uri_parsed)))
+        return tables
 
     @classmethod
     def dump_multitable(cls, df_multitable, uri):
@@ -10,6 +10,8 @@ logger = logging.getLogger(__name__)
 
 @register_adapter(["iceberg"])
 class IcebergAdapter(Adapter):
+    arrow_native = True
+
     @staticmethod
     def get_example_url(scheme):
         return f"{scheme}:///tmp/warehouse?catalog_uri=sqlite:////tmp/warehouse/pyiceberg_catalog.db"
@@ -32,6 +34,10 @@ class IcebergAdapter(Adapter):
 
     @staticmethod
     def load(uri, query):
+        return IcebergAdapter.load_arrow(uri, query).to_pandas()
+
+    @staticmethod
+    def load_arrow(uri, query):
         if query:
             raise InvalidParamsError(
                 "Querying is not currently supported for iceberg, no iceberg query engine is available in tableconv. "
@@ -60,10 +66,16 @@ class IcebergAdapter(Adapter):
                     f"{path} is invalid. Either use a catalog_uri, or pass a direct table .metadata.json file"
                 )
 
-        return table.scan().to_pandas()
+        return table.scan().to_arrow()
 
     @staticmethod
     def dump(df, uri):
+        import pyarrow
+
+        return IcebergAdapter.dump_arrow(pyarrow.Table.from_pandas(df), uri)
+
+    @staticmethod
+    def dump_arrow(arrow_table, uri):
         parsed_uri = parse_uri(uri)
         table_name = parsed_uri.query.get("table_name", parsed_uri.query.get("table", None))
         if not table_name:
@@ -76,23 +88,19 @@ class IcebergAdapter(Adapter):
         if namespace not in (i[0] for i in catalog.list_namespaces()):
             catalog.create_namespace(namespace)
 
-        import pyarrow
-
-        df = pyarrow.Table.from_pandas(df)
-
         exists = table_name in (i[0] for i in catalog.list_tables(namespace))
         if exists:
             table = catalog.load_table(f"{namespace}.{table_name}")
             if if_exists == "error":
                 raise InvalidParamsError(f"table {table_name} already exists")
             elif if_exists == "append":
-                table.append(df)
+                table.append(arrow_table)
             elif if_exists == "replace":
-                table.overwrite(df)
+                table.overwrite(arrow_table)
         else:
 
             table = catalog.create_table(
                 f"{namespace}.{table_name}",
-                schema=df.schema,
+                schema=arrow_table.schema,
             )
-            table.append(df)
+            table.append(arrow_table)
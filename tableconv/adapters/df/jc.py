@@ -23,6 +23,8 @@ class JC(Adapter):
     See https://github.com/kellyjonbrazil/jc
     """
 
+    in_memory_queries = True
+
     @staticmethod
     def get_example_url(scheme):
         return f"{scheme}://ls -l example"
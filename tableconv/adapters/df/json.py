@@ -1,13 +1,33 @@
+import contextlib
 import json
 import os
 import sys
-from typing import Any
+from collections.abc import Iterator
+from typing import IO, Any
 
 import pandas as pd
 
 from tableconv.adapters.df.base import Adapter, register_adapter
 from tableconv.adapters.df.file_adapter_mixin import FileAdapterMixin
-from tableconv.exceptions import InvalidParamsError, SourceParseError, TableAlreadyExistsError
+from tableconv.exceptions import (
+    AppendSchemeConflictError,
+    InvalidParamsError,
+    TableAlreadyExistsError,
+)
+from tableconv.in_memory_query import DUCKDB_TEMPORAL_TYPES, DuckDBCopy, DuckDBScan
+from tableconv.json_data_model import (
+    PARALLEL_LOAD_MIN_BYTES,
+    RecordColumns,
+    dumps_json_records,
+    iter_json_records_text,
+    iter_jsonl_record_batches,
+    iter_record_chunks,
+    json_default,
+    load_json_records,
+    load_jsonl_parallel,
+    validate_json_record,
+    write_json_records,
+)
 
 
 @register_adapter(["json", "jsonl", "jsonlines", "ldjson", "ndjson"])
@@ -26,62 +46,66 @@ class JSONAdapter(FileAdapterMixin, Adapter):
                 lines=(scheme == "jsonl"),
                 orient="records",
             )
-        # TODO: All the below code is just a custom json parser wrapper alternative to pd.read_json(), in order to let
-        # us flatten it (b/c preserve_nesting=False). But it doesn't make sense to me that this re-implementation is
-        # needed, shouldn't pandas have a way to use read_json combined with json_normalize? Both are from pandas..
-        # I am probably missing a flag or something somewhere in pandas.
-        if hasattr(path, "read"):
-            raw_json = path.read()
-        else:
-            raw_json = open(path).read()
-        if scheme == "json":
-            raw_array = json.loads(raw_json)
-            if not isinstance(raw_array, list):
-                raise SourceParseError("Input must be a JSON array")
-        elif scheme == "jsonl":
-            raw_array = []
-            for line_number, line in enumerate(raw_json.splitlines()):
-                try:
-                    raw_array.append(json.loads(line))
-                except json.JSONDecodeError as exc:
-                    # Edit the exception to have a better error message that references the real line number.
-                    exc.args = (exc.args[0].replace(": line 1 column", f": line {line_number + 1} column"),)
-                    exc.lineno = line_number + 1
-                    raise exc
-        else:
-            raise AssertionError
-        for i, item in enumerate(raw_array):
-            if not isinstance(item, dict):
-                if isinstance(item, (int, float)):
-                    json_type = "number"
-                elif isinstance(item, str):
-                    json_type = "string"
-                elif isinstance(item, list):
-                    json_type = "array"
-                else:
-                    json_type = str(type(item))
-                raise SourceParseError(
-                    f"Every element of the input {scheme} must be a JSON object. "
-                    f"(element {i + 1} in input was a JSON {json_type})"
-                )
-        return pd.json_normalize(raw_array, sep=nesting_sep)
+        # (Custom JSON parsing rather than pd.read_json(), in order to flatten it, b/c preserve_nesting=False)
+        if scheme == "jsonl" and isinstance(path, str) and (os.cpu_count() or 1) > 1:
+            if os.path.isfile(path) and os.path.getsize(path) >= PARALLEL_LOAD_MIN_BYTES:
+                return load_jsonl_parallel(path, nesting_sep, jobs=os.cpu_count() or 1)
+        # (JSONL is split into lines and parsed as bytes, JSON arrays are parsed as text)
+        with open_input(path, binary=(scheme == "jsonl")) as f:
+            return load_json_records(f, scheme, nesting_sep)
+
+    @staticmethod
+    def get_duckdb_scan(scheme, path, params):
+        if scheme in ("jsonlines", "ldjson", "ndjson"):
+            scheme = "jsonl"
+        if set(params) - {"preserve_nesting", "nesting_sep"}:
+            return None
+        preserve_nesting = params.get("preserve_nesting", "false").lower() == "true"
+        json_format = "array" if scheme == "json" else "newline_delimited"
+        # Disable DuckDB's date detection (by using formats that can never match), to leave dates as strings like
+        # pandas does.
+        return DuckDBScan(
+            "read_json",
+            path,
+            f"format='{json_format}', dateformat='%%%%', timestampformat='%%%%'",
+            nesting_sep=None if preserve_nesting else params.get("nesting_sep", "."),
+        )
+
+    @staticmethod
+    def get_duckdb_copy(scheme, path, params):
+        if scheme not in ("jsonl", "jsonlines", "ldjson", "ndjson") or params:
+            return None
+        if os.path.exists(path):
+            # Let the regular dump path raise the if_exists=fail error.
+            return None
+        # pandas serializes dates & times in ISO 8601 format, and decimals & binary in its own ways, unlike DuckDB.
+        return DuckDBCopy("FORMAT JSON", unsupported_types=DUCKDB_TEMPORAL_TYPES | {"decimal", "blob"})
+
+    @staticmethod
+    def load_file_batches(scheme, path, params, batch_size):
+        if scheme in ("jsonlines", "ldjson", "ndjson"):
+            scheme = "jsonl"
+        if scheme != "jsonl":
+            # A JSON array can only be parsed all at once.
+            yield JSONAdapter.load_file(scheme, path, params)
+            return
+
+        preserve_nesting = params.get("preserve_nesting", "false").lower() == "true"
+        nesting_sep = params.get("nesting_sep", ".")
+        if preserve_nesting:
+            with pd.read_json(path, lines=True, orient="records", chunksize=batch_size) as reader:
+                yield from reader
+            return
+
+        with open_input(path, binary=True) as f:
+            yield from iter_jsonl_record_batches(f, nesting_sep, batch_size)
 
     @staticmethod
     def dump_file(df, scheme, path, params):
         if scheme in ("jsonlines", "ldjson", "ndjson"):
             scheme = "jsonl"
 
-        if "if_exists" in params:
-            if_exists = params["if_exists"]
-            if if_exists == "error":
-                if_exists = "fail"
-            assert if_exists in {"fail", "append", "replace"}
-        elif "append" in params and params["append"].lower() != "false":
-            if_exists = "append"
-        elif "overwrite" in params and params["overwrite"].lower() != "false":
-            if_exists = "replace"
-        else:
-            if_exists = "fail"
+        if_exists = parse_if_exists(params)
 
         if "indent" in params:
             indent = int(params["indent"])
@@ -108,29 +132,31 @@ class JSONAdapter(FileAdapterMixin, Adapter):
         if exists and if_exists == "fail":
             raise TableAlreadyExistsError(f"{path} already exists")
         assert not exists or if_exists in {"append", "replace"}
-        if unnest:
-            records = unnest_df(df, nesting_sep=params.get("nesting_sep", "."))
-            with open(path, "r+") as buf:
-                if exists and if_exists == "append":
-                    buf.seek(0)
-                    records = json.load(buf) + records
-                buf.truncate(0)
-                json.dump(records, buf, default=json_encoder_default, indent=indent)
+        append = exists and if_exists == "append"
+        if append and scheme == "json" and orient not in ("records", "values"):
+            raise InvalidParamsError("Can only append to a JSON array: ?orient must be records or values")
+        nesting_sep = params.get("nesting_sep", ".") if unnest else None
+        if orient == "records" and indent is None:
+            if append and scheme == "json":
+                append_to_json_array(path, dumps_json_records(df, nesting_sep))
+            else:
+                with open(path, "a" if append else "w") as buf:
+                    write_json_records(df, buf, lines=(scheme == "jsonl"), nesting_sep=nesting_sep)
+        elif unnest:
+            records_json = json.dumps(unnest_df(df, nesting_sep), indent=indent)
+            if append:
+                append_to_json_array(path, records_json)
+            else:
+                with open(path, "w") as buf:
+                    buf.write(records_json)
         else:
             if orient in ["split", "index", "columns"]:
                 # Index required. Use first column as index.
                 df.set_index(df.columns[0], inplace=True)
 
-            if exists and if_exists == "append":
+            if append:
                 if scheme == "json":
-                    records = df.to_dict(orient=orient)
-                    with open(path, "r+") as buf:
-                        if exists and if_exists == "append":
-                            buf.seek(0)
-                            records = json.load(buf) + records
-                        buf.truncate(0)
-                        buf.seek(0)
-                        json.dump(records, buf, default=json_encoder_default, indent=indent)
+                    append_to_json_array(path, df.to_json(date_format="iso", indent=indent, orient=orient))
                 else:
                     with open(path, "a") as buf:
                         df.to_json(buf, lines=(scheme == "jsonl"), date_format="iso", indent=indent, orient=orient)
@@ -140,44 +166,127 @@ class JSONAdapter(FileAdapterMixin, Adapter):
         if scheme == "json" and path == "/dev/fd/1" and sys.stdout.isatty():
             print()
 
+    @staticmethod
+    def dump_file_batches(batches, scheme, path, params):
+        if scheme in ("jsonlines", "ldjson", "ndjson"):
+            scheme = "jsonl"
+        batches = iter(batches)
+        orient = params.get("format_mode", params.get("orient", params.get("mode", "records")))
+        if_exists = parse_if_exists(params)
+        exists = os.path.exists(path) and path != "/dev/fd/1"
+        streamable = orient == "records" and "indent" not in params and params.get("unnest", "false").lower() != "true"
+        if not streamable:
+            JSONAdapter.dump_file(pd.concat(list(batches), ignore_index=True), scheme, path, params)
+            return
 
-def json_encoder_default(obj):
-    if isinstance(obj, pd.Timestamp):
-        return obj.isoformat()
-    return obj
+        if scheme == "jsonl":
+            # The first batch takes care of the if_exists semantics, all the rest are simply appended.
+            JSONAdapter.dump_file(next(batches), scheme, path, params)
+            with open(path, "a") as buf:
+                for df in batches:
+                    write_json_records(df, buf, lines=True)
+            return
+
+        # JSON array: write out each batch's records, sharing a single set of enclosing brackets.
+        if exists and if_exists == "fail":
+            raise TableAlreadyExistsError(f"{path} already exists")
+        if exists and if_exists == "append":
+            for df in batches:
+                append_to_json_array(path, dumps_json_records(df))
+            return
+        with open(path, "w") as buf:
+            buf.write("[")
+            first = True
+            for df in batches:
+                for records_json in iter_json_records_text(df, ","):
+                    if not first:
+                        buf.write(",")
+                    buf.write(records_json[:-1])
+                    first = False
+            buf.write("]")
+        if path == "/dev/fd/1" and sys.stdout.isatty():
+            print()
+
+
+def parse_if_exists(params: dict[str, Any]) -> str:
+    if "if_exists" in params:
+        if_exists = params["if_exists"]
+        if if_exists == "error":
+            if_exists = "fail"
+        assert if_exists in {"fail", "append", "replace"}
+    elif "append" in params and params["append"].lower() != "false":
+        if_exists = "append"
+    elif "overwrite" in params and params["overwrite"].lower() != "false":
+        if_exists = "replace"
+    else:
+        if_exists = "fail"
+    return if_exists
+
+
+@contextlib.contextmanager
+def open_input(path, binary: bool):
+    if not hasattr(path, "read"):
+        with open(path, "rb" if binary else "r") as f:
+            yield f
+    elif binary:
+        # (e.g. sys.stdin)
+        yield getattr(path, "buffer", path)
+    else:
+        yield path
 
 
-def unnest_df(df, nesting_sep) -> list[dict]:
+def _find_last_non_whitespace(f: IO[bytes], end: int) -> int | None:
+    """Offset of the last non-whitespace byte before offset ``end`` of the file, reading it backwards in blocks."""
+    while end > 0:
+        start = max(end - 4096, 0)
+        f.seek(start)
+        block = f.read(end - start)
+        stripped = block.rstrip()
+        if stripped:
+            return start + len(stripped) - 1
+        end = start
+    return None
+
+
+def append_to_json_array(path: str, array_json: str) -> None:
     """
-    WARNING: extremely inefficient and weak/untested
+    Append the elements of ``array_json`` (the JSON text of an array) to the JSON array in the file at ``path``, in
+    place. Only the tail end of the file is read and rewritten, so appending costs time proportional to the new data,
+    not to the size of the existing file.
     """
-    # detect if unnesting has a naming conflict
-    columns = set(df.columns)
-    for column in columns:
-        if nesting_sep in column:
-            subkeys = column.split(nesting_sep)
-            subkeys_materialized = {".".join(subkeys[: x + 1]) for x in range(len(subkeys[:-1]))}
-            if subkeys_materialized.intersection(columns):
-                conflict_col = list(subkeys_materialized.intersection(columns))[0]
-                raise ValueError(f'Unnesting key conflict: column "{column}" conflicts with column "{conflict_col}"')
-                # TODO: rename the conflict in this case, somewhere.
-                # e.g. rename the conflict column to "{name}_unexpanded" or something?
-    # unnest
-    new_records = []
-    records = df.to_dict(orient="records")
-    for record in records:
-        new_record: dict[str, Any] = dict()
-        for key, value in record.items():
-            sub_keys = key.split(nesting_sep)
-            leaf_key = sub_keys[-1]
-            branch = new_record
-            for subkey in sub_keys[:-1]:
-                if subkey not in branch:
-                    branch[subkey] = dict()
-                branch = branch[subkey]
-            branch[leaf_key] = value
-        new_records.append(new_record)
-    return new_records
+    elements = array_json.strip()[1:-1].encode()
+    if not elements.strip():
+        return
+    with open(path, "r+b") as f:
+        close_bracket = _find_last_non_whitespace(f, f.seek(0, os.SEEK_END))
+        if close_bracket is None:
+            # (Empty file)
+            f.seek(0)
+            f.write(b"[" + elements + b"]")
+            f.truncate()
+            return
+        f.seek(0)
+        is_array = f.read(4096).lstrip().startswith(b"[")
+        f.seek(close_bracket)
+        if not is_array or f.read(1) != b"]":
+            raise AppendSchemeConflictError(f"Cannot append to {path}: existing file is not a JSON array")
+        trailing_whitespace = f.read()
+        last_value = _find_last_non_whitespace(f, close_bracket)
+        if last_value is None:
+            # (Not possible, as the file was checked to start with "[")
+            raise AppendSchemeConflictError(f"Cannot append to {path}: existing file is not a JSON array")
+        last_value_end = last_value + 1
+        f.seek(last_value_end - 1)
+        is_empty = f.read(1) == b"["
+        # (Overwrites the closing bracket, then writes it back again after the new elements)
+        f.seek(last_value_end)
+        f.write((b"" if is_empty else b",") + elements + b"]" + trailing_whitespace)
+        f.truncate()
+
+
+def unnest_df(df: pd.DataFrame, nesting_sep: str) -> list[dict]:
+    """The rows of a DataFrame as records, with columns unnested into nested objects, e.g. "a.b" -> {"a": {"b": ...}}"""
+    return json.loads(dumps_json_records(df, nesting_sep))
 
 
 @register_adapter(["msgpack"])
@@ -195,29 +304,78 @@ class MsgpackAdapter(FileAdapterMixin, Adapter):
 
     @staticmethod
     def load_file(scheme, path, params):
-        import msgpack
-
-        if hasattr(path, "read"):
-            raw_bytes = path.read()
-        else:
-            raw_bytes = open(path, "rb").read()
-        raw_array = msgpack.unpackb(raw_bytes)
-        if not isinstance(raw_array, list):
-            raise SourceParseError("Input must be a JSON array")
         preserve_nesting = params.get("preserve_nesting", "false").lower() == "true"
-        nesting_sep = params.get("nesting_sep", ".")
-        if preserve_nesting:
-            return pd.DataFrame.from_records(raw_array)
-        else:
-            return pd.json_normalize(raw_array, sep=nesting_sep)
+        with open_input(path, binary=True) as f:
+            if preserve_nesting:
+                return pd.DataFrame.from_records(list(iter_msgpack_records(f)))
+            columns = RecordColumns(params.get("nesting_sep", "."))
+            for i, record in enumerate(iter_msgpack_records(f)):
+                validate_json_record(record, scheme, i)
+                columns.append(record)
+            return columns.to_df()
+
+    @staticmethod
+    def load_file_batches(scheme, path, params, batch_size):
+        if params.get("preserve_nesting", "false").lower() == "true":
+            yield MsgpackAdapter.load_file(scheme, path, params)
+            return
+        columns = RecordColumns(params.get("nesting_sep", "."))
+        with open_input(path, binary=True) as f:
+            for i, record in enumerate(iter_msgpack_records(f)):
+                validate_json_record(record, scheme, i)
+                columns.append(record)
+                if columns.num_rows >= batch_size:
+                    yield columns.to_df()
+        if columns.num_rows:
+            yield columns.to_df()
 
     @staticmethod
     def dump_file(df, scheme, path, params):
+        MsgpackAdapter.dump_file_batches(iter([df]), scheme, path, params)
+
+    @staticmethod
+    def dump_file_batches(batches, scheme, path, params):
         import msgpack
 
-        assert params.get("if_exists") in {None, "replace"}
+        # (Unlike JSON, msgpack files are overwritten by default)
+        if_exists = parse_if_exists(params) if params.keys() & {"if_exists", "append", "overwrite"} else "replace"
+        exists = os.path.exists(path) and path != "/dev/fd/1"
+        if exists and if_exists == "fail":
+            raise TableAlreadyExistsError(f"{path} already exists")
+        orient = params.get("orient", "records")
+        if orient != "records":
+            if exists and if_exists == "append":
+                raise InvalidParamsError("?orient must be records to append")
+            with open(path, "wb") as buf:
+                buf.write(msgpack.packb(pd.concat(list(batches)).to_dict(orient=orient), default=json_default))
+            return
+
+        # Each batch is written as a separate array of records, so the output is a stream of arrays (unless there is
+        # just one batch). Appending likewise adds another array to the end of the stream.
+        packer = msgpack.Packer(default=json_default)
+        with open(path, "ab" if exists and if_exists == "append" else "wb") as buf:
+            for df in batches:
+                buf.write(packer.pack_array_header(len(df)))
+                for records in iter_record_chunks(df):
+                    buf.write(b"".join(map(packer.pack, records)))
 
-        records = df.to_dict(orient=params.get("orient", "records"))
 
-        with open(path, "wb") as buf:
-            buf.write(msgpack.packb(records))
+def iter_msgpack_records(f: IO[bytes]) -> Iterator[Any]:
+    """
+    Incrementally unpack a msgpack stream of records: a sequence of top-level arrays of records, and/or individual
+    records. (Usually a single array)
+    """
+    import msgpack
+
+    unpacker = msgpack.Unpacker(f, raw=False, strict_map_key=False)
+    while True:
+        try:
+            length = unpacker.read_array_header()
+        except msgpack.OutOfData:
+            return
+        except ValueError:
+            # Not an array, so a record by itself.
+            yield unpacker.unpack()
+            continue
+        for _ in range(length):
+            yield unpacker.unpack()
@@ -4,19 +4,38 @@ import ast
 import collections
 import csv
 import io
+import itertools
 import logging
 import os
 import re
+import uuid
+from typing import TYPE_CHECKING
 
 import pandas as pd
 
 from tableconv.adapters.df.base import Adapter, register_adapter
 from tableconv.adapters.df.file_adapter_mixin import FileAdapterMixin
+from tableconv.adapters.df.json import parse_if_exists
+from tableconv.exceptions import InvalidParamsError, TableAlreadyExistsError
+from tableconv.filter_pushdown import FilterPushdown, PushdownCondition, plan_filter_pushdown
+from tableconv.in_memory_query import (
+    DUCKDB_TEMPORAL_TYPES,
+    PANDAS_NA_VALUES,
+    DuckDBCopy,
+    DuckDBScan,
+    sql_string_literal,
+)
 from tableconv.parameter_parsing_utils import strtobool
 from tableconv.uri import parse_uri
 
+if TYPE_CHECKING:
+    import pyarrow
+
 logger = logging.getLogger(__name__)
 
+# The file extensions that pandas compresses/decompresses files based on
+COMPRESSED_FILE_EXTENSIONS = (".gz", ".bz2", ".zip", ".xz", ".zst", ".tar")
+
 
 @register_adapter(["csv", "tsv", "csv.gz", "csv.bz2", "csv.xz", "csv.zst"])
 class CSVAdapter(FileAdapterMixin, Adapter):
@@ -24,10 +43,15 @@ class CSVAdapter(FileAdapterMixin, Adapter):
     TODO: param documentation...
 
     encoding_errors=ignore, encoding_errors=replace, encoding_errors=backslashreplace
+
+    engine=arrow: Read/write with the multi-threaded pyarrow.csv parser/writer, rather than pandas. Loaded columns are
+    Arrow-backed. Only supports the params sep, skiprows, nrows, header, skipinitialspace and block_size (bytes parsed
+    per thread at a time).
     """
 
     @staticmethod
-    def load_file(scheme, path, params):
+    def _parse_load_params(scheme, params) -> bool:
+        """Normalize the stringly-typed URL params into pd.read_csv kwargs. Returns whether to stringify columns."""
         params["skipinitialspace"] = params.get("skipinitialspace", True)
         params["sep"] = params.get("sep", "\t" if scheme == "tsv" else ",")
         if "skiprows" in params:
@@ -40,13 +64,181 @@ class CSVAdapter(FileAdapterMixin, Adapter):
             stringify_cols = True
         if "dayfirst" in params:
             params["dayfirst"] = strtobool(params["dayfirst"])
+        return stringify_cols
+
+    @staticmethod
+    def _use_arrow_engine(params) -> bool:
+        """Handle the ``engine`` param: ``engine=arrow`` selects our multi-threaded pyarrow.csv based reader/writer."""
+        if params.get("engine") in ("arrow", "pyarrow"):
+            del params["engine"]
+            return True
+        return False
+
+    @staticmethod
+    def _open_arrow_input(path):
+        if not isinstance(path, str):
+            return path.buffer if isinstance(path, io.TextIOBase) else path
+        if path.endswith(".xz"):
+            # (Not one of the compression codecs supported by Arrow)
+            import lzma
+
+            return lzma.open(path, "rb")
+        import pyarrow
+
+        return pyarrow.input_stream(path, compression="detect")
+
+    @staticmethod
+    def _lstrip_arrow_strings(table):
+        """
+        Strip leading spaces from strings, to match pd.read_csv(skipinitialspace=True). Arrow already ignores them when
+        parsing numbers, but columns such as " true" still need their types inferred again once stripped.
+        """
+        import pyarrow
+        import pyarrow.compute
+
+        columns = []
+        for column in table.columns:
+            if pyarrow.types.is_string(column.type):
+                column = pyarrow.compute.utf8_ltrim(column, characters=" ")
+                for candidate_type in (pyarrow.bool_(), pyarrow.int64(), pyarrow.float64()):
+                    try:
+                        column = pyarrow.compute.cast(column, candidate_type)
+                        break
+                    except (pyarrow.ArrowInvalid, pyarrow.ArrowNotImplementedError):
+                        pass
+            columns.append(column)
+        names = [name.lstrip(" ") for name in table.column_names]
+        return pyarrow.Table.from_arrays(columns, names=names)
+
+    @staticmethod
+    def _load_file_arrow_engine(scheme, path, params):
+        import pyarrow.csv
+
+        header = ast.literal_eval(str(params.pop("header", "0")))
+        skiprows = int(params.pop("skiprows", 0))
+        nrows = int(params["nrows"]) if "nrows" in params else None
+        params.pop("nrows", None)
+        read_options = pyarrow.csv.ReadOptions(skip_rows=skiprows)
+        if "block_size" in params:
+            read_options.block_size = int(params.pop("block_size"))
+        if header is None:
+            read_options.autogenerate_column_names = True
+        elif isinstance(header, int):
+            read_options.skip_rows += header
+        else:
+            raise InvalidParamsError("engine=arrow only supports a single header row (header=N), or header=None")
+        sep = params.pop("sep", "\t" if scheme == "tsv" else ",")
+        skipinitialspace = strtobool(str(params.pop("skipinitialspace", "true")))
+        if params:
+            raise InvalidParamsError(f"Unsupported param(s) for engine=arrow: {', '.join(params)}")
+        parse_options = pyarrow.csv.ParseOptions(delimiter=sep)
+        convert_options = pyarrow.csv.ConvertOptions(strings_can_be_null=True)
+
+        source = CSVAdapter._open_arrow_input(path)
+        if nrows is None:
+            table = pyarrow.csv.read_csv(
+                source, read_options=read_options, parse_options=parse_options, convert_options=convert_options
+            )
+        else:
+            # Stop reading once enough rows have been parsed.
+            reader = pyarrow.csv.open_csv(
+                source, read_options=read_options, parse_options=parse_options, convert_options=convert_options
+            )
+            batches = []
+            row_count = 0
+            for batch in reader:
+                batches.append(batch)
+                row_count += batch.num_rows
+                if row_count >= nrows:
+                    break
+            table = pyarrow.Table.from_batches(batches, schema=reader.schema).slice(0, nrows)
+        if header is None:
+            # (Same column names as pandas generates)
+            table = table.rename_columns([str(i) for i in range(table.num_columns)])
+        if skipinitialspace:
+            table = CSVAdapter._lstrip_arrow_strings(table)
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    @staticmethod
+    def load_file(scheme, path, params):
+        if CSVAdapter._use_arrow_engine(params):
+            return CSVAdapter._load_file_arrow_engine(scheme, path, params)
+        stringify_cols = CSVAdapter._parse_load_params(scheme, params)
         df = pd.read_csv(path, **params)
         if stringify_cols:
             df.columns = df.columns.astype(str)
         return df
 
+    @staticmethod
+    def get_duckdb_scan(scheme, path, params):
+        if scheme not in ("csv", "tsv", "csv.gz", "csv.zst") or set(params) - {"sep"}:
+            return None
+        sep = params.get("sep", "\t" if scheme == "tsv" else ",")
+        # Read everything as text, to then infer the column types like pandas would. (e.g. leave dates as strings)
+        return DuckDBScan(
+            "read_csv",
+            path,
+            f"header=true, delim={sql_string_literal(sep)}, all_varchar=true",
+            lstrip_strings=True,
+            null_strings=PANDAS_NA_VALUES,
+            pandas_csv_types=True,
+        )
+
+    @staticmethod
+    def get_duckdb_copy(scheme, path, params):
+        if scheme not in ("csv", "tsv") or set(params) - {"sep"}:
+            return None
+        sep = params.get("sep", "\t" if scheme == "tsv" else ",")
+        return DuckDBCopy(
+            f"FORMAT CSV, HEADER, DELIMITER {sql_string_literal(sep)}",
+            # pandas writes booleans as True/False, nested & binary values as Python reprs, and times in its own format.
+            unsupported_types=DUCKDB_TEMPORAL_TYPES | {"boolean", "list", "struct", "map", "blob"},
+        )
+
+    @staticmethod
+    def load_file_batches(scheme, path, params, batch_size):
+        if CSVAdapter._use_arrow_engine(params):
+            # (Not streamed)
+            yield CSVAdapter._load_file_arrow_engine(scheme, path, params)
+            return
+        stringify_cols = CSVAdapter._parse_load_params(scheme, params)
+        with pd.read_csv(path, chunksize=batch_size, **params) as reader:
+            for df in reader:
+                if stringify_cols:
+                    df.columns = df.columns.astype(str)
+                yield df
+
+    @staticmethod
+    def _dump_file_arrow_engine(df, path_or_buf, params) -> bool:
+        """Returns False if the data cannot be converted into Arrow, in which case pandas needs to write it instead."""
+        import pyarrow
+        import pyarrow.csv
+
+        if strtobool(str(params.pop("index"))):
+            raise InvalidParamsError("engine=arrow does not support index=true")
+        header = params.pop("header", True)
+        write_options = pyarrow.csv.WriteOptions(
+            include_header=strtobool(header) if isinstance(header, str) else bool(header),
+            delimiter=params.pop("sep"),
+            quoting_style="needed",
+        )
+        if params:
+            raise InvalidParamsError(f"Unsupported param(s) for engine=arrow: {', '.join(params)}")
+        try:
+            table = pyarrow.Table.from_pandas(df, preserve_index=False)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, pyarrow.ArrowNotImplementedError) as exc:
+            logger.debug(f"Unable to write via engine=arrow, falling back to pandas: {exc}")
+            return False
+        if isinstance(path_or_buf, str):
+            pyarrow.csv.write_csv(table, path_or_buf, write_options=write_options)
+        else:
+            with path_or_buf:
+                pyarrow.csv.write_csv(table, path_or_buf.buffer, write_options=write_options)
+        return True
+
     @staticmethod
     def dump_file(df, scheme, path, params):
+        use_arrow_engine = CSVAdapter._use_arrow_engine(params)
         params["index"] = params.get("index", False)
         params["sep"] = params.get("sep", "\t" if scheme == "tsv" else ",")
         path_or_buf = path
@@ -68,8 +260,25 @@ class CSVAdapter(FileAdapterMixin, Adapter):
                 else:
                     assert if_exists == "fail"
                     # (continue, df.to_csv will fail)
+        if use_arrow_engine and CSVAdapter._dump_file_arrow_engine(df, path_or_buf, dict(params)):
+            return
         df.to_csv(path_or_buf, **params)
 
+    @staticmethod
+    def dump_file_batches(batches, scheme, path, params):
+        if isinstance(path, str) and path.endswith(COMPRESSED_FILE_EXTENSIONS):
+            # The batches can't be appended to a compressed file (pandas compresses based on the file extension), so
+            # write them all at once.
+            CSVAdapter.dump_file(pd.concat(list(batches), ignore_index=True), scheme, path, params)
+            return
+        batches = iter(batches)
+        CSVAdapter.dump_file(next(batches), scheme, path, params)
+        # The first batch took care of the header and the if_exists semantics, all the rest are simply appended.
+        params["header"] = False
+        with open(path, "a", newline="") as f:
+            for df in batches:
+                df.to_csv(f, **params)
+
 
 def normalize_pandas_multiindex(df, nesting_sep: str, truncate_redundant_hierarchy: bool) -> None:
     # This function is similar to pandas.json_normalize in that it takes a hierarchical column organization structure
@@ -166,13 +375,374 @@ class ExcelAdapter(FileAdapterMixin, Adapter):
         path = os.path.expanduser(parsed_uri.path)
         yield from pd.read_excel(path, **parsed_uri.query, sheet_name=None).items()
 
+    @classmethod
+    def list_multitable(cls, uri):
+        # (All the sheets are read in a single pass over the workbook, rather than independently)
+        raise NotImplementedError
+
+
+# Params that ParquetAdapter reads via pyarrow's row group level API, rather than passing on to pd.read_parquet.
+PARQUET_READ_PARAMS = {"columns", "row_groups", "pushdown"}
+# Params that make ParquetAdapter write a dataset (a directory of files), rather than a single file.
+PARQUET_DATASET_PARAMS = {"partition_by", "max_rows_per_file"}
+# Operators whose result for NaN cannot be told from the min/max statistics, as Parquet statistics exclude NaNs, but
+# DuckDB sorts NaN above every other value.
+NAN_MATCHING_OPERATORS = {">", ">=", "!=", "not in"}
+
+
+def _parse_parquet_columns(value) -> list[str]:
+    if isinstance(value, list):
+        return value
+    return [column.strip() for column in str(value).split(",")]
+
+
+def _parse_parquet_row_groups(value) -> list[int]:
+    """Parse ?row_groups=, a comma-separated list of row group indexes and ranges of indexes, e.g. ``0,3-5``"""
+    if isinstance(value, list):
+        return value
+    row_groups: list[int] = []
+    try:
+        for part in str(value).split(","):
+            start, _, end = part.strip().partition("-")
+            row_groups.extend(range(int(start), int(end or start) + 1))
+    except ValueError:
+        raise InvalidParamsError(
+            "?row_groups must be a comma-separated list of row group indexes, e.g. 0,3-5"
+        ) from None
+    return row_groups
+
+
+def _check_row_groups(path, row_groups: list[int], num_row_groups: int) -> None:
+    if any(not 0 <= i < num_row_groups for i in row_groups):
+        raise InvalidParamsError(f"?row_groups out of range, {path} has {num_row_groups} row groups")
+
+
+def _statistics_may_match(statistics, physical_type: str, num_rows: int, condition: PushdownCondition) -> bool:
+    if condition.operator == "is null":
+        return not statistics.has_null_count or statistics.null_count > 0
+    if condition.operator == "is not null":
+        return not statistics.has_null_count or statistics.null_count < num_rows
+    if statistics.has_null_count and statistics.null_count == num_rows:
+        # (Comparisons with null are never true)
+        return False
+    if not statistics.has_min_max:
+        return True
+    if physical_type in ("FLOAT", "DOUBLE") and condition.operator in NAN_MATCHING_OPERATORS:
+        return True
+    low, high = statistics.min, statistics.max
+    values = condition.values
+    try:
+        if condition.operator == "=":
+            return low <= values[0] <= high
+        if condition.operator == "!=":
+            return not low == high == values[0]
+        if condition.operator == "<":
+            return low < values[0]
+        if condition.operator == "<=":
+            return low <= values[0]
+        if condition.operator == ">":
+            return high > values[0]
+        if condition.operator == ">=":
+            return high >= values[0]
+        if condition.operator == "in":
+            return any(low <= value <= high for value in values)
+        if condition.operator == "not in":
+            return not (low == high and low in values)
+        if condition.operator == "between":
+            return low <= values[1] and high >= values[0]
+    except TypeError:
+        # Constants of a different type than the column (e.g. a string compared to a timestamp column) are implicitly
+        # cast by DuckDB. Don't try to replicate that here.
+        return True
+    return True
+
+
+def _row_group_may_match(row_group, conditions: list[PushdownCondition]) -> bool:
+    """
+    Whether any of the rows in the Parquet row group could match all the conditions, going by the min/max/null count
+    statistics of its columns. (Errs on the side of True, the query still filters the loaded rows exactly.)
+    """
+    columns = {row_group.column(i).path_in_schema: row_group.column(i) for i in range(row_group.num_columns)}
+    for condition in conditions:
+        column = columns.get(condition.column)
+        if column is None or column.statistics is None:
+            continue
+        if not _statistics_may_match(column.statistics, column.physical_type, row_group.num_rows, condition):
+            return False
+    return True
+
+
+def _pushdown_columns(pushdown: FilterPushdown, schema, columns: list[str] | None) -> list[str] | None:
+    """The columns to read for the query of the ``pushdown``, out of the ``columns`` to read (None for all)"""
+    import pyarrow
+
+    # (Nested columns are not projected, as fields of STRUCTs are referenced like columns)
+    if pushdown.referenced_columns is None or any(pyarrow.types.is_nested(field.type) for field in schema):
+        return columns
+    return [column for column in columns or schema.names if column in pushdown.referenced_columns]
+
+
+def _parquet_dataset_files(path: str) -> list[str]:
+    """The files of a Parquet dataset directory. (Like pyarrow, skips files and directories named ``_*`` or ``.*``)"""
+    files: list[str] = []
+    for directory, subdirectories, filenames in os.walk(path):
+        subdirectories[:] = sorted(name for name in subdirectories if not name.startswith(("_", ".")))
+        files.extend(os.path.join(directory, name) for name in sorted(filenames) if not name.startswith(("_", ".")))
+    return files
+
+
+def _hive_partition_types(path: str, files: list[str]) -> dict[str, str]:
+    """
+    The DuckDB types of the Hive-style partition columns of a Parquet dataset, the same as pyarrow infers them: integers
+    if every value is an integer, else strings. (DuckDB on its own would also read e.g. dates as dates)
+    """
+    partition_values: dict[str, set[str]] = {}
+    for file in files:
+        for part in os.path.relpath(os.path.dirname(file), path).split(os.sep):
+            key, sep, value = part.partition("=")
+            if sep:
+                partition_values.setdefault(key, set()).add(value)
+    return {
+        key: "INTEGER" if all(re.fullmatch(r"-?[0-9]+", value) for value in values) else "VARCHAR"
+        for key, values in partition_values.items()
+    }
+
+
+def _read_parquet_dataset(path: str, params) -> "pyarrow.Table":
+    """
+    Read a directory of Parquet files as one table. Hive-style partition directories (e.g. ``date=2026-01-01/``) are
+    read as columns.
+    """
+    import pyarrow.dataset
+
+    columns = _parse_parquet_columns(params.pop("columns")) if "columns" in params else None
+    pushdown: FilterPushdown | None = params.pop("pushdown", None)
+    if "row_groups" in params:
+        raise InvalidParamsError("?row_groups is not supported for dataset directories")
+    if params:
+        raise InvalidParamsError(f"Unsupported params for dataset directories: {', '.join(params)}")
+    dataset = pyarrow.dataset.dataset(path, format="parquet", partitioning="hive")
+    if pushdown is not None:
+        columns = _pushdown_columns(
+            pushdown.resolve_columns(columns if columns is not None else dataset.schema.names), dataset.schema, columns
+        )
+    return dataset.to_table(columns=columns)
+
+
+def _read_parquet_table(path, params) -> "pyarrow.Table":
+    """
+    Read just the ``columns`` and ``row_groups`` of the Parquet file. If given a ``pushdown`` of the query the file is
+    being loaded for, also skip the columns the query doesn't reference, and the row groups that (according to their
+    statistics) don't have any rows matching the query's WHERE conditions.
+    """
+    import pyarrow.parquet
+
+    columns = _parse_parquet_columns(params.pop("columns")) if "columns" in params else None
+    row_groups = _parse_parquet_row_groups(params.pop("row_groups")) if "row_groups" in params else None
+    pushdown: FilterPushdown | None = params.pop("pushdown", None)
+    if params:
+        raise InvalidParamsError(f"Unsupported params in combination with ?row_groups: {', '.join(params)}")
+
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    num_row_groups = parquet_file.metadata.num_row_groups
+    if row_groups is None:
+        row_groups = list(range(num_row_groups))
+    else:
+        _check_row_groups(path, row_groups, num_row_groups)
+
+    if pushdown is not None:
+        schema = parquet_file.schema_arrow
+        pushdown = pushdown.resolve_columns(columns if columns is not None else schema.names)
+        columns = _pushdown_columns(pushdown, schema, columns)
+        if pushdown.conditions:
+            row_groups = [
+                i for i in row_groups if _row_group_may_match(parquet_file.metadata.row_group(i), pushdown.conditions)
+            ]
+        logger.debug(f"Reading {len(row_groups)}/{num_row_groups} row groups, columns: {columns or 'all'}")
+    return parquet_file.read_row_groups(row_groups, columns=columns, use_pandas_metadata=True)
+
+
+def write_parquet_dataset(
+    data: "pyarrow.Table | pyarrow.RecordBatchReader",
+    path: str,
+    partition_by: list[str] | None = None,
+    max_rows_per_file: int | None = None,
+    row_group_size: int | None = None,
+    compression: str = "snappy",
+    if_exists: str = "fail",
+) -> list[str]:
+    """
+    Write a dataset of Parquet files into the directory ``path``, Hive-partitioned by the ``partition_by`` columns
+    (e.g. ``date=2026-01-01/region=eu/part-0.parquet``), splitting the data into files of at most ``max_rows_per_file``
+    rows. The files are written concurrently. Returns the paths of the files written.
+
+    ``if_exists=replace`` deletes the existing files of just the partitions being written to (or of the whole directory,
+    if not partitioned). ``if_exists=append`` adds new uniquely named files alongside any existing ones.
+    """
+    import pyarrow.dataset
+
+    if if_exists not in ("fail", "append", "replace"):
+        raise InvalidParamsError("valid values for if_exists are replace, append, or fail (default)")
+    if if_exists == "fail" and os.path.isdir(path) and os.listdir(path):
+        raise TableAlreadyExistsError(f"{path} already exists")
+    if row_group_size is None:
+        # (pyarrow's default)
+        row_group_size = 1024**2
+    if max_rows_per_file:
+        row_group_size = min(row_group_size, max_rows_per_file)
+    if if_exists == "append":
+        basename_template = f"part-{uuid.uuid4().hex}-{{i}}.parquet"
+    else:
+        basename_template = "part-{i}.parquet"
+
+    parquet_format = pyarrow.dataset.ParquetFileFormat()
+    paths: list[str] = []
+    pyarrow.dataset.write_dataset(
+        data,
+        path,
+        format=parquet_format,
+        file_options=parquet_format.make_write_options(compression=compression),
+        partitioning=partition_by or None,
+        partitioning_flavor="hive" if partition_by else None,
+        basename_template=basename_template,
+        max_rows_per_file=max_rows_per_file or 0,
+        # (Small batches are buffered up into full-sized row groups)
+        min_rows_per_group=row_group_size,
+        max_rows_per_group=row_group_size,
+        existing_data_behavior="delete_matching" if if_exists == "replace" else "overwrite_or_ignore",
+        file_visitor=lambda written_file: paths.append(written_file.path),
+    )
+    return sorted(paths)
+
 
 @register_adapter(["parquet"])
 class ParquetAdapter(FileAdapterMixin, Adapter):
+    """
+    columns=a,b: Only load these columns.
+    row_groups=0,3-5: Only load these row groups (by index).
+
+    compression=zstd, row_group_size=100000: Compression codec, and maximum number of rows per row group, when writing.
+    partition_by=date,region: Write a Hive-partitioned dataset, into the directory of the URL, with a subdirectory per
+        distinct value of each column, e.g. ``date=2026-01-01/region=eu/part-0.parquet``. The files are written
+        concurrently. Supports if_exists=fail (default), append and replace (of just the partitions written to).
+    max_rows_per_file=5000000: Write a dataset (as above), split into files of at most this many rows.
+
+    Queries are run by DuckDB directly against the file if possible, which only reads the columns and row groups that
+    the query needs. Otherwise, the query is still used to skip loading unreferenced columns, and row groups whose
+    statistics show they can't match the query's WHERE conditions. Filters (-F) are run the same way.
+    """
+
+    arrow_native = True
+    dataset_directories = True
+
     @staticmethod
     def load_file(scheme, path, params):
+        if isinstance(path, str) and os.path.isdir(path) and not set(params) - PARQUET_READ_PARAMS:
+            return _read_parquet_dataset(path, params).to_pandas()
+        if "row_groups" in params or "pushdown" in params:
+            return _read_parquet_table(path, params).to_pandas()
+        if "columns" in params:
+            params["columns"] = _parse_parquet_columns(params["columns"])
         return pd.read_parquet(path, **params)
 
+    @staticmethod
+    def push_down_query(params, query):
+        if set(params) - PARQUET_READ_PARAMS:
+            return params
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            return params
+        pushdown = plan_filter_pushdown(query)
+        if pushdown is None:
+            return params
+        return {**params, "pushdown": pushdown}
+
+    @staticmethod
+    def push_down_filter(uri, query, filter_sql):
+        if query:
+            return query, filter_sql
+        # Run the filter as the source query instead, so that only the columns and row groups it needs get read.
+        return filter_sql, None
+
+    @staticmethod
+    def get_duckdb_scan(scheme, path, params):
+        if params:
+            return None
+        if isinstance(path, str) and os.path.isdir(path):
+            files = _parquet_dataset_files(path)
+            if not files:
+                return None
+            options = "hive_partitioning=true"
+            hive_types = [
+                f"{sql_string_literal(key)}: {duck_type}"
+                for key, duck_type in _hive_partition_types(path, files).items()
+            ]
+            if hive_types:
+                options += f", hive_types={{{', '.join(hive_types)}}}"
+            return DuckDBScan("read_parquet", files, options)
+        return DuckDBScan("read_parquet", path)
+
+    @staticmethod
+    def get_duckdb_copy(scheme, path, params):
+        if set(params) - {"compression"}:
+            return None
+        compression = params.get("compression", "snappy")
+        if compression.lower() not in ("snappy", "gzip", "zstd", "brotli", "lz4", "none"):
+            return None
+        if compression.lower() == "none":
+            compression = "uncompressed"
+        return DuckDBCopy(f"FORMAT PARQUET, COMPRESSION {compression}")
+
+    @staticmethod
+    def load_file_arrow(scheme, path, params):
+        import pyarrow
+        import pyarrow.parquet
+
+        if hasattr(path, "read"):
+            path = pyarrow.BufferReader(path.buffer.read() if hasattr(path, "buffer") else path.read())
+        elif os.path.isdir(path) and not set(params) - PARQUET_READ_PARAMS:
+            return _read_parquet_dataset(path, params)
+        if "row_groups" in params or "pushdown" in params:
+            return _read_parquet_table(path, params)
+        if "columns" in params:
+            params["columns"] = _parse_parquet_columns(params["columns"])
+        return pyarrow.parquet.read_table(path, **params)
+
+    @staticmethod
+    def load_file_batches(scheme, path, params, batch_size):
+        if hasattr(path, "read") or set(params) - PARQUET_READ_PARAMS:
+            yield ParquetAdapter.load_file(scheme, path, params)
+            return
+        columns = _parse_parquet_columns(params["columns"]) if "columns" in params else None
+        row_groups = _parse_parquet_row_groups(params["row_groups"]) if "row_groups" in params else None
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            import fastparquet
+
+            if row_groups is not None:
+                raise InvalidParamsError("?row_groups requires pyarrow") from None
+            # fastparquet can only stream at row group granularity.
+            yield from fastparquet.ParquetFile(path).iter_row_groups(columns=columns)
+            return
+        if os.path.isdir(path):
+            if row_groups is not None:
+                raise InvalidParamsError("?row_groups is not supported for dataset directories")
+            import pyarrow.dataset
+
+            dataset = pyarrow.dataset.dataset(path, format="parquet", partitioning="hive")
+            for record_batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+                yield record_batch.to_pandas()
+            return
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        if row_groups is not None:
+            _check_row_groups(path, row_groups, parquet_file.metadata.num_row_groups)
+        for record_batch in parquet_file.iter_batches(
+            batch_size=batch_size, row_groups=row_groups, columns=columns, use_pandas_metadata=True
+        ):
+            yield record_batch.to_pandas()
+
     @staticmethod
     def _normalize_column_types(df):
         """
@@ -187,12 +757,116 @@ class ParquetAdapter(FileAdapterMixin, Adapter):
         #     foot_size = f.write(fmd.to_bytes())
         df.columns = [str(c) for c in df.columns]
 
+    @staticmethod
+    def _dump_dataset(data, path, params):
+        if set(params) - PARQUET_DATASET_PARAMS - {"compression", "row_group_size", "if_exists"}:
+            raise InvalidParamsError(
+                f"Unsupported params in combination with ?partition_by/?max_rows_per_file: {', '.join(params)}"
+            )
+        write_parquet_dataset(
+            data,
+            path,
+            partition_by=_parse_parquet_columns(params["partition_by"]) if "partition_by" in params else None,
+            max_rows_per_file=int(params["max_rows_per_file"]) if "max_rows_per_file" in params else None,
+            row_group_size=int(params["row_group_size"]) if "row_group_size" in params else None,
+            compression=params.get("compression", "snappy"),
+            if_exists=parse_if_exists(params),
+        )
+
     @staticmethod
     def dump_file(df, scheme, path, params):
-        params["index"] = params.get("index", False)
         ParquetAdapter._normalize_column_types(df)
+        if set(params) & PARQUET_DATASET_PARAMS:
+            import pyarrow
+
+            ParquetAdapter._dump_dataset(pyarrow.Table.from_pandas(df, preserve_index=False), path, params)
+            return
+        params["index"] = params.get("index", False)
+        if "row_group_size" in params:
+            params["row_group_size"] = int(params["row_group_size"])
         df.to_parquet(path, **params)
 
+    @staticmethod
+    def dump_file_arrow(table, scheme, path, params):
+        import pyarrow.parquet
+
+        if set(params) & PARQUET_DATASET_PARAMS:
+            ParquetAdapter._dump_dataset(table, path, params)
+            return
+        if "row_group_size" in params:
+            params["row_group_size"] = int(params["row_group_size"])
+        pyarrow.parquet.write_table(table, path, **params)
+
+    @staticmethod
+    def _iter_arrow_tables(batches):
+        import pyarrow
+
+        schema = None
+        for df in batches:
+            ParquetAdapter._normalize_column_types(df)
+            if schema is None:
+                table = pyarrow.Table.from_pandas(df, preserve_index=False)
+                # Columns that are entirely null in the first batch have no known type yet. Guess string.
+                schema = pyarrow.schema(
+                    [
+                        field.with_type(pyarrow.string()) if pyarrow.types.is_null(field.type) else field
+                        for field in table.schema
+                    ],
+                    metadata=table.schema.metadata,
+                )
+                yield table.cast(schema)
+            else:
+                yield pyarrow.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+    @staticmethod
+    def dump_file_batches(batches, scheme, path, params):
+        dataset = bool(set(params) & PARQUET_DATASET_PARAMS)
+        supported_params = {"compression", "row_group_size"} | (
+            PARQUET_DATASET_PARAMS | {"if_exists"} if dataset else set()
+        )
+        if set(params) - supported_params:
+            ParquetAdapter.dump_file(pd.concat(list(batches), ignore_index=True), scheme, path, params)
+            return
+        if dataset:
+            import pyarrow
+
+            tables = ParquetAdapter._iter_arrow_tables(batches)
+            first_table = next(tables, None)
+            if first_table is None:
+                return
+            record_batches = (
+                record_batch for table in itertools.chain([first_table], tables) for record_batch in table.to_batches()
+            )
+            reader = pyarrow.RecordBatchReader.from_batches(first_table.schema, record_batches)
+            ParquetAdapter._dump_dataset(reader, path, params)
+            return
+
+        row_group_size = int(params["row_group_size"]) if "row_group_size" in params else None
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            import fastparquet
+
+            if row_group_size is not None:
+                params["row_group_offsets"] = row_group_size
+                del params["row_group_size"]
+            for i, df in enumerate(batches):
+                ParquetAdapter._normalize_column_types(df)
+                fastparquet.write(path, df, append=(i > 0), **params)
+            return
+
+        writer = None
+        try:
+            for table in ParquetAdapter._iter_arrow_tables(batches):
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(
+                        path, table.schema, compression=params.get("compression", "snappy")
+                    )
+                writer.write_table(table, row_group_size=row_group_size)
+        finally:
+            if writer is not None:
+                writer.close()
+
 
 @register_adapter(["h5", "hdf5"])
 class HDF5Adapter(FileAdapterMixin, Adapter):
@@ -225,15 +899,32 @@ class FWFAdapter(FileAdapterMixin, Adapter):
 
 @register_adapter(["feather"])
 class FeatherAdapter(FileAdapterMixin, Adapter):
+    arrow_native = True
+
     @staticmethod
     def load_file(scheme, path, params):
         return pd.read_feather(path, **params)
 
+    @staticmethod
+    def load_file_arrow(scheme, path, params):
+        import pyarrow
+        import pyarrow.feather
+
+        if hasattr(path, "read"):
+            path = pyarrow.BufferReader(path.buffer.read() if hasattr(path, "buffer") else path.read())
+        return pyarrow.feather.read_table(path, **params)
+
     @staticmethod
     def dump_file(df, scheme, path, params):
         params["index"] = params.get("index", False)
         df.to_feather(path, **params)
 
+    @staticmethod
+    def dump_file_arrow(table, scheme, path, params):
+        import pyarrow.feather
+
+        pyarrow.feather.write_feather(table, path, **params)
+
 
 @register_adapter(["orc"], read_only=True)
 class ORCAdapter(FileAdapterMixin, Adapter):
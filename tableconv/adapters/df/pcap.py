@@ -2,6 +2,7 @@ import json
 import os
 import subprocess
 import sys
+from collections.abc import Iterator
 from io import IOBase
 
 import pandas as pd
@@ -9,11 +10,14 @@ import pandas as pd
 from tableconv.adapters.df.base import Adapter, register_adapter
 from tableconv.adapters.df.file_adapter_mixin import FileAdapterMixin
 from tableconv.exceptions import InvalidParamsError
+from tableconv.json_data_model import flatten_records
 from tableconv.uri import parse_uri
 
 
 @register_adapter(["pcap", "pcapng"], read_only=True)
 class PcapAdapter(FileAdapterMixin, Adapter):
+    in_memory_queries = False  # (Queries are tshark display filters)
+
     @classmethod
     def load(cls, uri: str, query: str | None) -> pd.DataFrame:
         parsed_uri = parse_uri(uri)
@@ -26,15 +30,19 @@ class PcapAdapter(FileAdapterMixin, Adapter):
         impl = params.get("implementation", params.get("impl", "tshark"))
         if impl == "tshark":
             records = tshark_load(path, query)  # type: ignore[attr-defined]
-            df = pd.json_normalize(records)
-            return df
+            return flatten_records(records)
         # elif impl == "scapy":
         #     records = scapy_load(path)
-        #     df = pd.json_normalize(records)
+        #     df = flatten_records(records)
         #     return cls._query_in_memory(df, query)
         else:
             raise InvalidParamsError("valid options for ?impl= are tshark or scapy")
 
+    @classmethod
+    def load_batches(cls, uri: str, query: str | None, batch_size: int) -> Iterator[pd.DataFrame]:
+        # tshark output cannot be streamed, and this adapter does not go through load_file.
+        yield cls.load(uri, query)
+
 
 def walk_pcap_dict(new_record, data):
     for key, value in data.items():
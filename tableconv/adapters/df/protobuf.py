@@ -7,6 +7,7 @@ import subprocess
 
 from tableconv.adapters.df.base import Adapter, register_adapter
 from tableconv.exceptions import InvalidParamsError, SourceParseError
+from tableconv.json_data_model import flatten_records, validate_json_record
 from tableconv.uri import parse_uri
 
 logger = logging.getLogger(__name__)
@@ -80,4 +81,8 @@ class ProtobufAdapter(Adapter):
         else:
             raise type_exception
 
-        return JSONAdapter.load_file("json", io.StringIO(json.dumps(array_data)), parsed_uri.query)
+        if parsed_uri.query.get("preserve_nesting", "false").lower() == "true":
+            return JSONAdapter.load_file("json", io.StringIO(json.dumps(array_data)), parsed_uri.query)
+        for i, record in enumerate(array_data):
+            validate_json_record(record, "json", i)
+        return flatten_records(array_data, parsed_uri.query.get("nesting_sep", "."))
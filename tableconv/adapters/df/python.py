@@ -1,11 +1,11 @@
 import ast
 
 import numpy as np
-import pandas as pd
 
 from tableconv.adapters.df.base import Adapter, register_adapter
 from tableconv.adapters.df.file_adapter_mixin import FileAdapterMixin
 from tableconv.exceptions import SourceParseError
+from tableconv.json_data_model import flatten_records
 
 
 @register_adapter(["py", "python"])
@@ -25,7 +25,7 @@ class PythonAdapter(FileAdapterMixin, Adapter):
                     f"Every element of the input {scheme} must be a Python dict. "
                     f"(element {i + 1} in input was a Python {type(item)})"
                 )
-        return pd.json_normalize(raw_array)
+        return flatten_records(raw_array, params.get("nesting_sep", "."))
 
     @staticmethod
     def dump_text_data(df, scheme, params):
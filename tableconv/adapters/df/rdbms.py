@@ -1,4 +1,5 @@
 import configparser
+import contextlib
 import copy
 import logging
 import os
@@ -13,6 +14,7 @@ from tableconv.exceptions import (
     InvalidURLError,
     TableAlreadyExistsError,
 )
+from tableconv.filter_pushdown import plan_filter_pushdown
 from tableconv.uri import encode_uri, parse_uri
 
 logger = logging.getLogger(__name__)
@@ -88,43 +90,154 @@ class RDBMSAdapter(Adapter):
 
     @staticmethod
     def load(uri, query):
-        import sqlalchemy.exc  # sqlalchemy imports are inlined for startup performance
+        return RDBMSAdapter._load(uri, query, chunksize=None)
 
-        engine, table = RDBMSAdapter._get_engine_and_table_from_uri(parse_uri(uri))
+    @staticmethod
+    def load_batches(uri, query, batch_size):
+        yield from RDBMSAdapter._load(uri, query, chunksize=batch_size)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _translate_load_errors(query, table):
+        import sqlalchemy.exc  # sqlalchemy imports are inlined for startup performance
 
         if query:
             try:
-                # PD_VERSION = [int(i) for i in pd.__version__.split(".")]
-                # if PD_VERSION[0] >= 2 and PD_VERSION[1] >= 2 and PD_VERSION[2] >= 2:
-                #     with engine.connect() as conn:
-                #         return pd.read_sql(sql=query, con=conn.connection)
-                # else:
-                return pd.read_sql(sql=query, con=engine)
+                yield
             except sqlalchemy.exc.ProgrammingError as exc:
                 raise InvalidQueryError(*exc.args) from exc
             except sqlalchemy.exc.OperationalError as exc:
                 if "syntax error" in exc.args[0]:
                     raise InvalidQueryError(*exc.args) from exc
                 raise exc
-        elif table:
+        else:
             try:
-                return pd.read_sql_table(table, engine)
+                yield
             except sqlalchemy.exc.OperationalError as exc:
                 raise InvalidURLError(*exc.args) from exc
             except ValueError as exc:
                 if exc.args[0] == f"Table {table} not found":
                     raise InvalidURLError(*exc.args) from exc
                 raise
-        else:
+
+    @staticmethod
+    def _iter_chunks(chunks, query, table):
+        # (The chunks are only fetched from the database as they are iterated, which can fail too)
+        with RDBMSAdapter._translate_load_errors(query, table):
+            yield from chunks
+
+    @staticmethod
+    def _load(uri, query, chunksize):
+        engine, table = RDBMSAdapter._get_engine_and_table_from_uri(parse_uri(uri))
+        if not query and not table:
             raise InvalidParamsError(
                 "Please pass a SELECT SQL query to run (-q <sql>), or include a `table` in the URI"
                 " query string to dump a whole table."
             )
 
+        with RDBMSAdapter._translate_load_errors(query, table):
+            if query:
+                # PD_VERSION = [int(i) for i in pd.__version__.split(".")]
+                # if PD_VERSION[0] >= 2 and PD_VERSION[1] >= 2 and PD_VERSION[2] >= 2:
+                #     with engine.connect() as conn:
+                #         return pd.read_sql(sql=query, con=conn.connection)
+                # else:
+                result = pd.read_sql(sql=query, con=engine, chunksize=chunksize)
+            else:
+                result = pd.read_sql_table(table, engine, chunksize=chunksize)
+        if chunksize is None:
+            return result
+        return RDBMSAdapter._iter_chunks(result, query, table)
+
     @staticmethod
-    def dump(df, uri):
-        import sqlalchemy.exc  # sqlalchemy imports are inlined for startup performance
+    def push_down_filter(uri, query, filter_sql):
+        import sqlalchemy  # sqlalchemy imports are inlined for startup performance
+
+        pushdown = plan_filter_pushdown(filter_sql)
+        if pushdown is None:
+            return query, filter_sql
+        # String comparisons follow the database's collation (e.g. case-insensitive in MySQL), not DuckDB's, so those
+        # are left to the in-memory filter.
+        conditions = [
+            condition
+            for condition in pushdown.conditions
+            if not any(isinstance(value, str) for value in condition.values)
+        ]
+        if len(conditions) < len(pushdown.conditions):
+            pushdown.conditions = conditions
+            pushdown.complete = False
+        engine, table = RDBMSAdapter._get_engine_and_table_from_uri(parse_uri(uri))
+        if query:
+            source = sqlalchemy.text(query.strip().rstrip(";")).columns().subquery("data")
+        elif table:
+            source = sqlalchemy.table(table)
+        else:
+            return query, filter_sql
 
+        # Look up the source's column names, to be able to match them case-insensitively like DuckDB does.
+        try:
+            with engine.connect() as conn:
+                source_columns = list(
+                    conn.execute(sqlalchemy.select(sqlalchemy.text("*")).select_from(source).limit(0)).keys()
+                )
+        except sqlalchemy.exc.SQLAlchemyError as exc:
+            # (Let the actual load report the error)
+            logger.debug(f"Unable to push down filter: {exc}")
+            return query, filter_sql
+        pushdown = pushdown.resolve_columns(source_columns)
+
+        if pushdown.complete and pushdown.projection is not None:
+            columns = [
+                sqlalchemy.column(column).label(alias) if alias else sqlalchemy.column(column)
+                for column, alias in pushdown.projection
+            ]
+        elif not pushdown.complete and pushdown.referenced_columns is not None:
+            columns = [sqlalchemy.column(column) for column in source_columns if column in pushdown.referenced_columns]
+        else:
+            columns = [sqlalchemy.text("*")]
+        if not pushdown.complete and not pushdown.conditions and len(columns) == len(source_columns):
+            return query, filter_sql
+        statement = sqlalchemy.select(*columns).select_from(source)
+        for condition in pushdown.conditions:
+            column = sqlalchemy.column(condition.column)
+            if condition.operator == "=":
+                statement = statement.where(column == condition.values[0])
+            elif condition.operator == "!=":
+                statement = statement.where(column != condition.values[0])
+            elif condition.operator == "<":
+                statement = statement.where(column < condition.values[0])
+            elif condition.operator == ">":
+                statement = statement.where(column > condition.values[0])
+            elif condition.operator == "<=":
+                statement = statement.where(column <= condition.values[0])
+            elif condition.operator == ">=":
+                statement = statement.where(column >= condition.values[0])
+            elif condition.operator == "in":
+                statement = statement.where(column.in_(condition.values))
+            elif condition.operator == "not in":
+                statement = statement.where(column.not_in(condition.values))
+            elif condition.operator == "between":
+                statement = statement.where(column.between(*condition.values))
+            elif condition.operator == "is null":
+                statement = statement.where(column.is_(None))
+            elif condition.operator == "is not null":
+                statement = statement.where(column.is_not(None))
+            else:
+                raise AssertionError()
+        if pushdown.limit is not None:
+            statement = statement.limit(pushdown.limit)
+        if pushdown.offset:
+            statement = statement.offset(pushdown.offset)
+
+        pushed_query = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+        if pushdown.complete:
+            logger.info(f"Pushed down the entire filter into the source query: {pushed_query}")
+            return pushed_query, None
+        logger.info(f"Pushed down part of the filter into the source query: {pushed_query}")
+        return pushed_query, filter_sql
+
+    @staticmethod
+    def _parse_dump_uri(uri):
         parsed_uri = parse_uri(uri)
         engine, table = RDBMSAdapter._get_engine_and_table_from_uri(parsed_uri)
         if not table:
@@ -142,6 +255,25 @@ class RDBMSAdapter(Adapter):
             if_exists = "replace"
         else:
             if_exists = "fail"
+        return engine, table, if_exists
+
+    @staticmethod
+    def dump(df, uri):
+        engine, table, if_exists = RDBMSAdapter._parse_dump_uri(uri)
+        RDBMSAdapter._dump_df(df, engine, table, if_exists)
+
+    @staticmethod
+    def dump_batches(batches, uri):
+        engine, table, if_exists = RDBMSAdapter._parse_dump_uri(uri)
+        for df in batches:
+            RDBMSAdapter._dump_df(df, engine, table, if_exists)
+            # Only the first batch creates/replaces the table. All the rest are appended.
+            if_exists = "append"
+
+    @staticmethod
+    def _dump_df(df, engine, table, if_exists):
+        import sqlalchemy.exc  # sqlalchemy imports are inlined for startup performance
+
         try:
             df.to_sql(table, engine, index=False, if_exists=if_exists)
         except ValueError as exc:
@@ -155,30 +287,35 @@ class RDBMSAdapter(Adapter):
                 raise AppendSchemeConflictError(*exc.args) from exc
             raise
 
-    @classmethod
-    def load_multitable(cls, uri):
+    @staticmethod
+    def list_multitable(uri):
         """Experimental feature. Undocumented. Low Quality."""
-        from sqlalchemy import MetaData  # sqlalchemy imports are inlined for startup performance
+        from sqlalchemy import inspect  # sqlalchemy imports are inlined for startup performance
 
         parsed_uri = parse_uri(uri)
         engine, table = RDBMSAdapter._get_engine_and_table_from_uri(parse_uri(uri))
         assert table is None
-        with engine.connect() as conn:
-            metadata = MetaData()
-            metadata.reflect(bind=conn)
-            for table_name in metadata.tables:
-                table_uri_parsed = copy.copy(parsed_uri)
-                table_uri_parsed.query["table"] = table_name
-                logger.info(f"Loading table {encode_uri(table_uri_parsed)}")
-                df = cls.load(encode_uri(table_uri_parsed), query=None)
-                yield table_name, df
-
-    @classmethod
-    def dump_multitable(cls, df_multitable, uri):
+        tables = []
+        for table_name in inspect(engine).get_table_names():
+            table_uri_parsed = copy.copy(parsed_uri)
+            table_uri_parsed.query = {**parsed_uri.query, "table": table_name}
+            tables.append((table_name, encode_uri(table_uri_parsed)))
+        return tables
+
+    @staticmethod
+    @contextlib.contextmanager
+    def open_multitable(uri):
         """Experimental feature. Undocumented. Low Quality."""
         parsed_uri = parse_uri(uri)
-        for table_name, df in df_multitable:
+
+        def get_table_uri(table_name):
             table_uri_parsed = copy.copy(parsed_uri)
-            table_uri_parsed.query["table"] = table_name
-            logger.info(f"Dumping table {encode_uri(table_uri_parsed)}")
-            cls.dump(df, encode_uri(table_uri_parsed))
+            table_uri_parsed.query = {**parsed_uri.query, "table": table_name}
+            return encode_uri(table_uri_parsed)
+
+        yield get_table_uri
+
+    @staticmethod
+    def allows_concurrent_dumps(uri):
+        # SQLite only supports a single writer at a time.
+        return not parse_uri(uri).scheme.startswith("sqlite")
@@ -7,6 +7,8 @@ from tableconv.uri import parse_uri
 
 @register_adapter(["redis"])
 class RedisAdapter(Adapter):
+    in_memory_queries = True
+
     @staticmethod
     def get_example_url(scheme):
         return f"{scheme}://127.0.0.1:6379?db=0"
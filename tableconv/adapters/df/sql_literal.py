@@ -58,14 +58,34 @@ class SQLLiteralAdapter(FileAdapterMixin, Adapter):
         return "'" + str(value).replace("'", "''") + "'"
 
     @staticmethod
-    def dump_text_data(df, scheme, params):
-        data = df.to_dict(orient="split")
-
-        table_name = params.get("table_name", params.get("table", "data"))
-        columns_str = ", ".join([f'"{name}"' for name in data["columns"]])
+    def _render_values(df) -> str:
         rendered_tuples = [
-            [SQLLiteralAdapter._render_sql_literal_value(value) for value in item] for item in data["data"]
+            [SQLLiteralAdapter._render_sql_literal_value(value) for value in item]
+            for item in df.to_dict(orient="split")["data"]
         ]
-        values_str = ", ".join([f"({', '.join(items)})" for items in rendered_tuples])
+        return ", ".join([f"({', '.join(items)})" for items in rendered_tuples])
+
+    @staticmethod
+    def _render_suffix(columns, params) -> str:
+        table_name = params.get("table_name", params.get("table", "data"))
+        columns_str = ", ".join([f'"{name}"' for name in columns])
+        return f") {table_name}({columns_str})"
 
-        return f"(VALUES {values_str}) {table_name}({columns_str})"
+    @staticmethod
+    def dump_text_data(df, scheme, params):
+        values_str = SQLLiteralAdapter._render_values(df)
+        return f"(VALUES {values_str}{SQLLiteralAdapter._render_suffix(df.columns, params)}"
+
+    @staticmethod
+    def dump_file_batches(batches, scheme, path, params):
+        columns = None
+        with open(path, "w", newline="") as f:
+            f.write("(VALUES ")
+            for df in batches:
+                if df.empty:
+                    continue
+                if columns is not None:
+                    f.write(", ")
+                columns = df.columns
+                f.write(SQLLiteralAdapter._render_values(df))
+            f.write(SQLLiteralAdapter._render_suffix(columns, params))
@@ -96,6 +96,8 @@ class FilePerRowOutputAdapter(Adapter):
     the composable solution?
     """
 
+    in_memory_queries = True
+
     @staticmethod
     def get_example_url(scheme):
         return f"{scheme}:///tmp/example (each file is considered a (filename,value) record)"
@@ -1,9 +1,62 @@
-import pandas as pd
+import contextlib
+from collections.abc import Iterator
+from typing import Any
+
 import yaml
 
 from tableconv.adapters.df.base import Adapter, register_adapter
 from tableconv.adapters.df.file_adapter_mixin import FileAdapterMixin
 from tableconv.exceptions import SourceParseError
+from tableconv.json_data_model import RecordColumns, iter_record_chunks, json_default
+
+# The libyaml C implementations are many times faster than the pure Python ones, if PyYAML was built with libyaml.
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+SafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+class _Dumper(SafeDumper):  # type: ignore[valid-type, misc]
+    pass
+
+
+def _represent_other(dumper, data):
+    # Fallback for values of types the safe dumper does not know (e.g. numpy arrays, or pd.Timestamps), rather than
+    # failing, or outputting Python-specific tags like the unsafe dumper.
+    if isinstance(data, dict):
+        return dumper.represent_dict(data)
+    if isinstance(data, list | tuple | set):
+        return dumper.represent_list(list(data))
+    return dumper.represent_data(json_default(data))
+
+
+_Dumper.add_multi_representer(object, _represent_other)
+
+
+def _validate_yaml_record(item: Any, scheme: str, index: int) -> None:
+    if not isinstance(item, dict):
+        if isinstance(item, int) or isinstance(item, float):
+            yaml_type = "number"
+        elif isinstance(item, str):
+            yaml_type = "string"
+        elif isinstance(item, list):
+            yaml_type = "sequence"
+        else:
+            yaml_type = str(type(item))
+        raise SourceParseError(
+            f'Every element of the input {scheme} must be a YAML mapping ("dictionary"). '
+            f"(element {index + 1} in input was a YAML {yaml_type})"
+        )
+
+
+def iter_yaml_records(f) -> Iterator[Any]:
+    """
+    Incrementally parse a YAML stream of records, document by document. Either a single document, containing a sequence
+    of records, or a multi-document stream (``---``-separated), of one record (or sequence of records) per document.
+    """
+    for document in yaml.load_all(f, Loader=SafeLoader):
+        if isinstance(document, list):
+            yield from document
+        elif document is not None:
+            yield document
 
 
 @register_adapter(["yaml", "yml"])
@@ -14,29 +67,19 @@ class YAMLAdapter(FileAdapterMixin, Adapter):
         if params.get("preserve_nesting", False):
             raise NotImplementedError()
 
-        if not hasattr(path, "read"):
-            path = open(path)
-        raw_array = yaml.safe_load(path)
-        if not isinstance(raw_array, list):
-            raise SourceParseError('Input must be a YAML sequence ("list"/"array")')
-        for i, item in enumerate(raw_array):
-            if not isinstance(item, dict):
-                if isinstance(item, int) or isinstance(item, float):
-                    yaml_type = "number"
-                elif isinstance(item, str):
-                    yaml_type = "string"
-                elif isinstance(item, list):
-                    yaml_type = "sequence"
-                else:
-                    yaml_type = str(type(item))
-                raise SourceParseError(
-                    f'Every element of the input {scheme} must be a YAML mapping ("dictionary"). '
-                    f"(element {i + 1} in input was a YAML {yaml_type})"
-                )
-        return pd.json_normalize(raw_array)
+        columns = RecordColumns(params.get("nesting_sep", "."))
+        with open(path, "rb") if not hasattr(path, "read") else contextlib.nullcontext(path) as f:
+            for i, record in enumerate(iter_yaml_records(f)):
+                _validate_yaml_record(record, scheme, i)
+                columns.append(record)
+        return columns.to_df()
 
     @staticmethod
     def dump_file(df, scheme, path, params):
-        yaml_text = yaml.dump(df.to_dict(orient="records"), sort_keys=False, indent=4)
         with open(path, "w") as f:
-            f.write(yaml_text)
+            if len(df) == 0:
+                yaml.dump([], f, Dumper=_Dumper)
+                return
+            # (Block sequences can simply be concatenated, so each chunk of records is emitted on its own)
+            for records in iter_record_chunks(df):
+                yaml.dump(records, f, Dumper=_Dumper, sort_keys=False, indent=4)
@@ -0,0 +1,282 @@
+"""
+Local cache of loaded tables (``--autocache``), so that repeatedly pulling the same data from a slow source (e.g. an
+Athena query) is fast.
+
+Entries are stored in a columnar format, as Arrow IPC files when pyarrow is available, or as Parquet files otherwise.
+Each entry has a JSON metadata sidecar file. Entries of sources that have a freshness token (e.g. the mtime of a local
+file, or the ETag of a remote file) are revalidated against the source on every load. Entries of other sources (e.g.
+APIs) expire after a TTL. The cache is bounded: the least recently used entries are evicted once the cache exceeds its
+size cap. Both limits can be configured in the tableconv config directory (``cache_max_size``, e.g. ``500M``, and
+``cache_ttl``, in seconds).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import pandas as pd
+from platformdirs import user_cache_dir
+
+from tableconv.config_utils import get_config
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = user_cache_dir("tableconv", "tableconv")
+ENTRIES_DIR = os.path.join(CACHE_DIR, "autocachev2")
+DEFAULT_MAX_SIZE = 2 * (1024**3)  # 2 GiB
+DEFAULT_TTL = 7 * 24 * 60 * 60  # 1 week
+
+
+def parse_size(value: str) -> int:
+    """Parse a human-readable size, e.g. ``500M`` or ``2GiB``, into a number of bytes."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?\s*", value, re.IGNORECASE)
+    if not match:
+        raise ValueError(f'Invalid size "{value}"')
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** "_kmgt".index(unit.lower() or "_"))
+
+
+def format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+def get_max_size() -> int:
+    value = get_config("cache_max_size")
+    return parse_size(value) if value else DEFAULT_MAX_SIZE
+
+
+def get_ttl() -> int:
+    value = get_config("cache_ttl")
+    return int(value) if value else DEFAULT_TTL
+
+
+def get_cache_key(read_adapter_name: str, url: str, query: str | None) -> str:
+    key_bits = json.dumps([read_adapter_name, url, query])
+    key = hashlib.md5(key_bits.encode(), usedforsecurity=False).hexdigest()
+    logger.debug(f"Cache key: {key} ({key_bits})")
+    return key
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    data_path: str
+    metadata_path: str
+    metadata: dict[str, Any]
+
+    @property
+    def size(self) -> int:
+        return os.path.getsize(self.data_path) + os.path.getsize(self.metadata_path)
+
+    @property
+    def last_used(self) -> float:
+        return os.path.getmtime(self.data_path)
+
+    def is_expired(self, ttl: int) -> bool:
+        if self.metadata.get("freshness_token") is not None:
+            # Entries with a freshness token are revalidated against the source instead.
+            return False
+        return time.time() - self.metadata["created_at"] > ttl
+
+    def delete(self) -> None:
+        for path in (self.data_path, self.metadata_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _get_entry(key: str) -> CacheEntry | None:
+    metadata_path = os.path.join(ENTRIES_DIR, f"{key}.json")
+    try:
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    data_path = os.path.join(ENTRIES_DIR, f"{key}.{metadata['format']}")
+    if not os.path.exists(data_path):
+        return None
+    return CacheEntry(key, data_path, metadata_path, metadata)
+
+
+def list_entries() -> list[CacheEntry]:
+    if not os.path.exists(ENTRIES_DIR):
+        return []
+    entries = []
+    for filename in os.listdir(ENTRIES_DIR):
+        key, ext = os.path.splitext(filename)
+        if ext != ".json" or filename.startswith("."):
+            continue
+        entry = _get_entry(key)
+        if entry is not None:
+            entries.append(entry)
+    return entries
+
+
+def _write_data(df: pd.DataFrame, path: str) -> str:
+    """Write the df to the given path (sans extension). Returns the format used."""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        df.to_parquet(f"{path}.parquet", engine="fastparquet")
+        return "parquet"
+    table = pyarrow.Table.from_pandas(df)
+    with pyarrow.OSFile(f"{path}.arrow", "wb") as sink:
+        with pyarrow.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return "arrow"
+
+
+def _read_data(entry: CacheEntry) -> pd.DataFrame:
+    if entry.metadata["format"] == "arrow":
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.types
+
+        # (Not memory-mapped, as converting to pandas copies all the data anyway)
+        with pyarrow.OSFile(entry.data_path) as source:
+            table = pyarrow.ipc.open_file(source).read_all()
+        df = table.to_pandas()
+        for field in table.schema:
+            if pyarrow.types.is_nested(field.type):
+                # pyarrow converts lists into numpy arrays. Restore them to the plain Python objects we cached.
+                df[field.name] = pd.Series(table.column(field.name).to_pylist(), index=df.index, dtype=object)
+        return df
+    return pd.read_parquet(entry.data_path, engine="fastparquet")
+
+
+def load_from_cache(
+    read_adapter_name: str,
+    url: str,
+    query: str | None,
+    freshness_token: str | None = None,
+    ttl: int | None = None,
+) -> pd.DataFrame | None:
+    """
+    Load cached data, if the cache has an entry for this source that is still valid. If the source has a
+    ``freshness_token`` (see ``tableconv.core.get_freshness_token``), entries are valid as long as the token is
+    unchanged. Otherwise, entries are valid until they are older than ``ttl`` seconds (default: the configured TTL).
+    """
+    entry = _get_entry(get_cache_key(read_adapter_name, url, query))
+    if entry is None:
+        return None
+    if entry.metadata.get("freshness_token") != freshness_token:
+        logger.debug("Cached data is stale, the source has changed")
+        entry.delete()
+        return None
+    if entry.is_expired(ttl if ttl is not None else get_ttl()):
+        logger.debug("Cached data has expired")
+        entry.delete()
+        return None
+    try:
+        df = _read_data(entry)
+    except ImportError:
+        # (Cached by an installation that has pyarrow)
+        return None
+    os.utime(entry.data_path)  # Mark as recently used
+    return df
+
+
+def save_to_cache(
+    read_adapter_name: str,
+    url: str,
+    query: str | None,
+    df: pd.DataFrame,
+    freshness_token: str | None = None,
+    ttl: int | None = None,
+) -> None:
+    """
+    Cache the data loaded from a source, then evict entries that are expired (older than ``ttl`` seconds, default: the
+    configured TTL) or over the cache's size cap.
+    """
+    key = get_cache_key(read_adapter_name, url, query)
+    os.makedirs(ENTRIES_DIR, exist_ok=True)
+    existing_entry = _get_entry(key)
+    if existing_entry:
+        existing_entry.delete()
+
+    # Write to temp files first, so that concurrent readers never see partially written entries.
+    temp_path = os.path.join(ENTRIES_DIR, f".{key}.{os.getpid()}.tmp")
+    try:
+        data_format = _write_data(df, temp_path)
+    except Exception as exc:
+        # Not every DataFrame can be represented in a columnar format (e.g. columns of mixed types).
+        logger.debug(f"Unable to cache data: {exc}")
+        for ext in ("arrow", "parquet"):
+            if os.path.exists(f"{temp_path}.{ext}"):
+                os.remove(f"{temp_path}.{ext}")
+        return
+    metadata = {
+        "adapter": read_adapter_name,
+        "url": url,
+        "query": query,
+        "format": data_format,
+        "created_at": time.time(),
+        "freshness_token": freshness_token,
+        "rows": len(df),
+    }
+    with open(f"{temp_path}.json", "w") as f:
+        json.dump(metadata, f)
+    os.replace(f"{temp_path}.{data_format}", os.path.join(ENTRIES_DIR, f"{key}.{data_format}"))
+    os.replace(f"{temp_path}.json", os.path.join(ENTRIES_DIR, f"{key}.json"))
+
+    evict(ttl)
+
+
+def evict(ttl: int | None = None) -> None:
+    """
+    Delete expired entries (default TTL: the configured TTL), and then delete the least recently used entries until
+    the cache is within its cap.
+    """
+    if ttl is None:
+        ttl = get_ttl()
+    max_size = get_max_size()
+    entries = []
+    for entry in list_entries():
+        if entry.is_expired(ttl):
+            logger.debug(f"Evicting expired cache entry {entry.key}")
+            entry.delete()
+        else:
+            entries.append(entry)
+    total_size = sum(entry.size for entry in entries)
+    for entry in sorted(entries, key=lambda entry: entry.last_used):
+        if total_size <= max_size:
+            break
+        logger.debug(f"Evicting least recently used cache entry {entry.key}")
+        total_size -= entry.size
+        entry.delete()
+
+
+def get_cache_stats() -> str:
+    entries = list_entries()
+    total_size = sum(entry.size for entry in entries)
+    lines = [
+        f"Cache directory: {ENTRIES_DIR}",
+        f"Entries: {len(entries)}",
+        f"Size: {format_size(total_size)} (max: {format_size(get_max_size())})",
+        f"TTL: {get_ttl()} seconds",
+    ]
+    if entries:
+        now = time.time()
+        oldest = min(entry.metadata["created_at"] for entry in entries)
+        lines.append(f"Oldest entry: {int(now - oldest)} seconds old")
+    return "\n".join(lines)
+
+
+def clear_cache() -> None:
+    """Delete all cached data (including data cached by older tableconv versions)."""
+    # (Only the cache's own directories, not everything else in the tableconv cache directory)
+    for directory in (ENTRIES_DIR, os.path.join(CACHE_DIR, "autocachev1")):
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
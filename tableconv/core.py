@@ -1,32 +1,40 @@
+import concurrent.futures
+import contextlib
+import glob
 import hashlib
+import importlib.util
 import json
 import logging
+import multiprocessing
 import os
-import pathlib
-import re
 import tempfile
 import urllib.parse
-from collections.abc import Iterator
+import urllib.request
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import iso8601
 import pandas as pd
 from pandas.errors import EmptyDataError as pd_EmptyDataError
-from platformdirs import user_cache_dir
 
 from tableconv.adapters.df import read_adapters, write_adapters
 from tableconv.adapters.df.base import Adapter
+from tableconv.cache import load_from_cache, save_to_cache
 from tableconv.exceptions import (
     EmptyDataError,
     InvalidLocationReferenceError,
     InvalidURLSyntaxError,
-    SchemaCoercionError,
+    SourceDataError,
     UnrecognizedFormatError,
 )
-from tableconv.in_memory_query import query_in_memory
+from tableconv.in_memory_query import UnsupportedScanError, copy_duckdb_scan, query_in_memory, uses_macros
+from tableconv.schema_coercion import coerce_schema
+from tableconv.schema_inference import infer_json_schema
 from tableconv.uri import parse_uri
 
+if TYPE_CHECKING:
+    import pyarrow
+
 logger = logging.getLogger(__name__)
 
 
@@ -53,32 +61,77 @@ def resolve_query_arg(query: str | None) -> str | None:
 
 
 class IntermediateExchangeTable:
-    def __init__(self, df=None, from_df: pd.DataFrame = None, from_dict_records: list[dict[str, Any]] | None = None):
+    def __init__(
+        self,
+        df=None,
+        from_df: pd.DataFrame = None,
+        from_dict_records: list[dict[str, Any]] | None = None,
+        from_batches: Iterable[pd.DataFrame] | None = None,
+        from_arrow: "pyarrow.Table | None" = None,
+    ):
         """
         tableconv's abstract intermediate tabular data type.
 
         Normally you should acquire a ``IntermediateExchangeTable`` by loading in data from a URL using :ref:load_url.
         However, if your data is already in a python native datatype, you can directly put it into a
-        ``IntermediateExchangeTable`` by passing it in using one of the two available Python native forms:
+        ``IntermediateExchangeTable`` by passing it in using one of the available Python native forms:
 
         :param from_df:
             Wrap the provided Pandas Dataframe in a IntermediateExchangeTable.
         :param from_dict_records:
             Wrap the provided List of Dict records in a IntermediateExchangeTable.
+        :param from_batches:
+            Wrap the provided iterable of Pandas Dataframes in a streaming IntermediateExchangeTable. Each DataFrame is
+            one batch of records, and batches are only pulled from the iterable as they are consumed. A streaming table
+            can only be consumed once.
+        :param from_arrow:
+            Wrap the provided pyarrow Table in a IntermediateExchangeTable. The table is kept in its columnar form, and
+            is handed as-is (zero-copy) to DuckDB and to any destination formats that natively support Arrow.
 
         :raises tableconv.EmptyDataError:
             Raised if the supplied datasource is empty.
         """
-        if sum([df is not None, from_df is not None, from_dict_records is not None]) != 1:
-            raise ValueError("Please pass one and only one of either df, from_df, or from_dict_records")
+        sources = [df, from_df, from_dict_records, from_batches, from_arrow]
+        if sum(source is not None for source in sources) != 1:
+            raise ValueError(
+                "Please pass one and only one of either df, from_df, from_dict_records, from_batches, or from_arrow"
+            )
+        self._df: pd.DataFrame | None = None
+        self._batches: Iterator[pd.DataFrame] | None = None
+        self._arrow: pyarrow.Table | None = None
         if df is not None:
-            self.df = df
+            self._df = df
         if from_df is not None:
-            self.df = from_df
+            self._df = from_df
         if from_dict_records is not None:
-            self.df = pd.DataFrame.from_records(from_dict_records)
-        if self.df.empty:
-            raise EmptyDataError
+            self._df = pd.DataFrame.from_records(from_dict_records)
+        if from_batches is not None:
+            self._batches = conform_batches(from_batches)
+        elif from_arrow is not None:
+            self._arrow = from_arrow
+            if from_arrow.num_rows == 0:
+                raise EmptyDataError
+        else:
+            assert self._df is not None
+            if self._df.empty:
+                raise EmptyDataError
+
+    @property
+    def df(self) -> pd.DataFrame:
+        if self._batches is not None:
+            logger.debug("Materializing streamed batches into a single DataFrame")
+            self._df = pd.concat(list(self._batches), ignore_index=True)
+            self._batches = None
+        if self._df is None:
+            assert self._arrow is not None
+            self._df = self._arrow.to_pandas()
+            # The DataFrame may get mutated by its consumers, so it is now the single source of truth.
+            self._arrow = None
+        return self._df
+
+    @property
+    def is_streaming(self) -> bool:
+        return self._batches is not None
 
     def dump_to_url(self, url: str, params: dict[str, Any] | None = None) -> str | None:
         """
@@ -110,26 +163,40 @@ class IntermediateExchangeTable:
             assert "?" not in url
             url += f"?{urllib.parse.urlencode(params)}"
         write_adapter_name = write_adapter.__qualname__  # type: ignore[attr-defined]
-        logger.debug(f"Exporting data out via {write_adapter_name} to {url}")
         with pd.option_context("display.float_format", str):
+            if self._batches is not None:
+                logger.debug(f"Exporting data out via {write_adapter_name} to {url} (streaming)")
+                batches, self._batches = self._batches, None
+                return write_adapter.dump_batches(batches, url)
+            if self._arrow is not None and write_adapter.arrow_native:
+                logger.debug(f"Exporting data out via {write_adapter_name} to {url} (arrow)")
+                return write_adapter.dump_arrow(self._arrow, url)
+            logger.debug(f"Exporting data out via {write_adapter_name} to {url}")
             return write_adapter.dump(self.df, url)
 
-    def get_json_schema(self):
+    def get_json_schema(self, sample_size: int | None = None) -> dict[str, Any]:
         """
-        Warning: This is just experimental / exploratory. The current implementation is also buggy.
+        Infer a JSON Schema describing the records of the table. Types are derived from the column dtypes, only sampling
+        (``sample_size`` values of) columns of mixed/unknown type, so this is fast even for very large tables.
         """
-        # Consider instead using https://github.com/pandas-dev/pandas/blob/v1.3.2/pandas/io/json/_table_schema.py
-        from genson import SchemaBuilder
+        if self._arrow is not None:
+            return infer_json_schema(self._arrow, sample_size)
+        return infer_json_schema(self.df, sample_size)
 
-        builder = SchemaBuilder()
-        builder.add_schema({"type": "object", "properties": {}})
-        for row in self.df.to_dict(orient="records"):
-            builder.add_object(row)
-        return builder.to_schema()
+    def transform_in_memory(self, sql: str) -> "IntermediateExchangeTable":
+        """
+        Run a DuckDB SQL query over the table (available as the table ``data``), and return the results as a new
+        ``IntermediateExchangeTable``. Queries are run via a persistent DuckDB session, so repeatedly querying the same
+        table does not need to set it up for DuckDB again.
 
-    def transform_in_memory(self, sql):
-        # TODO refactor to use this
-        pass
+        :raises tableconv.InvalidQueryError:
+            Raised if the query is invalid.
+        :raises tableconv.EmptyDataError:
+            Raised if the query returns no rows.
+        """
+        if self._arrow is not None:
+            return IntermediateExchangeTable(from_arrow=query_in_memory([("data", self._arrow)], sql, as_arrow=True))
+        return IntermediateExchangeTable(query_in_memory([("data", self.df)], sql))
 
     def as_dict_records(self) -> list[dict[str, Any]]:
         """
@@ -137,6 +204,17 @@ class IntermediateExchangeTable:
         """
         return self.as_pandas_df().to_dict(orient="records")
 
+    def as_arrow(self) -> "pyarrow.Table":
+        """
+        Expose the loaded data as a pyarrow Table. Requires pyarrow to be installed. If the data was loaded from a
+        columnar source, this is zero-copy.
+        """
+        if self._arrow is not None:
+            return self._arrow
+        import pyarrow
+
+        return pyarrow.Table.from_pandas(self.df, preserve_index=False)
+
     def as_pandas_df(self) -> pd.DataFrame:
         """
         Expose the loaded data as a Pandas Dataframe.
@@ -149,6 +227,33 @@ class IntermediateExchangeTable:
         return self.df
 
 
+def conform_batches(batches: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """
+    Check that a stream of batches is not empty, and conform every batch to the columns of the first batch, so that
+    writers can rely on a stable schema. Raises EmptyDataError immediately (not lazily) if there are no records.
+    """
+    batches = (df for df in batches if not df.empty)
+    first_batch = next(batches, None)
+    if first_batch is None:
+        raise EmptyDataError
+    columns = first_batch.columns
+
+    def conformed():
+        yield first_batch
+        for df in batches:
+            if not df.columns.equals(columns):
+                new_columns = set(df.columns) - set(columns)
+                if new_columns:
+                    raise SourceDataError(
+                        f"Schema changed mid-stream, encountered new column(s): "
+                        f"{', '.join(str(col) for col in new_columns)}. Try again without streaming."
+                    )
+                df = df.reindex(columns=columns)
+            yield df
+
+    return conformed()
+
+
 FSSPEC_SCHEMES = {"https", "http", "ftp", "s3", "gcs", "sftp", "scp", "abfs"}
 
 
@@ -203,80 +308,6 @@ def process_and_rewrite_remote_source_url(url: str) -> str:
     return new_url
 
 
-def validate_coercion_schema(schema: dict[str, str]) -> None:
-    SCHEMA_COERCION_SUPPORTED_TYPES = {"datetime", "str", "int", "float"}
-    unsupported_schema_types = set(schema.values()) - SCHEMA_COERCION_SUPPORTED_TYPES
-    if unsupported_schema_types:
-        raise ValueError(
-            f"Unsupported schema type(s): {', '.join(str(item) for item in unsupported_schema_types)}. "
-            + f"Please specify one of the supported types: {', '.join(SCHEMA_COERCION_SUPPORTED_TYPES)}."
-        )
-
-
-def coerce_schema(df: pd.DataFrame, schema: dict[str, str], restrict_schema: bool) -> pd.DataFrame:
-    validate_coercion_schema(schema)
-
-    # Add missing columns
-    for col in set(schema.keys()) - set(df.columns):
-        df[col] = None
-
-    # Coerce the type of pre-existing columns
-    for col in set(schema.keys()).intersection(set(df.columns)):
-        try:
-            if schema[col] == "datetime":
-
-                def coerce_datetime(item):
-                    if item in (None, ""):
-                        return None
-                    # breakpoint()
-                    # THIS CODE DOES NOT WORK ANY MORE (!!) DOES REALLY BAD THINGS.
-                    # DROPS TZ INFO.
-                    # CONVERTS TO "LOCAL" TIMEZONE.
-                    # DROPS SUB-SECOND DATA.
-                    # REALLY BAD THINGS.
-                    if isinstance(item, str):
-                        return iso8601.parse_date(item)
-                    if isinstance(item, pd.Timestamp):
-                        return item.to_pydatetime()
-                    raise TypeError(item)
-
-                df[col] = df.apply(lambda r, col=col: coerce_datetime(r[col]), axis=1)
-            elif schema[col] == "str":
-                df[col] = df[col].astype("string")
-            elif schema[col] == "int":
-                """
-                Important bug to be aware of: because of using pandas dataframes as the internal datastructure, if an
-                integer column contains any nulls, pandas forces it to actually be a float column so it can store the
-                nulls as NaNs.. So schema coercing to "int" won't actually always result in integers.
-                """
-                # Remove trailing 0s after decimal point (int() errors on '1.0' input)
-                re_decimal = re.compile(r"\.0*\s*$")
-                df[col] = df.apply(
-                    lambda r, col=col: (
-                        int(re_decimal.sub("", str(r[col])))  # noqa: B023
-                        if (r[col] not in (None, "") and not pd.isna(r[col]))
-                        else None
-                    ),
-                    axis=1,
-                )
-                # df[col] = pd.to_numeric(df[col], downcast='integer')
-            elif schema[col] == "float":
-                df[col] = df.apply(
-                    lambda r, col=col: float(r[col]) if (r[col] not in (None, "") and not pd.isna(r[col])) else None,
-                    axis=1,
-                )
-        except (ValueError, TypeError) as exc:
-            raise SchemaCoercionError(
-                f'Error in coercing schema: Error while coercing "{col}" to {schema[col]}: {exc.args[0]}'
-            ) from exc
-
-    if restrict_schema:
-        # Drop all other columns
-        df = df[schema.keys()]
-
-    return df
-
-
 def warn_if_location_too_large(uri: str):
     """
     If we can determine in advance that the URL points to a large amount of data that is slow to parse, show a warning.
@@ -290,45 +321,87 @@ def warn_if_location_too_large(uri: str):
             logger.warning("This looks like a huge table, expect heavy RAM and CPU usage.")
 
 
-def get_cache_key(read_adapter_name, url, query):
-    key_bits = json.dumps([read_adapter_name, url, query])
-    key = hashlib.md5(key_bits.encode(), usedforsecurity=False).hexdigest()
-    logger.debug(f"Cache key: {key} ({key_bits})")
-    return key
+# Metadata fields (as returned by fsspec's info()) that change whenever a remote file changes. Their names vary by
+# filesystem implementation.
+REMOTE_FRESHNESS_FIELDS = {"etag", "lastmodified", "last_modified", "updated", "mtime", "modify", "md5hash"}
+
+
+def get_freshness_token(url: str) -> str | None:
+    """
+    Get a token that changes whenever the data at the source changes, to cheaply validate cached data against: the size
+    and modification time of local files (of every file, for directories and glob patterns), or the ETag/Last-Modified
+    of remote files (via a HEAD request or equivalent). Returns None if there is no way to tell (e.g. for API sources).
+    """
+    parsed_url = parse_uri(url)
+    if parsed_url.scheme in FSSPEC_SCHEMES:
+        return get_remote_freshness_token(parsed_url)
+    path = os.path.expanduser(parsed_url.path or "")
+    if path and os.path.isfile(path):
+        stat = os.stat(path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+    if path and os.path.isdir(path):
+        files = [os.path.join(directory, name) for directory, _, names in os.walk(path) for name in names]
+    elif path and glob.has_magic(path) and not os.path.exists(path):
+        files = glob.glob(path, recursive=True)
+    else:
+        return None
+    # (Directories and glob patterns are loaded as one table of all their files, so changes to any of them count)
+    stats = []
+    for file in sorted(files):
+        with contextlib.suppress(OSError):
+            if os.path.isfile(file):
+                stat = os.stat(file)
+                stats.append((file, stat.st_size, stat.st_mtime_ns))
+    return hashlib.sha256(json.dumps(stats).encode()).hexdigest()
+
+
+def get_remote_freshness_token(parsed_url) -> str | None:
+    remote_url = f"{parsed_url.scheme}://{parsed_url.authority}{parsed_url.path}"
+    try:
+        if parsed_url.scheme in ("http", "https"):
+            # (Not using fsspec for HTTP, because fsspec does not expose the Last-Modified header)
+            request = urllib.request.Request(remote_url, method="HEAD")
+            with urllib.request.urlopen(request, timeout=10) as response:
+                validators = {key: response.headers[key] for key in ("ETag", "Last-Modified") if response.headers[key]}
+        else:
+            import fsspec
+
+            fs, path = fsspec.core.url_to_fs(remote_url)
+            info = fs.info(path)
+            validators = {key: str(value) for key, value in info.items() if key.lower() in REMOTE_FRESHNESS_FIELDS}
+    except (OSError, ValueError, ImportError) as exc:
+        logger.debug(f"Unable to check freshness of {remote_url}: {exc}")
+        return None
+    if not validators:
+        return None
+    return json.dumps(validators, sort_keys=True)
 
 
-CACHE_DIR = user_cache_dir("tableconv", "tableconv")
+def is_stdin_url(url: str) -> bool:
+    parsed_url = parse_uri(url)
+    return parsed_url.authority == "-" or parsed_url.path in ("-", "/dev/fd/0", "/dev/stdin")
 
 
-def get_cache_file_path(read_adapter_name, url, query):
-    key = get_cache_key(read_adapter_name, url, query)
-    return os.path.join(CACHE_DIR, f"autocachev1/{key}.pickledf")
+@contextlib.contextmanager
+def translate_load_errors(url: str):
+    try:
+        yield
+    except pd_EmptyDataError as exc:
+        raise EmptyDataError(f"Empty data source {url}: {str(exc)}") from exc
+    except FileNotFoundError as exc:
+        raise InvalidLocationReferenceError(f"{url} not found: {str(exc)}") from exc
 
 
-def infer_if_url_is_local(url):
-    if os.path.exists(parse_uri(url).path):
-        return True
-    if "localhost" in url or "127.0.0.1" in url:
-        return True
-    if "http" not in url and not re.search(r":\d\d+", url):
-        return True
-    return False
+def stream_batches(read_adapter: Adapter, url: str, query: str | None, batch_size: int) -> Iterator[pd.DataFrame]:
+    with translate_load_errors(url):
+        yield from read_adapter.load_batches(url, query, batch_size)
 
 
-def load_from_cache(read_adapter_name, url, query) -> pd.DataFrame:
-    path = get_cache_file_path(read_adapter_name, url, query)
-    if not os.path.exists(path):
-        return None
-    return pd.read_pickle(path)
+DEFAULT_STREAM_BATCH_SIZE = 100_000
 
 
-def save_to_cache(read_adapter_name, url, query, df):
-    if infer_if_url_is_local(url):
-        # Don't cache local data
-        return
-    path = get_cache_file_path(read_adapter_name, url, query)
-    pathlib.Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)  # ensure cache directory exists
-    df.to_pickle(path)
+def is_pyarrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
 
 
 def load_url(
@@ -339,6 +412,9 @@ def load_url(
     schema_coercion: dict[str, str] | None = None,
     restrict_schema: bool = False,
     autocache: bool = False,
+    stream: bool = False,
+    batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+    cache_ttl: int | None = None,
 ) -> IntermediateExchangeTable:
     """
     Load the data referenced by ``url`` into tableconv's abstract intermediate tabular data type
@@ -363,6 +439,15 @@ def load_url(
         This is an experimental feature. Subject to change. Documentation unavailable.
     :param restrict_schema:
         This is an experimental feature. Subject to change. Documentation unavailable.
+    :param stream:
+        Load the data lazily, as a stream of batches of at most ``batch_size`` records, instead of all at once. This
+        bounds peak memory usage to the size of a batch, when both the source and the destination adapters support
+        streaming. Not compatible with ``filter_sql`` or ``autocache``, which require the full table in memory.
+        Experimental feature.
+    :param autocache:
+        Cache the loaded data locally, and reuse previously cached data. Cached data is revalidated against the
+        modification time (or ETag, etc.) of the source, when available, and otherwise reused for up to ``cache_ttl``
+        seconds (default: the ``cache_ttl`` config option, or 1 week). Experimental feature.
 
     :raises tableconv.InvalidURLError:
         Raised if the provided URL cannot be accessed. (anything from an unsupported/unrecognized data format, an
@@ -377,9 +462,6 @@ def load_url(
     """
     if isinstance(url, Path):
         url = str(url)
-    scheme = parse_uri(url).scheme
-    if scheme in FSSPEC_SCHEMES:
-        url = process_and_rewrite_remote_source_url(url)
 
     _, read_adapter = parse_source_url(url)
     # TODO: Dynamic file resolution is great for CLI but it isn't appropriate for the Python API.
@@ -395,27 +477,63 @@ def load_url(
         assert "?" not in url
         url += f"?{urllib.parse.urlencode(params)}"
 
+    if filter_sql and not schema_coercion:
+        query, filter_sql = read_adapter.push_down_filter(url, query, filter_sql)
+
     read_adapter_name = read_adapter.__qualname__  # type: ignore[attr-defined]
-    using_cache_statement = ""
-    warn_if_location_too_large(url)
+    if autocache and is_stdin_url(url):
+        logger.warning("Caching is not supported for STDIN. Disabling caching.")
+        autocache = False
+    if stream and (filter_sql or autocache):
+        logger.warning("Streaming is not supported in combination with filters or caching. Disabling streaming.")
+        stream = False
+
     df = None
+    cache_url = url
+    freshness_token = None
     if autocache:
-        df = load_from_cache(read_adapter_name, url, query)
-        if df is not None:
-            using_cache_statement = " (LOCALLY CACHED COPY)"
-            logger.info("Using cached data")
-    logger.debug(f"Loading data in via {read_adapter_name} from {url}{using_cache_statement}")
-    if df is None:
-        try:
+        freshness_token = get_freshness_token(url)
+        df = load_from_cache(read_adapter_name, cache_url, query, freshness_token, cache_ttl)
+    if df is not None:
+        logger.info("Using cached data")
+        logger.debug(f"Loaded data in from cache of {url}")
+    else:
+        if parse_uri(url).scheme in FSSPEC_SCHEMES:
+            url = process_and_rewrite_remote_source_url(url)
+
+        if stream:
+            logger.debug(f"Streaming data in via {read_adapter_name} from {url} (batch size: {batch_size})")
+            batches = stream_batches(read_adapter, url, query, batch_size)
+            if schema_coercion:
+                batches = (coerce_schema(df, schema_coercion, restrict_schema) for df in batches)
+            try:
+                return IntermediateExchangeTable(from_batches=batches)
+            except EmptyDataError as exc:
+                if exc.args:
+                    raise
+                raise EmptyDataError(f"Empty data source {url}") from exc
+
+        if read_adapter.arrow_native and not schema_coercion and not autocache and is_pyarrow_available():
+            logger.debug(f"Loading data in via {read_adapter_name} from {url} (arrow)")
+            with translate_load_errors(url):
+                arrow_table = read_adapter.load_arrow(url, query)
+            if arrow_table.num_rows == 0:
+                raise EmptyDataError(f"Empty data source {url}")
+            if filter_sql:
+                logger.debug("Running intermediate filter sql query in-memory")
+                arrow_table = query_in_memory([("data", arrow_table)], filter_sql, as_arrow=True)
+                if arrow_table.num_rows == 0:
+                    raise EmptyDataError("No rows returned by intermediate filter sql query")
+            return IntermediateExchangeTable(from_arrow=arrow_table)
+
+        warn_if_location_too_large(url)
+        logger.debug(f"Loading data in via {read_adapter_name} from {url}")
+        with translate_load_errors(url):
             df = read_adapter.load(url, query)
-        except pd_EmptyDataError as exc:
-            raise EmptyDataError(f"Empty data source {url}: {str(exc)}") from exc
-        except FileNotFoundError as exc:
-            raise InvalidLocationReferenceError(f"{url} not found: {str(exc)}") from exc
         if df.empty:
             raise EmptyDataError(f"Empty data source {url}")
         if autocache:
-            save_to_cache(read_adapter_name, url, query, df)
+            save_to_cache(read_adapter_name, cache_url, query, df, freshness_token, cache_ttl)
 
     # Schema coercion
     if schema_coercion:
@@ -434,6 +552,65 @@ def load_url(
     return table
 
 
+def convert_via_duckdb_copy(
+    source_url: str | Path, dest_url: str, query: str | None = None, filter_sql: str | None = None
+) -> str | None:
+    """
+    Fast path for converting a local file directly into another local file with DuckDB (e.g. csv to parquet),
+    bypassing pandas entirely. This is multi-threaded and works on files larger than memory.
+
+    This is only possible when the source adapter can express the file as a DuckDB scan and the destination adapter can
+    express the output as a DuckDB ``COPY``, with all of their params. Returns the path written to, or None if the fast
+    path is not applicable, in which case the caller should fall back to ``load_url(...).dump_to_url(...)``.
+    """
+    import duckdb  # inline import for performance
+
+    if isinstance(source_url, Path):
+        source_url = str(source_url)
+    query = resolve_query_arg(query)
+    filter_sql = resolve_query_arg(filter_sql)
+    if query and filter_sql:
+        return None
+    # For file sources, the source query and the filter are both just run over the whole file as the table `data`.
+    query = query or filter_sql
+
+    parsed_source = parse_uri(source_url)
+    parsed_dest = parse_uri(dest_url)
+    read_adapter = read_adapters.get(parsed_source.scheme)
+    write_adapter = write_adapters.get(parsed_dest.scheme)
+    if read_adapter is None or write_adapter is None:
+        return None
+    if not hasattr(read_adapter, "get_source_duckdb_scan") or not hasattr(write_adapter, "get_duckdb_copy"):
+        return None
+    if parsed_dest.authority or not parsed_dest.path or parsed_dest.path == "-":
+        return None
+    if parsed_dest.path.startswith("/dev/") or (query and uses_macros(query)):
+        return None
+    scan = read_adapter.get_source_duckdb_scan(parsed_source)
+    copy = write_adapter.get_duckdb_copy(parsed_dest.scheme, parsed_dest.path, parsed_dest.query)
+    if scan is None or copy is None:
+        return None
+
+    # Write to a temporary file first, so that the destination is left untouched if we end up falling back.
+    temp_path = os.path.join(
+        os.path.dirname(os.path.abspath(parsed_dest.path)),
+        f".{os.path.basename(parsed_dest.path)}.tableconv-{os.getpid()}.tmp",
+    )
+    logger.debug(f"Converting {source_url} to {dest_url} directly via DuckDB")
+    try:
+        row_count = copy_duckdb_scan(scan, query, copy, temp_path)
+    except (duckdb.InvalidInputException, duckdb.ConversionException, duckdb.IOException, UnsupportedScanError) as exc:
+        logger.debug(f"DuckDB is unable to natively convert {source_url}, falling back to pandas: {exc}")
+        row_count = None
+    if not row_count:
+        # (Either unsupported, or empty. Empty data is reported by the regular path.)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return None
+    os.replace(temp_path, parsed_dest.path)
+    return parsed_dest.path
+
+
 def load_multitable_from_url(url: str) -> Iterator[tuple[str, pd.DataFrame]]:
     """Experimental feature. Undocumented. Low Quality."""
     if isinstance(url, Path):
@@ -443,9 +620,102 @@ def load_multitable_from_url(url: str) -> Iterator[tuple[str, pd.DataFrame]]:
     return read_adapter.load_multitable(url)
 
 
-def dump_multitable_to_url(df_multi_table: Iterator[tuple[str, pd.DataFrame]], url: str) -> str:
+def dump_multitable_to_url(df_multi_table: Iterator[tuple[str, pd.DataFrame]], url: str) -> str | None:
     """Experimental feature. Undocumented. Low Quality."""
     scheme = parse_uri(url).scheme
     write_adapter = write_adapters[scheme]
     logger.debug(f"Dumping data out via {write_adapter.__qualname__} to {url}")  # type: ignore[attr-defined]
     return write_adapter.dump_multitable(df_multi_table, url)
+
+
+def _load_table(read_adapter: Adapter, table_name: str, table_uri: str) -> tuple[str, pd.DataFrame]:
+    return table_name, read_adapter.load(table_uri, query=None)
+
+
+def _convert_table(read_adapter: Adapter, table_uri: str, write_adapter: Adapter, dest_table_uri: str) -> None:
+    write_adapter.dump(read_adapter.load(table_uri, query=None), dest_table_uri)
+
+
+def _run_bounded(
+    executor: concurrent.futures.Executor, tasks: list[tuple[str, Callable, tuple]], jobs: int, action: str
+) -> Iterator[Any]:
+    """
+    Run the (table name, function, args) tasks on the executor, with at most ``jobs`` tasks running or finished but not
+    yet consumed at a time (so that at most ``jobs`` loaded tables are held in memory at once, rather than the entire
+    database). Yields the task results in the same order as the tasks.
+    """
+    remaining = iter(enumerate(tasks))
+    pending: dict[concurrent.futures.Future, int] = {}
+    finished: dict[int, Any] = {}
+    next_index = 0
+    try:
+        while True:
+            while len(pending) + len(finished) < jobs:
+                task = next(remaining, None)
+                if task is None:
+                    break
+                index, (_, func, args) = task
+                pending[executor.submit(func, *args)] = index
+            if next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+                continue
+            if not pending:
+                return
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                finished[index] = future.result()
+                logger.info(f"{action} table {tasks[index][0]} ({next_index + len(finished)}/{len(tasks)})")
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def convert_multitable(source_url: str, dest_url: str, jobs: int = 1) -> str | None:
+    """
+    Experimental feature. Undocumented. Low Quality.
+
+    Convert every table of a multitable source into a multitable destination, converting up to ``jobs`` tables in
+    parallel. Conversions between file formats (CPU-bound parsing/serializing) run in worker processes, anything
+    involving a network service runs in worker threads. The tables are dumped in the order the source lists them.
+    Returns the output of the destination's dump_multitable, regardless of ``jobs``.
+    """
+    if isinstance(source_url, Path):
+        source_url = str(source_url)
+    _, read_adapter = parse_source_url(source_url)
+    write_adapter = write_adapters[parse_uri(dest_url).scheme]
+    if jobs <= 1:
+        return dump_multitable_to_url(load_multitable_from_url(source_url), dest_url)
+    try:
+        tables = read_adapter.list_multitable(source_url)
+    except NotImplementedError:
+        logger.warning(
+            f"Tables of {parse_uri(source_url).scheme} sources cannot be loaded in parallel, ignoring --jobs"
+        )
+        return dump_multitable_to_url(load_multitable_from_url(source_url), dest_url)
+
+    if read_adapter.cpu_bound and write_adapter.cpu_bound:
+        executor: concurrent.futures.Executor = concurrent.futures.ProcessPoolExecutor(
+            jobs, mp_context=multiprocessing.get_context("spawn")
+        )
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(jobs)
+    logger.debug(f"Converting {len(tables)} tables from {source_url} to {dest_url} with {jobs} workers")
+    with executor, contextlib.ExitStack() as multitable_dest:
+        get_table_uri = None
+        if write_adapter.allows_concurrent_dumps(dest_url):
+            with contextlib.suppress(NotImplementedError):
+                get_table_uri = multitable_dest.enter_context(write_adapter.open_multitable(dest_url))
+        if get_table_uri is not None:
+            tasks: list[tuple[str, Callable, tuple]] = [
+                (table_name, _convert_table, (read_adapter, table_uri, write_adapter, get_table_uri(table_name)))
+                for table_name, table_uri in tables
+            ]
+            for _ in _run_bounded(executor, tasks, jobs, action="Converted"):
+                pass
+            # (Same as what dump_multitable returns for destinations that implement open_multitable)
+            return dest_url
+        # Only the loading is parallelized, the tables are dumped one at a time as they finish loading.
+        tasks = [(table_name, _load_table, (read_adapter, table_name, table_uri)) for table_name, table_uri in tables]
+        return write_adapter.dump_multitable(_run_bounded(executor, tasks, jobs, action="Loaded"), dest_url)
@@ -0,0 +1,297 @@
+"""
+Analysis of intermediate filter SQL (``-F``), to find the parts of it that can be pushed down into the source's own
+query language instead of being run in-memory. The filter is parsed with DuckDB's own parser, so that it is understood
+exactly the same way as when it is run in-memory.
+"""
+
+import copy
+import decimal
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from tableconv.in_memory_query import TRANSPOSE_MACRO, get_duckdb_session, pre_process
+
+logger = logging.getLogger(__name__)
+
+COMPARISON_OPERATORS = {
+    "COMPARE_EQUAL": "=",
+    "COMPARE_NOTEQUAL": "!=",
+    "COMPARE_LESSTHAN": "<",
+    "COMPARE_GREATERTHAN": ">",
+    "COMPARE_LESSTHANOREQUALTO": "<=",
+    "COMPARE_GREATERTHANOREQUALTO": ">=",
+}
+FLIPPED_COMPARISON_OPERATORS = {"=": "=", "!=": "!=", "<": ">", ">": "<", "<=": ">=", ">=": "<="}
+
+
+class NotPushable(Exception):
+    pass
+
+
+@dataclass
+class PushdownCondition:
+    """A single condition on a single column, e.g. ``created_at > '2026-01-01'``"""
+
+    column: str
+    # One of: the comparison operators (=, !=, <, >, <=, >=), "in", "not in", "between", "is null", "is not null".
+    operator: str
+    values: list[Any] = field(default_factory=list)
+
+
+@dataclass
+class FilterPushdown:
+    # The filtered columns to select as (column, alias) pairs, or None to select all columns. Only used if `complete`.
+    projection: list[tuple[str, str | None]] | None
+    # Conditions that all must hold (i.e. the WHERE conjuncts). These can be pushed down on their own, as long as the
+    # full filter is then still run in-memory.
+    conditions: list[PushdownCondition]
+    limit: int | None
+    offset: int | None
+    # Whether the pushdown expresses the entire filter, so that no in-memory filtering is needed afterwards.
+    complete: bool
+    # The source columns that the filter references, or None if it may reference any column (e.g. `SELECT *`).
+    referenced_columns: set[str] | None
+
+    def resolve_columns(self, source_columns: list[str]) -> "FilterPushdown":
+        """
+        Resolve the column names in the pushdown to the actual names of the source's columns. Column names are
+        case-insensitive in DuckDB, so this matches them the same way. Parts of the pushdown that reference unknown
+        columns are dropped.
+        """
+        exact_names = set(source_columns)
+        names_by_lowercase: dict[str, list[str]] = {}
+        for column in source_columns:
+            names_by_lowercase.setdefault(column.lower(), []).append(column)
+
+        def resolve(name: str) -> str | None:
+            if name in exact_names:
+                return name
+            matches = names_by_lowercase.get(name.lower(), [])
+            if len(matches) == 1:
+                return matches[0]
+            return None
+
+        resolved = copy.deepcopy(self)
+        resolved.conditions = []
+        for condition in self.conditions:
+            condition_column = resolve(condition.column)
+            if condition_column is None:
+                resolved.complete = False
+                continue
+            resolved.conditions.append(PushdownCondition(condition_column, condition.operator, condition.values))
+        if self.projection is not None:
+            projection = []
+            for column, alias in self.projection:
+                projection_column = resolve(column)
+                if projection_column is None:
+                    resolved.complete = False
+                    break
+                projection.append((projection_column, alias))
+            else:
+                resolved.projection = projection
+        if self.referenced_columns is not None:
+            # (Names that don't resolve are aliases or similar, not source columns.)
+            referenced_columns = {resolve(name) for name in self.referenced_columns}
+            resolved.referenced_columns = {name for name in referenced_columns if name is not None} or None
+        if not resolved.complete:
+            resolved.limit = None
+            resolved.offset = None
+        return resolved
+
+
+def plan_filter_pushdown(filter_sql: str) -> FilterPushdown | None:
+    """
+    Find the parts of the intermediate filter SQL that can be pushed down into a source query: a simple projection of
+    columns, simple comparisons of columns against constants in the WHERE clause, LIMIT/OFFSET, and the set of
+    columns that the filter needs at all. Returns None if nothing can be pushed down.
+    """
+    _, filter_sql = pre_process([], filter_sql)
+    if TRANSPOSE_MACRO in filter_sql:
+        return None
+    session = get_duckdb_session()
+    with session.lock:
+        row = session.conn.execute("SELECT json_serialize_sql(?)", [filter_sql]).fetchone()
+    assert row is not None
+    ast: dict[str, Any] = json.loads(row[0])
+    if ast["error"] or len(ast["statements"]) != 1:
+        return None
+    node = ast["statements"][0]["node"]
+    if node["type"] != "SELECT_NODE" or not _is_data_table(node["from_table"]) or node["cte_map"]["map"]:
+        return None
+    if _has_other_table_references({key: value for key, value in node.items() if key != "from_table"}):
+        # Subqueries (e.g. `(SELECT count(*) FROM data)`) must see the whole source, not just the pushed-down rows.
+        return None
+
+    conditions = []
+    complete = True
+    for conjunct in _split_conjunction(node["where_clause"]):
+        try:
+            conditions.append(_parse_condition(conjunct))
+        except NotPushable:
+            complete = False
+
+    selected_columns: list[tuple[str, str | None]] = []
+    select_star = False
+    for expression in node["select_list"]:
+        if _is_plain_star(expression):
+            select_star = True
+            if len(node["select_list"]) > 1:
+                complete = False
+            break
+        if expression["class"] != "COLUMN_REF":
+            complete = False
+            break
+        selected_columns.append((expression["column_names"][-1], expression["alias"] or None))
+    projection = None if select_star else selected_columns
+
+    limit = None
+    offset = None
+    for modifier in node["modifiers"]:
+        if modifier["type"] != "LIMIT_MODIFIER":
+            complete = False
+            continue
+        try:
+            limit = _parse_integer_constant(modifier["limit"])
+            offset = _parse_integer_constant(modifier["offset"])
+        except NotPushable:
+            complete = False
+    if (
+        node["group_expressions"]
+        or node["group_sets"]
+        or node["aggregate_handling"] != "STANDARD_HANDLING"
+        or node["having"]
+        or node["qualify"]
+        or node["sample"]
+    ):
+        complete = False
+
+    if not complete:
+        limit = None
+        offset = None
+    referenced_columns = _find_referenced_columns(node)
+    if not complete and not conditions and referenced_columns is None:
+        return None
+    return FilterPushdown(
+        projection=projection,
+        conditions=conditions,
+        limit=limit,
+        offset=offset,
+        complete=complete,
+        referenced_columns=referenced_columns,
+    )
+
+
+def _is_data_table(from_table: dict[str, Any]) -> bool:
+    return (
+        from_table["type"] == "BASE_TABLE"
+        and from_table["table_name"].lower() == "data"
+        and not from_table["schema_name"]
+        and not from_table["catalog_name"]
+        and not from_table["sample"]
+    )
+
+
+def _has_other_table_references(item: Any) -> bool:
+    if isinstance(item, dict):
+        if item.get("class") == "SUBQUERY" or item.get("type") in ("SUBQUERY", "BASE_TABLE"):
+            return True
+        return any(_has_other_table_references(value) for value in item.values())
+    if isinstance(item, list):
+        return any(_has_other_table_references(value) for value in item)
+    return False
+
+
+def _is_plain_star(expression: dict[str, Any]) -> bool:
+    return (
+        expression["class"] == "STAR"
+        and not expression["exclude_list"]
+        and not expression["replace_list"]
+        and not expression.get("rename_list")
+        and not expression.get("qualified_exclude_list")
+        and not expression["columns"]
+        and not expression["expr"]
+    )
+
+
+def _split_conjunction(expression: dict[str, Any] | None) -> list[dict[str, Any]]:
+    if expression is None:
+        return []
+    if expression["class"] == "CONJUNCTION" and expression["type"] == "CONJUNCTION_AND":
+        return [conjunct for child in expression["children"] for conjunct in _split_conjunction(child)]
+    return [expression]
+
+
+def _parse_column(expression: dict[str, Any]) -> str:
+    if expression["class"] != "COLUMN_REF" or len(expression["column_names"]) > 2:
+        raise NotPushable()
+    if len(expression["column_names"]) == 2 and expression["column_names"][0].lower() != "data":
+        raise NotPushable()
+    return expression["column_names"][-1]
+
+
+def _parse_constant(expression: dict[str, Any]) -> Any:
+    if expression["class"] != "CONSTANT" or expression["value"]["is_null"]:
+        raise NotPushable()
+    value_type = expression["value"]["type"]
+    value = expression["value"]["value"]
+    if value_type["id"] in ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "VARCHAR", "DOUBLE"):
+        return value
+    if value_type["id"] == "DECIMAL":
+        return decimal.Decimal(value).scaleb(-value_type["type_info"]["scale"])
+    raise NotPushable()
+
+
+def _parse_integer_constant(expression: dict[str, Any] | None) -> int | None:
+    if expression is None:
+        return None
+    value = _parse_constant(expression)
+    if not isinstance(value, int):
+        raise NotPushable()
+    return value
+
+
+def _parse_condition(expression: dict[str, Any]) -> PushdownCondition:
+    if expression["class"] == "COMPARISON" and expression["type"] in COMPARISON_OPERATORS:
+        operator = COMPARISON_OPERATORS[expression["type"]]
+        if expression["left"]["class"] == "CONSTANT":
+            return PushdownCondition(
+                _parse_column(expression["right"]),
+                FLIPPED_COMPARISON_OPERATORS[operator],
+                [_parse_constant(expression["left"])],
+            )
+        return PushdownCondition(_parse_column(expression["left"]), operator, [_parse_constant(expression["right"])])
+    if expression["class"] == "OPERATOR" and expression["type"] in ("COMPARE_IN", "COMPARE_NOT_IN"):
+        column, *values = expression["children"]
+        operator = "in" if expression["type"] == "COMPARE_IN" else "not in"
+        return PushdownCondition(_parse_column(column), operator, [_parse_constant(value) for value in values])
+    if expression["class"] == "OPERATOR" and expression["type"] in ("OPERATOR_IS_NULL", "OPERATOR_IS_NOT_NULL"):
+        operator = "is null" if expression["type"] == "OPERATOR_IS_NULL" else "is not null"
+        return PushdownCondition(_parse_column(expression["children"][0]), operator)
+    if expression["class"] == "BETWEEN":
+        return PushdownCondition(
+            _parse_column(expression["input"]),
+            "between",
+            [_parse_constant(expression["lower"]), _parse_constant(expression["upper"])],
+        )
+    raise NotPushable()
+
+
+def _find_referenced_columns(node: dict[str, Any]) -> set[str] | None:
+    columns: set[str] = set()
+
+    def walk(item: Any) -> bool:
+        if isinstance(item, dict):
+            if item.get("class") == "STAR":
+                return False
+            if item.get("class") == "COLUMN_REF":
+                columns.add(item["column_names"][-1])
+            return all(walk(value) for value in item.values())
+        if isinstance(item, list):
+            return all(walk(value) for value in item)
+        return True
+
+    if not walk(node) or not columns:
+        return None
+    return columns
@@ -1,34 +1,111 @@
+import contextlib
 import logging
 import re
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any
 
 import numpy as np
 import pandas as pd
 
+from tableconv.config_utils import get_config
 from tableconv.exceptions import InvalidQueryError
 
 logger = logging.getLogger(__name__)
 
 
-def flatten_arrays_for_duckdb(df: pd.DataFrame) -> None:
+NESTED_TYPE_SAMPLE_SIZE = 1000
+
+
+def _sample(series: pd.Series) -> pd.Series:
+    return series.iloc[:: max(1, len(series) // NESTED_TYPE_SAMPLE_SIZE)]
+
+
+def _is_nested(value: Any) -> bool:
+    return isinstance(value, list | dict | np.ndarray)
+
+
+def _duckdb_supports_arrow_type(arrow_type) -> bool:
+    import pyarrow.types
+
+    if pyarrow.types.is_struct(arrow_type):
+        fields = [arrow_type.field(i) for i in range(arrow_type.num_fields)]
+        return bool(fields) and all(_duckdb_supports_arrow_type(field.type) for field in fields)
+    if pyarrow.types.is_list(arrow_type) or pyarrow.types.is_large_list(arrow_type):
+        return _duckdb_supports_arrow_type(arrow_type.value_type)
+    return True
+
+
+def _to_nested_arrow_column(series: pd.Series) -> pd.Series | None:
+    """Convert a column of lists/dicts into an Arrow LIST/STRUCT column, or return None if not possible."""
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    try:
+        array = pyarrow.array(series, from_pandas=True)
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, TypeError, ValueError):
+        # (Mixed types, e.g. `[1, "a"]` or a mix of lists and strings)
+        return None
+    if not _duckdb_supports_arrow_type(array.type):
+        return None
+    return pd.Series(array.to_pandas(types_mapper=pd.ArrowDtype), index=series.index, name=series.name)
+
+
+def prepare_df_for_duckdb(df: pd.DataFrame) -> pd.DataFrame:
     """
-    I've struggled to make DuckDB support creating columns of arrays. In my attempts, it returns the values always as
-    NaN. So, as a workaround, convert all array columns to string.
+    Prepare columns of lists/dicts (e.g. from nested JSON) to be handed to DuckDB. Left as-is, DuckDB's own analysis of
+    such pandas "object" columns is lossy (e.g. it converts dict values to strings), and fails on some data. So,
+    convert them into Arrow-backed columns, which DuckDB reads as native LIST/STRUCT types that can be indexed into or
+    UNNESTed. Columns that cannot be represented that way (e.g. lists of mixed types, or if pyarrow is not installed)
+    are instead flattened into strings.
 
-    The docs aren't clear to me, so my understanding is incomplete. Some references:
-    - https://duckdb.org/docs/sql/data_types/nested
-    - https://github.com/duckdb/duckdb/issues/1421
+    Nested columns are detected by looking at a sample of each column's values, rather than every value. (DuckDB itself
+    converts to strings any stray nested values that are missed by the sample)
+
+    Returns a shallow copy of the df if any columns needed changes, otherwise the df itself.
     """
-    flattened = set()
-    for col_name, dtype in zip(df.dtypes.index, df.dtypes, strict=False):
-        if dtype == np.dtype("O"):
-            # "Object" type. anything non-numeric, or of mixed-type, is type Object in pandas. So we need to further
-            # specifically inspect for arrays.
-            if df[col_name].apply(lambda x: isinstance(x, list)).any():
-                df[col_name] = df[col_name].astype(str)
-                flattened.add(col_name)
+    prepared_df = df
+    flattened = []
+    for i, (col_name, dtype) in enumerate(zip(df.dtypes.index, df.dtypes, strict=False)):
+        if dtype != np.dtype("O"):
+            continue
+        column = df.iloc[:, i]
+        if not any(_is_nested(value) for value in _sample(column)):
+            continue
+        if prepared_df is df:
+            prepared_df = df.copy(deep=False)
+        nested_column = _to_nested_arrow_column(column)
+        if nested_column is not None:
+            prepared_df.isetitem(i, nested_column)
+        else:
+            prepared_df.isetitem(i, column.astype(str))
+            flattened.append(col_name)
     if flattened:
         flattened_display = ", ".join([str(column) for column in flattened])
         logger.warning(f"Flattened some columns into strings for in-memory query: {flattened_display}")
+    return prepared_df
+
+
+def _nested_to_python(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return [_nested_to_python(item) for item in value.tolist()]
+    if isinstance(value, dict):
+        return {key: _nested_to_python(item) for key, item in value.items()}
+    if value is pd.NA:
+        return None
+    return value
+
+
+TRANSPOSE_MACRO = "transpose(data)"
+FROM_UNIX_MACRO_RE = re.compile(r"\b(?:from_)?unix\((.+?)\)", re.IGNORECASE)
+FROM_ISO8601_MACRO_RE = re.compile(r"\b(?:from_)?iso8601\((.+?)\)", re.IGNORECASE)
+
+
+def uses_macros(query: str) -> bool:
+    """Whether the query uses any of the macros that ``pre_process`` expands (transpose, from_unix, from_iso8601)"""
+    return TRANSPOSE_MACRO in query or bool(FROM_UNIX_MACRO_RE.search(query) or FROM_ISO8601_MACRO_RE.search(query))
 
 
 def pre_process(dfs, query) -> tuple:
@@ -64,13 +141,13 @@ def pre_process(dfs, query) -> tuple:
             logger.debug("Query was missing any SELECT statement. Inferring `SELECT` at start of query..")
 
     # Expand `transpose()` macro
-    if "transpose(data)" in query:
+    if TRANSPOSE_MACRO in query:
         ANTI_CONFLICT_STR = "027eade341cf"  # (rare/unique sentinel string to avoid name conflicts)
         transposed_data_table_name = f"transposed_data_{ANTI_CONFLICT_STR}"
-        query = query.replace("transpose(data)", f'"{transposed_data_table_name}"')
+        query = query.replace(TRANSPOSE_MACRO, f'"{transposed_data_table_name}"')
         for table_name, df in dfs:
             if table_name == "data":
-                data_df = df
+                data_df = df if isinstance(df, pd.DataFrame) else df.to_pandas()
                 break
         transposed_data_df = data_df.transpose(copy=True).reset_index()
         transposed_data_df.columns = transposed_data_df.iloc[0].values
@@ -81,33 +158,185 @@ def pre_process(dfs, query) -> tuple:
 
     # Expand `from_unix()` macro
     old_query = query
-    query = re.sub(
-        r"\b(?:from_)?unix\((.+?)\)", r"(TIMESTAMP '1970-01-01 00:00:00' + to_seconds(\1))", query, flags=re.IGNORECASE
-    )
+    query = FROM_UNIX_MACRO_RE.sub(r"(TIMESTAMP '1970-01-01 00:00:00' + to_seconds(\1))", query)
     if old_query != query:
         logger.debug("Expanded `from_unix()` macro")
 
     # Expand `from_iso8601()` macro
     old_query = query
-    query = re.sub(r"\b(?:from_)?iso8601\((.+?)\)", r"CAST(\1 AS TIMESTAMP)", query, flags=re.IGNORECASE)
+    query = FROM_ISO8601_MACRO_RE.sub(r"CAST(\1 AS TIMESTAMP)", query)
     if old_query != query:
         logger.debug("Expanded `from_iso8601()` macro")
 
     return dfs, query
 
 
-def query_in_memory(dfs: list[tuple[str, pd.DataFrame]], query: str) -> pd.DataFrame:
-    """Warning: Has a side effect of mutating the dfs"""
+def query_in_memory(dfs: list[tuple[str, Any]], query: str, as_arrow: bool = False) -> Any:
+    """
+    Run a DuckDB SQL query over the given named tables. Tables can be either Pandas DataFrames or pyarrow Tables
+    (pyarrow Tables are scanned zero-copy). Returns a DataFrame, or a pyarrow Table if ``as_arrow`` is set.
+
+    Warning: Has a side effect of mutating the dfs
+    """
+    return get_duckdb_session().query(dfs, query, as_arrow)
+
+
+DUCKDB_SETTINGS = ("threads", "memory_limit", "temp_directory")
+
+
+def _table_fingerprint(df: Any) -> tuple | None:
+    # DuckDB binds the schema of a registered DataFrame at registration time, so a DataFrame that has been mutated
+    # since (e.g. had a column added) needs to be registered again.
+    if isinstance(df, pd.DataFrame):
+        return (tuple(df.columns), tuple(str(dtype) for dtype in df.dtypes), len(df))
+    return None
+
+
+class DuckDBSession:
+    """
+    A persistent in-memory DuckDB connection, shared by every in-memory query in this process (e.g. the repeated
+    queries of the interactive shell, or the requests served by the daemon). Registered tables are kept alive and
+    tracked, so that querying the same table again does not need to register (and prepare its nested columns) it again.
+
+    DuckDB's ``threads``, ``memory_limit`` and ``temp_directory`` settings can be set via ``configure()``, or via the
+    tableconv config directory (``duckdb_threads``, ``duckdb_memory_limit``, ``duckdb_temp_directory``).
+    """
+
+    def __init__(self, **settings):
+        self.settings = {key: value for key, value in settings.items() if value is not None}
+        self.lock = threading.RLock()
+        self._conn = None
+        # Table name -> (registered DataFrame/pyarrow Table, or the SQL of a view; fingerprint)
+        self._registered: dict[str, tuple[Any, tuple | None]] = {}
+        # id(df) -> (weakref to df, fingerprint, the df as prepared by prepare_df_for_duckdb, or None if that is the df
+        # itself, so that this cache never keeps the df alive)
+        self._prepared: dict[int, tuple[weakref.ref, tuple | None, pd.DataFrame | None]] = {}
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            import duckdb  # inline import for performance
+
+            logger.debug(f"Connecting to in-memory duckdb (settings: {self.settings})")
+            config = {key: str(value) for key, value in self.settings.items()}
+            self._conn = duckdb.connect(database=":memory:", read_only=False, config=config)
+        return self._conn
+
+    def configure(
+        self, threads: int | None = None, memory_limit: str | None = None, temp_directory: str | None = None
+    ) -> None:
+        """Change DuckDB settings, e.g. ``configure(threads=4, memory_limit="2GB")``. ``None`` means unchanged."""
+        settings = {
+            key: value
+            for key, value in zip(DUCKDB_SETTINGS, (threads, memory_limit, temp_directory), strict=True)
+            if value is not None
+        }
+        with self.lock:
+            self.settings.update(settings)
+            if self._conn is not None:
+                for key, value in settings.items():
+                    self._conn.execute(f"SET {key} = {sql_string_literal(str(value))}")
+
+    def register(self, table_name: str, df: Any) -> None:
+        """Register a DataFrame or pyarrow Table as a table, unless it is already registered under that name."""
+        with self.lock:
+            fingerprint = _table_fingerprint(df)
+            registered = self._registered.get(table_name)
+            if registered is not None and registered[0] is df and registered[1] == fingerprint:
+                return
+            registered_df = df
+            if isinstance(df, pd.DataFrame):
+                prepared = self._prepared.get(id(df))
+                if prepared is not None and prepared[0]() is df and prepared[1] == fingerprint:
+                    registered_df = df if prepared[2] is None else prepared[2]
+                else:
+                    registered_df = prepare_df_for_duckdb(df)
+                    key = id(df)
+                    self._prepared[key] = (
+                        weakref.ref(df, lambda _: self._prepared.pop(key, None)),
+                        fingerprint,
+                        None if registered_df is df else registered_df,
+                    )
+            self.unregister(table_name)
+            self.conn.register(table_name, registered_df)
+            self._registered[table_name] = (df, fingerprint)
+
+    def create_view(self, table_name: str, sql: str) -> None:
+        with self.lock:
+            self.unregister(table_name)
+            self.conn.execute(f"CREATE TEMP VIEW {sql_identifier(table_name)} AS {sql}")
+            self._registered[table_name] = (sql, None)
+
+    def unregister(self, table_name: str) -> None:
+        with self.lock:
+            registered = self._registered.pop(table_name, None)
+            if registered is None:
+                return
+            if isinstance(registered[0], str):  # (A view, see create_view)
+                self.conn.execute(f"DROP VIEW {sql_identifier(table_name)}")
+            else:
+                self.conn.unregister(table_name)
+
+    def release(self) -> None:
+        """Unregister all tables, so that they can be garbage collected. (The connection itself stays open)"""
+        with self.lock:
+            for table_name in list(self._registered):
+                self.unregister(table_name)
+
+    def close(self) -> None:
+        """
+        Close the connection, discarding everything in it, including anything created by queries (e.g. tables, macros
+        or settings). The next use of the session opens a fresh connection.
+        """
+        with self.lock:
+            self._registered.clear()
+            self._prepared.clear()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def query(self, dfs: list[tuple[str, Any]], query: str, as_arrow: bool = False) -> Any:
+        """
+        Run a DuckDB SQL query over the given named tables. Tables registered by earlier queries, but not given here,
+        are unregistered first.
+
+        Warning: Has a side effect of mutating the dfs (see ``query_in_memory``)
+        """
+        with self.lock:
+            dfs, query = pre_process(dfs, query)
+            table_names = {table_name for table_name, _ in dfs}
+            for table_name in list(self._registered):
+                if table_name not in table_names:
+                    self.unregister(table_name)
+            for table_name, df in dfs:
+                self.register(table_name, df)
+            return execute_query(self.conn, query, as_arrow)
+
+
+_session: DuckDBSession | None = None
+
+
+def get_duckdb_session() -> DuckDBSession:
+    global _session
+    if _session is None:
+        _session = DuckDBSession(**{key: get_config(f"duckdb_{key}") for key in DUCKDB_SETTINGS})
+    return _session
+
+
+def reset_duckdb_session() -> None:
+    """Close the shared DuckDB session. The next ``get_duckdb_session()`` starts a new one."""
+    global _session
+    if _session is not None:
+        _session.close()
+        _session = None
+
+
+@contextlib.contextmanager
+def translate_query_errors():
     import duckdb  # inline import for performance
 
-    duck_conn = duckdb.connect(database=":memory:", read_only=False)
-    dfs, query = pre_process(dfs, query)
-    for table_name, df in dfs:
-        flatten_arrays_for_duckdb(df)
-        duck_conn.register(table_name, df)
-    logger.debug(f"Running query in duckdb: {query}")
     try:
-        duck_conn.execute(query)
+        yield
     except (RuntimeError, duckdb.ParserException, duckdb.CatalogException) as exc:
         raise InvalidQueryError(*exc.args) from exc
     except duckdb.BinderException as exc:
@@ -116,5 +345,254 @@ def query_in_memory(dfs: list[tuple[str, pd.DataFrame]], query: str) -> pd.DataF
         if "No function matches the given name" in exc.args[0]:
             raise InvalidQueryError(*exc.args) from exc
         raise
+
+
+def execute_query(duck_conn, query: str, as_arrow: bool = False) -> Any:
+    logger.debug(f"Running query in duckdb: {query}")
+    with translate_query_errors():
+        duck_conn.execute(query)
+    if as_arrow:
+        return duck_conn.fetch_arrow_table()
+    nested_columns = [i for i, column in enumerate(duck_conn.description) if column[1] in ("list", "dict")]
     result_df = duck_conn.fetchdf()
+    for i in nested_columns:
+        # DuckDB returns LISTs as numpy arrays. Convert them back into plain Python lists, same as loaded data.
+        result_df.isetitem(i, result_df.iloc[:, i].map(_nested_to_python))
     return result_df
+
+
+@dataclass
+class DuckDBScan:
+    """A DuckDB table function call that natively reads file(s), e.g. ``read_parquet('/tmp/data.parquet')``"""
+
+    function: str
+    # A path, or a list of paths to scan as a single table (with the union of the columns of all the files)
+    path: str | list[str]
+    # Extra arguments to the table function, e.g. "header=true"
+    options: str = ""
+    # If set, STRUCT columns are flattened into one column per leaf, named by joining the key path with this separator.
+    # (Mimics what pd.json_normalize does to the pandas-loaded data)
+    nesting_sep: str | None = None
+    # Strip leading spaces from strings. (Mimics pd.read_csv(skipinitialspace=True))
+    lstrip_strings: bool = False
+    # Values to read as null (read_csv's ``nullstr``), also after stripping leading spaces if ``lstrip_strings``.
+    null_strings: tuple[str, ...] = ()
+    # If set, add a column of this name, containing the path of the file that each row was read from.
+    source_file_column: str | None = None
+    # Type the (text) columns the same way that pd.read_csv would: as integers, floats or booleans if every value parses
+    # as one, else as strings. (DuckDB's own type detection differs, e.g. it reads "007" as a string and "0x1F" as 31)
+    pandas_csv_types: bool = False
+
+    @property
+    def sql(self) -> str:
+        if isinstance(self.path, str):
+            args = [sql_string_literal(self.path)]
+        else:
+            args = ["[" + ", ".join(sql_string_literal(path) for path in self.path) + "]", "union_by_name=true"]
+        if self.source_file_column:
+            args.append(f"filename={sql_string_literal(self.source_file_column)}")
+        if self.null_strings:
+            null_strings = list(self.null_strings)
+            if self.lstrip_strings:
+                # (So that e.g. "1, NA" leaves the column numeric. Any further spaces are handled by the projection)
+                null_strings += [f" {value}" for value in self.null_strings if value]
+            args.append(f"nullstr={_sql_list(null_strings)}")
+        if self.options:
+            args.append(self.options)
+        return f"{self.function}({', '.join(args)})"
+
+
+# The strings that pd.read_csv loads as null by default (its default ``na_values``)
+PANDAS_NA_VALUES = (
+    *("", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN", "<NA>", "N/A"),
+    *("NA", "NULL", "NaN", "None", "n/a", "nan", "null"),
+)
+
+# Patterns of the values that pd.read_csv parses as numbers/booleans
+PANDAS_INTEGER_PATTERN = r"\s*[+-]?[0-9]+\s*"
+PANDAS_FLOAT_PATTERN = r"\s*[+-]?(([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?|(?i:inf|infinity))\s*"
+PANDAS_BOOLEAN_PATTERN = r"(?i:true|false)"
+PANDAS_INFINITY_PATTERN = r"\s*[+-]?(?i:inf|infinity)\s*"
+
+DUCKDB_TEMPORAL_TYPES = frozenset(
+    {"date", "time", "time with time zone", "interval"}
+    | {"timestamp", "timestamp with time zone", "timestamp_ns", "timestamp_ms", "timestamp_s"}
+)
+
+
+@dataclass
+class DuckDBCopy:
+    """The options for a DuckDB ``COPY ... TO`` statement that natively writes a file, e.g. ``FORMAT PARQUET``"""
+
+    options: str
+    # DuckDB type ids (e.g. "boolean") of columns that DuckDB would serialize differently than our pandas-based
+    # adapters do. Data containing any such columns cannot be copied.
+    unsupported_types: frozenset[str] = frozenset()
+
+
+class UnsupportedScanError(Exception):
+    """DuckDB can read the file, but not into the same data as our pandas-based adapters would."""
+
+    pass
+
+
+def sql_string_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def sql_identifier(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def _sql_list(values) -> str:
+    return "[" + ", ".join(sql_string_literal(value) for value in values) + "]"
+
+
+def _scan_projection(relation, scan: DuckDBScan) -> list[tuple[str, str]]:
+    """The expressions (and their column names) to select from the scan, to get the same data as pandas would"""
+
+    def ordered(columns):
+        if not scan.nesting_sep:
+            return columns
+        # Same column order as pd.json_normalize: the flattened leaves of nested objects go after the scalars.
+        return [col for col in columns if col[2].id != "struct"] + [col for col in columns if col[2].id == "struct"]
+
+    def walk(expr, path, duck_type):
+        if scan.nesting_sep and duck_type.id == "struct":
+            children = [
+                (f"struct_extract({expr}, {sql_string_literal(child_name)})", path + [child_name], child_type)
+                for child_name, child_type in duck_type.children
+            ]
+            for child in ordered(children):
+                yield from walk(*child)
+            return
+        if scan.lstrip_strings and duck_type.id == "varchar":
+            expr = f"ltrim({expr}, ' ')"
+            if scan.null_strings:
+                expr = f"CASE WHEN list_contains({_sql_list(scan.null_strings)}, {expr}) THEN NULL ELSE {expr} END"
+        yield expr, (scan.nesting_sep or "").join(path)
+
+    columns = [
+        (sql_identifier(column), [column], duck_type)
+        for column, duck_type in zip(relation.columns, relation.types, strict=True)
+    ]
+    return [item for column in ordered(columns) for item in walk(*column)]
+
+
+def _has_json_type(duck_type) -> bool:
+    if str(duck_type) == "JSON":
+        return True
+    if duck_type.id in ("struct", "list", "array", "map", "union"):
+        return any(_has_json_type(child_type) for _, child_type in duck_type.children)
+    return False
+
+
+def _pandas_csv_casts(conn, source_sql: str, projection: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    """
+    Cast the text ``projection`` of the scan to the types that pd.read_csv would infer. This takes an extra pass over
+    the data, as pandas (unlike DuckDB's sniffer) looks at every value.
+    """
+    names = {name for _, name in projection}
+    for _, name in projection:
+        # DuckDB renames repeated and empty headers to e.g. "a_1" and "column3", where pandas has "a.1" and "Unnamed: 3"
+        renamed_header = re.fullmatch(r"(.*)_[0-9]+", name)
+        if (renamed_header and renamed_header.group(1) in names) or re.fullmatch(r"column[0-9]+", name):
+            raise UnsupportedScanError(f"Column {name} may have been renamed from a repeated or empty header")
+    integer_pattern = sql_string_literal(PANDAS_INTEGER_PATTERN)
+    float_pattern = sql_string_literal(PANDAS_FLOAT_PATTERN)
+    checks = ["count(*)"]
+    for expr, _ in projection:
+        # (pandas reads numbers too large for an int64/double as uint64s or strings, rather than e.g. as infinity)
+        overflow = (
+            f"(regexp_full_match({expr}, {integer_pattern}) AND TRY_CAST(trim({expr}) AS BIGINT) IS NULL)"
+            f" OR (regexp_full_match({expr}, {float_pattern}) AND isinf(TRY_CAST(trim({expr}) AS DOUBLE))"
+            f" AND NOT regexp_full_match({expr}, {sql_string_literal(PANDAS_INFINITY_PATTERN)}))"
+        )
+        checks += [
+            f"count({expr})",
+            f"bool_and(regexp_full_match({expr}, {integer_pattern}))",
+            f"bool_or({overflow})",
+            f"bool_and(regexp_full_match({expr}, {float_pattern}))",
+            f"bool_and(regexp_full_match({expr}, {sql_string_literal(PANDAS_BOOLEAN_PATTERN)}))",
+        ]
+    row = conn.execute(f"SELECT {', '.join(checks)} FROM {source_sql}").fetchone()
+    casted = []
+    for i, (expr, name) in enumerate(projection):
+        non_null_count, all_integers, any_overflow, all_floats, all_booleans = row[1 + i * 5 : 6 + i * 5]
+        if any_overflow:
+            raise UnsupportedScanError(f"Column {name} has numbers that do not fit in an int64/double")
+        if non_null_count == 0:
+            # (pandas reads empty columns as all-NaN floats)
+            expr = "NULL::DOUBLE"
+        elif all_integers and non_null_count == row[0]:
+            expr = f"CAST(trim({expr}) AS BIGINT)"
+        elif all_floats:
+            # (Including integer columns with nulls, same as pandas)
+            expr = f"CAST(trim({expr}) AS DOUBLE)"
+        elif all_booleans:
+            expr = f"CAST({expr} AS BOOLEAN)"
+        casted.append((expr, name))
+    return casted
+
+
+def _connect_scan(scan: DuckDBScan):
+    session = get_duckdb_session()
+    relation = session.conn.sql(f"SELECT * FROM {scan.sql}")
+    if any(_has_json_type(duck_type) for duck_type in relation.types):
+        # (e.g. a JSON field that is a number in some records and a string in others)
+        raise UnsupportedScanError(f"Unable to read values of mixed types: {relation.columns}")
+    projection = "*"
+    if scan.nesting_sep or scan.lstrip_strings or scan.pandas_csv_types:
+        columns = _scan_projection(relation, scan)
+        if scan.pandas_csv_types:
+            columns = _pandas_csv_casts(session.conn, scan.sql, columns)
+        projection = ", ".join(f"{expr} AS {sql_identifier(name)}" for expr, name in columns)
+    session.release()
+    session.create_view("data", f"SELECT {projection} FROM {scan.sql}")
+    return session.conn
+
+
+def query_duckdb_scan(scan: DuckDBScan, query: str, as_arrow: bool = False) -> Any:
+    """
+    Run a query against a file scanned natively by DuckDB (exposed as the table ``data``), so that DuckDB can do a
+    parallel, projection-pruned, streaming scan of the file rather than us first loading the entire file into memory.
+
+    Errors from DuckDB failing to read the file itself (e.g. duckdb.InvalidInputException) are raised as-is, as is
+    UnsupportedScanError if DuckDB reads the file differently than pandas would, so that callers can fall back to
+    loading the file some other way.
+    """
+    _, query = pre_process([], query)
+    with get_duckdb_session().lock:
+        duck_conn = _connect_scan(scan)
+        return execute_query(duck_conn, query, as_arrow)
+
+
+def copy_duckdb_scan(scan: DuckDBScan, query: str | None, copy: DuckDBCopy, path: str) -> int | None:
+    """
+    Convert a file scanned natively by DuckDB directly into another file, via ``COPY (query) TO path``. The data never
+    passes through Python, so this is multi-threaded and does not need to fit in memory.
+
+    Returns the number of rows written, or None if nothing was written because the data has columns of a type listed in
+    ``copy.unsupported_types``. Errors from DuckDB failing to read the source file are raised as-is (same as for
+    ``query_duckdb_scan``).
+    """
+    if query:
+        _, query = pre_process([], query)
+    else:
+        query = "SELECT * FROM data"
+    with get_duckdb_session().lock:
+        duck_conn = _connect_scan(scan)
+        with translate_query_errors():
+            relation = duck_conn.sql(query)
+        unsupported_columns = [
+            column
+            for column, duck_type in zip(relation.columns, relation.types, strict=True)
+            if duck_type.id in copy.unsupported_types
+        ]
+        if unsupported_columns:
+            logger.debug(f"Unable to natively copy columns {unsupported_columns}")
+            return None
+        statement = f"COPY ({query}) TO {sql_string_literal(path)} ({copy.options})"
+        logger.debug(f"Running copy in duckdb: {statement}")
+        with translate_query_errors():
+            return duck_conn.execute(statement).fetchone()[0]
@@ -7,9 +7,20 @@ import shutil
 import subprocess
 import sys
 
+import pandas as pd
+
 from tableconv.config_utils import get_config_filepath
-from tableconv.core import IntermediateExchangeTable, load_multitable_from_url, load_url
+from tableconv.core import (
+    IntermediateExchangeTable,
+    get_freshness_token,
+    load_multitable_from_url,
+    load_url,
+    parse_source_url,
+    resolve_query_arg,
+)
 from tableconv.exceptions import DataError, EmptyDataError, InvalidQueryError, InvalidURLError
+from tableconv.in_memory_query import get_duckdb_session, query_in_memory
+from tableconv.schema_coercion import coerce_schema
 
 logger = logging.getLogger(__name__)
 
@@ -35,8 +46,44 @@ def os_open(url: str):
     subprocess.run(opener_cmd)
 
 
+class LoadedSource:
+    """
+    The source table, loaded into memory just once, and then queried repeatedly via the persistent DuckDB session.
+    """
+
+    def __init__(self, url: str, autocache: bool):
+        self.url = url
+        self.autocache = autocache
+        self.watch = False
+        self.df: pd.DataFrame | None = None
+        self.freshness_token: str | None = None
+
+    def load(self) -> pd.DataFrame:
+        self.freshness_token = get_freshness_token(self.url)
+        self.df = load_url(self.url, autocache=self.autocache).as_pandas_df()
+        return self.df
+
+    def get_df(self) -> pd.DataFrame:
+        if self.df is None:
+            return self.load()
+        if self.watch and get_freshness_token(self.url) != self.freshness_token:
+            print("(Source changed, reloading)", file=sys.stderr)
+            return self.load()
+        return self.df
+
+    def query(self, query: str) -> pd.DataFrame:
+        resolved_query = resolve_query_arg(query)
+        if resolved_query is None:
+            raise InvalidQueryError("Empty query")
+        return get_duckdb_session().query([("data", self.get_df())], resolved_query)
+
+
 def handle_administrative_command(
-    query: str, source: str, multitable: bool, last_result: IntermediateExchangeTable | None
+    query: str,
+    source: str,
+    multitable: bool,
+    last_result: IntermediateExchangeTable | None,
+    loaded_source: LoadedSource | None,
 ):
     cmd_char = query[0]
     cmd = query[1:].split(" ")
@@ -46,11 +93,15 @@ def handle_administrative_command(
             + f"  {cmd_char}dt (describe table)\n"
             + f"  {cmd_char}ds (describe table, sorted)\n"
             + f"  {cmd_char}export URL (save results)\n"
+            + f"  {cmd_char}reload (reload the source data)\n"
+            + f"  {cmd_char}watch (toggle automatically reloading the source data when it changes)\n"
             + f"  {cmd_char}m (toggle multiline mode (queries terminated by semicolon instead of newline))"
         )
     elif cmd[0] in ("schema", "dt", "dt+", "ds", "d", "d+", "describe", "show"):
         if multitable:
             tables = list(load_multitable_from_url(source))
+        elif loaded_source:
+            tables = [("data", loaded_source.get_df())]
         else:
             tables = [("data", load_url(source).as_pandas_df())]
         for table_name, table_df in tables:
@@ -78,6 +129,18 @@ def handle_administrative_command(
                         else:
                             raise AssertionError
                 print(f'  "{column}" {", ".join(types)}')
+    elif cmd[0] in ("reload", "r"):
+        if not loaded_source:
+            print("(The source is already reloaded for every query)", file=sys.stderr)
+            return
+        df = loaded_source.load()
+        print(f"(Reloaded {len(df)} rows)", file=sys.stderr)
+    elif cmd[0] in ("watch", "w"):
+        if not loaded_source:
+            print("(The source is already reloaded for every query)", file=sys.stderr)
+            return
+        loaded_source.watch = not loaded_source.watch
+        print(f"(Watching for changes {'enabled' if loaded_source.watch else 'disabled'})", file=sys.stderr)
     elif cmd[0] in ("m", "multiline"):
         global multiline
         multiline = not multiline
@@ -146,6 +209,10 @@ def run_interactive_shell(
 
     query_buffer = ""
 
+    loaded_source = None
+    if not multitable and parse_source_url(source)[1].in_memory_queries:
+        loaded_source = LoadedSource(source, autocache)
+
     while True:
         try:
             raw_query = input(prompt).strip()
@@ -159,7 +226,7 @@ def run_interactive_shell(
         readline.write_history_file(INTERACTIVE_HIST_PATH)
 
         if raw_query[0] in ("\\", ".", "/"):
-            handle_administrative_command(raw_query, source, multitable, last_result)
+            handle_administrative_command(raw_query, source, multitable, last_result, loaded_source)
             continue
 
         query_buffer += raw_query
@@ -185,14 +252,27 @@ def run_interactive_shell(
         try:
             # Load source
             last_result = None
-            table = load_url(
-                url=source,
-                query=query,
-                filter_sql=intermediate_filter_sql,
-                schema_coercion=schema_coercion,
-                restrict_schema=restrict_schema,
-                autocache=autocache,
-            )
+            if loaded_source:
+                df = loaded_source.query(query)
+                if df.empty:
+                    raise EmptyDataError()
+                if schema_coercion:
+                    df = coerce_schema(df, schema_coercion, restrict_schema)
+                filter_sql = resolve_query_arg(intermediate_filter_sql)
+                if filter_sql:
+                    df = query_in_memory([("data", df)], filter_sql)
+                    if df.empty:
+                        raise EmptyDataError("No rows returned by intermediate filter sql query")
+                table = IntermediateExchangeTable(df)
+            else:
+                table = load_url(
+                    url=source,
+                    query=query,
+                    filter_sql=intermediate_filter_sql,
+                    schema_coercion=schema_coercion,
+                    restrict_schema=restrict_schema,
+                    autocache=autocache,
+                )
             last_result = table
             # Dump to destination
             output = table.dump_to_url(url=dest)
@@ -0,0 +1,656 @@
+"""
+Incremental loading of JSON-data-model records (JSON arrays of objects, JSONL) into DataFrames.
+
+Input is read and parsed in chunks, one record at a time, and each record is flattened into columns as soon as it is
+parsed. So neither the raw text of the whole file, nor a list of all the parsed records, is ever held in memory at once.
+(orjson is used to parse JSONL, if installed). Large JSONL files are parsed in parallel, by multiple processes.
+
+The flattening of nested objects into columns (``RecordColumns``/``flatten_records``) is shared by all the adapters with
+a JSON-like data model (YAML, msgpack, Python literals, ...), as a faster replacement for ``pd.json_normalize``.
+
+In the other direction, DataFrames are written out as JSON records (optionally unnesting columns back into nested
+objects) by ``write_json_records``, which encodes whole columns at a time rather than one record at a time.
+"""
+
+import concurrent.futures
+import datetime
+import decimal
+import io
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import os
+from collections.abc import Iterable, Iterator, Sized
+from typing import IO, Any, cast
+
+import numpy as np
+import pandas as pd
+
+from tableconv.exceptions import SourceParseError
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+# JSONL files larger than this are split up and parsed by multiple processes in parallel.
+PARALLEL_LOAD_MIN_BYTES = 64 * 1024 * 1024
+# (More shards than processes, so that processes that finish early can pick up more work)
+SHARDS_PER_JOB = 4
+
+_decoder = json.JSONDecoder()
+_encode_str = json.encoder.encode_basestring_ascii  # type: ignore[attr-defined]
+_WHITESPACE = " \t\n\r"
+
+
+def _loads(data: bytes | str) -> Any:
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(data)
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # orjson is stricter than the json module (e.g. it rejects integers over 64 bits, or NaN). Let the json module
+        # decide, which also gives the same error messages either way.
+        pass
+    return json.loads(data)
+
+
+def _relocate_decode_error(
+    exc: json.JSONDecodeError, line_offset: int, char_offset: int, column_offset: int
+) -> json.JSONDecodeError:
+    """Adjust the position reported for a JSONDecodeError from parsing a fragment of the input, to the whole input."""
+    if exc.lineno == 1:
+        exc.colno += column_offset
+    exc.lineno += line_offset
+    exc.pos += char_offset
+    exc.args = (f"{exc.msg}: line {exc.lineno} column {exc.colno} (char {exc.pos})",)
+    return exc
+
+
+def iter_jsonl_records(f: IO, first_line_number: int = 0) -> Iterator[tuple[int, Any]]:
+    """
+    Parse a JSONL stream (preferably binary, as bytes are split into lines and parsed fastest), yielding (line number,
+    value) pairs. Blank lines are skipped.
+    """
+    line_number = first_line_number
+    remainder = None
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if remainder is None:
+            remainder = chunk[:0]
+        if not chunk:
+            lines = [remainder]
+        else:
+            lines = (remainder + chunk).split(b"\n" if isinstance(chunk, bytes) else "\n")
+            remainder = lines.pop()
+        for line in lines:
+            if line.strip():
+                try:
+                    yield line_number, _loads(line)
+                except json.JSONDecodeError as exc:
+                    _relocate_decode_error(exc, line_number, 0, 0)
+                    raise
+            line_number += 1
+        if not chunk:
+            return
+
+
+def iter_json_array_elements(f: IO[str]) -> Iterator[Any]:
+    """Parse a text stream containing a JSON array, yielding the elements of the array one by one."""
+    buffer = ""
+    pos = 0
+    eof = False
+    # Position of the start of `buffer` within the whole input.
+    line_offset = 0
+    char_offset = 0
+    column_offset = 0
+
+    def read_more() -> bool:
+        nonlocal buffer, pos, eof, line_offset, char_offset, column_offset
+        if eof:
+            return False
+        # (The read size grows with the unparsed part of the buffer, so that a single huge element is re-scanned only
+        # O(log(size)) times while waiting for all of it to arrive)
+        chunk = f.read(max(CHUNK_SIZE, len(buffer) - pos))
+        if not chunk:
+            eof = True
+            return False
+        # Discard everything already parsed.
+        consumed = buffer[:pos]
+        newlines = consumed.count("\n")
+        if newlines:
+            line_offset += newlines
+            column_offset = len(consumed) - consumed.rindex("\n") - 1
+        else:
+            column_offset += len(consumed)
+        char_offset += pos
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_whitespace() -> str | None:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not read_more():
+                return None
+
+    def decode_error(msg: str) -> json.JSONDecodeError:
+        return _relocate_decode_error(json.JSONDecodeError(msg, buffer, pos), line_offset, char_offset, column_offset)
+
+    first_char = skip_whitespace()
+    if first_char != "[":
+        # Not an array. Parse it all the regular way anyway, to report invalid JSON the same way as any other input.
+        while read_more():
+            pass
+        json.loads(buffer)
+        raise SourceParseError("Input must be a JSON array")
+    pos += 1
+    if skip_whitespace() == "]":
+        pos += 1
+    else:
+        while True:
+            if skip_whitespace() is None:
+                raise decode_error("Expecting value")
+            while True:
+                try:
+                    element, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as exc:
+                    if read_more():
+                        continue
+                    _relocate_decode_error(exc, line_offset, char_offset, column_offset)
+                    raise
+                # (A number at the very end of the buffer may continue in the next chunk)
+                if end == len(buffer) and read_more():
+                    continue
+                break
+            pos = end
+            yield element
+            delimiter = skip_whitespace()
+            pos += 1
+            if delimiter == "]":
+                break
+            if delimiter != ",":
+                pos -= 1
+                raise decode_error("Expecting ',' delimiter")
+    if skip_whitespace() is not None:
+        raise decode_error("Extra data")
+
+
+def validate_json_record(item: Any, scheme: str, index: int) -> None:
+    if not isinstance(item, dict):
+        if isinstance(item, (int, float)):
+            json_type = "number"
+        elif isinstance(item, str):
+            json_type = "string"
+        elif isinstance(item, list):
+            json_type = "array"
+        else:
+            json_type = str(type(item))
+        raise SourceParseError(
+            f"Every element of the input {scheme} must be a JSON object. (element {index + 1} in input was a JSON "
+            f"{json_type})"
+        )
+
+
+def _iter_nested_key_paths(record: dict, prefix: tuple) -> Iterator[tuple]:
+    for key, value in record.items():
+        if isinstance(value, dict):
+            yield from _iter_nested_key_paths(value, prefix + (key,))
+        else:
+            yield prefix + (key,)
+
+
+def iter_key_paths(record: dict) -> Iterator[tuple]:
+    """
+    The key paths of the leaves of a record (nested objects are not leaves). In the same order as the columns produced
+    by the flattening done by pd.json_normalize: top-level scalars first, then the leaves of nested objects.
+    """
+    for key, value in record.items():
+        if not isinstance(value, dict):
+            yield (key,)
+    for key, value in record.items():
+        if isinstance(value, dict):
+            yield from _iter_nested_key_paths(value, (key,))
+
+
+class _KeyPathNode:
+    """A level of nesting of the key paths seen so far: the columns of its leaf keys, and its nested objects."""
+
+    __slots__ = ("leaves", "children")
+
+    def __init__(self):
+        self.leaves: dict[Any, list] = {}
+        self.children: dict[Any, _KeyPathNode] = {}
+
+
+def _add_nested_nodes(node: _KeyPathNode, record: dict) -> None:
+    for key, value in record.items():
+        if isinstance(value, dict):
+            _add_nested_nodes(node.children.setdefault(key, _KeyPathNode()), value)
+
+
+def _fill_row(node: _KeyPathNode, record: dict, row: int) -> None:
+    leaves = node.leaves
+    for key, value in record.items():
+        if isinstance(value, dict):
+            if value:
+                _fill_row(node.children[key], value, row)
+        else:
+            leaves[key][row] = value
+
+
+class RecordColumns:
+    """
+    Builds up a table column by column from records, flattening each record as it is appended, rather than collecting
+    all the records first. Produces the same DataFrame as ``pd.json_normalize(records, sep=sep)``.
+
+    The key paths seen so far are kept as a tree that mirrors the nesting of the records, with the columns at its
+    leaves, so each value of a record is written straight into its slot of a preallocated column. Only records with key
+    paths never seen before take the slower path of working out the names and order of the new columns.
+    """
+
+    def __init__(self, sep: str, capacity: int = 0):
+        self.sep = sep
+        self.columns: dict[Any, list] = {}
+        self.num_rows = 0
+        # (Keys missing from a record are NaN, same as when building a DataFrame from a list of dicts)
+        self.capacity = capacity
+        self._key_paths = _KeyPathNode()
+
+    def _add_columns(self, record: dict) -> None:
+        _add_nested_nodes(self._key_paths, record)
+        for path in iter_key_paths(record):
+            node = self._key_paths
+            for key in path[:-1]:
+                node = node.children.setdefault(key, _KeyPathNode())
+            if path[-1] in node.leaves:
+                continue
+            name = path[0] if len(path) == 1 else self.sep.join(str(key) for key in path)
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = [math.nan] * self.capacity
+            node.leaves[path[-1]] = column
+
+    def append(self, record: dict) -> None:
+        if self.num_rows == self.capacity:
+            growth = max(self.capacity, 1024)
+            for column in self.columns.values():
+                column.extend([math.nan] * growth)
+            self.capacity += growth
+        try:
+            _fill_row(self._key_paths, record, self.num_rows)
+        except KeyError:
+            self._add_columns(record)
+            _fill_row(self._key_paths, record, self.num_rows)
+        self.num_rows += 1
+
+    def to_df(self) -> pd.DataFrame:
+        for column in self.columns.values():
+            del column[self.num_rows :]
+        df = pd.DataFrame(self.columns, index=pd.RangeIndex(self.num_rows))
+        self.columns = {}
+        self.num_rows = 0
+        self.capacity = 0
+        self._key_paths = _KeyPathNode()
+        return df
+
+
+def flatten_records(records: Iterable[dict], sep: str = ".") -> pd.DataFrame:
+    """
+    Build a DataFrame from records (dicts), flattening nested objects into one column per leaf, named by joining the
+    key path with ``sep``. A faster drop-in replacement for ``pd.json_normalize(records, sep=sep)``.
+    """
+    columns = RecordColumns(sep, capacity=len(records) if isinstance(records, Sized) else 0)
+    for record in records:
+        columns.append(record)
+    return columns.to_df()
+
+
+def load_json_records(f: IO, scheme: str, sep: str, first_line_number: int = 0) -> pd.DataFrame:
+    """Load a JSON array of objects (from a text stream), or JSONL, flattening nested objects."""
+    columns = RecordColumns(sep)
+    if scheme == "jsonl":
+        for line_number, record in iter_jsonl_records(f, first_line_number):
+            validate_json_record(record, scheme, line_number)
+            columns.append(record)
+    else:
+        for i, record in enumerate(iter_json_array_elements(f)):
+            validate_json_record(record, scheme, i)
+            columns.append(record)
+    return columns.to_df()
+
+
+def iter_jsonl_record_batches(f: IO, sep: str, batch_size: int) -> Iterator[pd.DataFrame]:
+    """Streaming variant of ``load_json_records`` for JSONL, yielding DataFrames of ``batch_size`` records each."""
+    columns = RecordColumns(sep)
+    for line_number, record in iter_jsonl_records(f):
+        validate_json_record(record, "jsonl", line_number)
+        columns.append(record)
+        if columns.num_rows >= batch_size:
+            yield columns.to_df()
+    if columns.num_rows:
+        yield columns.to_df()
+
+
+class _ByteRangeReader:
+    """
+    Reads just the bytes [start, end) of a binary file, counting the newlines read. (Only implements ``read()``, which
+    is all that the JSONL parser needs of a file)
+    """
+
+    def __init__(self, f: IO[bytes], start: int, end: int):
+        f.seek(start)
+        self.f = f
+        self.remaining = end - start
+        self.newlines = 0
+
+    def read(self, size: int) -> bytes:
+        data = self.f.read(min(size, self.remaining))
+        self.remaining -= len(data)
+        self.newlines += data.count(b"\n")
+        return data
+
+
+def _jsonl_shard_boundaries(path: str, num_shards: int) -> list[int]:
+    """Split the file into (roughly) equal byte ranges, aligned to the starts of lines."""
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, "rb") as f:
+        for i in range(1, num_shards):
+            # (Seek one byte back, so that an offset that is already at the start of a line stays there)
+            f.seek(max(size * i // num_shards - 1, boundaries[-1]))
+            f.readline()
+            if boundaries[-1] < f.tell() < size:
+                boundaries.append(f.tell())
+    boundaries.append(size)
+    return boundaries
+
+
+def _load_jsonl_shard(path: str, start: int, end: int, sep: str) -> tuple[pd.DataFrame, int]:
+    with open(path, "rb") as f:
+        shard = _ByteRangeReader(f, start, end)
+        return load_json_records(cast(IO[bytes], shard), "jsonl", sep), shard.newlines
+
+
+def load_jsonl_parallel(path: str, sep: str, jobs: int) -> pd.DataFrame:
+    """
+    Load a large JSONL file using multiple processes: the file is split into line-aligned byte ranges, which are parsed
+    into DataFrames in parallel, and then concatenated back together in order.
+    """
+    boundaries = _jsonl_shard_boundaries(path, jobs * SHARDS_PER_JOB)
+    shards = list(itertools.pairwise(boundaries))
+    logger.debug(f"Loading {path} in {len(shards)} shards with {jobs} processes")
+    dfs = []
+    with concurrent.futures.ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [executor.submit(_load_jsonl_shard, path, start, end, sep) for start, end in shards]
+        line_number = 0
+        for (start, end), future in zip(shards, futures, strict=True):
+            try:
+                df, num_lines = future.result()
+            except (json.JSONDecodeError, SourceParseError):
+                for pending_future in futures:
+                    pending_future.cancel()
+                # The shard only knows its own line numbers. Now that the number of lines before the shard is known,
+                # parse it again to raise the error with the line number within the whole file.
+                with open(path, "rb") as f:
+                    shard = cast(IO[bytes], _ByteRangeReader(f, start, end))
+                    load_json_records(shard, "jsonl", sep, first_line_number=line_number)
+                raise
+            dfs.append(df)
+            line_number += num_lines
+    df = pd.concat(dfs, ignore_index=True)
+    # (Columns that have different types in different shards end up as object columns. Infer their type again over the
+    # whole column, like when loading it all at once)
+    return df.infer_objects()
+
+
+# Number of rows encoded at a time when writing JSON records, bounding the memory used by the intermediate strings.
+WRITE_CHUNK_ROWS = 64 * 1024
+
+
+def json_default(obj: Any) -> Any:
+    """Convert values of types unknown to JSON (and msgpack) encoders."""
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, pd.Timedelta | datetime.date | datetime.time):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, bytes):
+        return obj.decode(errors="replace")
+    if hasattr(obj, "tolist"):
+        # (numpy arrays and scalars)
+        return obj.tolist()
+    return str(obj)
+
+
+def _dumps(value: Any) -> str:
+    try:
+        import orjson
+    except ImportError:
+        return json.dumps(value, default=json_default, separators=(",", ":"))
+    return orjson.dumps(
+        value, default=json_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    ).decode()
+
+
+def _encode_value(value: Any) -> str:
+    if value.__class__ is str:
+        return _encode_str(value)
+    if value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and not math.isfinite(value)):
+        return "null"
+    if isinstance(value, float):
+        return _encode_numbers(np.array([value]))[0]
+    if isinstance(value, datetime.date):
+        return '"' + _iso_timestamp(value) + '"'
+    return _dumps(value)
+
+
+# Number of decimal places that floats are written with. (The default of pd.DataFrame.to_json, which the JSON adapter
+# used to write files with. e.g. 0.1 + 0.2 is written as 0.3 rather than 0.30000000000000004)
+FLOAT_DECIMAL_PLACES = 10
+
+
+def _encode_numbers(values: np.ndarray) -> list[str]:
+    """The JSON text of each number of a numeric array, encoded all at once."""
+    if not len(values):
+        return []
+    if values.dtype.kind == "f":
+        # (Non-finite floats are written as null)
+        text = pd.Series(values).to_json(orient="values", double_precision=FLOAT_DECIMAL_PLACES)
+    else:
+        try:
+            import orjson
+        except ImportError:
+            text = json.dumps(values.tolist(), separators=(",", ":"))
+        else:
+            text = orjson.dumps(np.ascontiguousarray(values), option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    # (The JSON of a number never contains a comma)
+    return text[1:-1].split(",")
+
+
+def _is_datetime(dtype: Any) -> bool:
+    return (isinstance(dtype, np.dtype) and dtype.kind == "M") or isinstance(dtype, pd.DatetimeTZDtype)
+
+
+def _iso_timestamps(series: pd.Series) -> list[str]:
+    """ISO 8601 text of a datetime column, in millisecond precision, like pd.DataFrame.to_json(date_format="iso")"""
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        values = series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+        return np.datetime_as_string(values.astype("datetime64[ms]"), unit="ms", timezone="UTC").tolist()
+    return np.datetime_as_string(series.to_numpy().astype("datetime64[ms]"), unit="ms").tolist()
+
+
+def _iso_timestamp(value: datetime.date) -> str:
+    """ISO 8601 text of a date or datetime value, same as _iso_timestamps: dates are written as midnight."""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        return timestamp.tz_convert("UTC").strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    return timestamp.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+
+
+def _encode_column(series: pd.Series) -> list[str]:
+    """The JSON text of each value of the column. Each dtype is encoded in bulk, rather than value by value."""
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind == "b":
+        return np.where(series.to_numpy(), "true", "false").tolist()
+    if isinstance(dtype, np.dtype) and dtype.kind in "iuf":
+        return _encode_numbers(series.to_numpy())
+    if _is_datetime(dtype):
+        encoded = ['"' + timestamp + '"' for timestamp in _iso_timestamps(series)]
+        for i in np.flatnonzero(series.isna().to_numpy()).tolist():
+            encoded[i] = "null"
+        return encoded
+    values = series.to_numpy(dtype=object)
+    inferred_type = pd.api.types.infer_dtype(values, skipna=True)
+    if inferred_type == "string":
+        # (Columns of strings, the most common kind of "object" column, are encoded by C code, without Python calls)
+        is_null = pd.isna(values)
+        if not is_null.any():
+            return list(map(_encode_str, values))
+        encoded = list(map(_encode_str, np.where(is_null, "", values)))
+        for i in np.flatnonzero(is_null).tolist():
+            encoded[i] = "null"
+        return encoded
+    return [_encode_value(value) for value in values]
+
+
+def _record_template(columns: pd.Index, nesting_sep: str | None) -> tuple[list[str], list[int]]:
+    """
+    Work out the JSON text of a record, as constant fragments of text (the keys and punctuation) with the column values
+    to go between them. Returns the fragments, and the (positions of the) columns whose values go between them, in
+    order. With a ``nesting_sep``, column names are split into key paths, to output nested objects.
+    """
+    if not columns.is_unique:
+        raise ValueError("DataFrame columns must be unique for orient='records'.")
+    # (Nested dicts of key -> column position or subtree)
+    tree: dict[str, Any] = {}
+    # (The names of the columns at each leaf, and the first column in each subtree, for error messages)
+    leaf_names: dict[int, str] = {}
+    subtree_names: dict[int, str] = {}
+    for position, column in enumerate(columns):
+        path = str(column).split(nesting_sep) if nesting_sep else [str(column)]
+        node = tree
+        for depth, key in enumerate(path):
+            existing = node.get(key)
+            is_leaf = depth == len(path) - 1
+            if existing is None:
+                if is_leaf:
+                    node[key] = position
+                else:
+                    node[key] = {}
+                    subtree_names[id(node[key])] = str(column)
+            elif isinstance(existing, int) or is_leaf:
+                conflict_column = leaf_names[existing] if isinstance(existing, int) else subtree_names[id(existing)]
+                raise ValueError(f'Unnesting key conflict: column "{column}" conflicts with column "{conflict_column}"')
+            if not is_leaf:
+                node = node[key]
+        leaf_names[position] = str(column)
+
+    fragments = []
+    order = []
+    current = ""
+
+    def emit(node: dict[str, Any]) -> None:
+        nonlocal current
+        current += "{"
+        for i, (key, child) in enumerate(node.items()):
+            current += ("," if i else "") + _encode_str(key) + ":"
+            if isinstance(child, int):
+                fragments.append(current)
+                order.append(child)
+                current = ""
+            else:
+                emit(child)
+        current += "}"
+
+    emit(tree)
+    fragments.append(current)
+    return fragments, order
+
+
+def iter_json_records_text(df: pd.DataFrame, delimiter: str, nesting_sep: str | None = None) -> Iterator[str]:
+    """
+    Encode the rows of a DataFrame as JSON objects, each followed by ``delimiter``, yielding the text in chunks. With a
+    ``nesting_sep``, columns are unnested into nested objects, e.g. column "a.b" -> {"a": {"b": ...}}.
+
+    The keys and punctuation of a record are worked out just once, and every column is encoded in bulk for a chunk of
+    rows at a time. Then the fragments of text are interleaved by slice assignment, and joined into the output text,
+    so there is no Python code run per record or per value (except for values of "object" columns).
+    """
+    fragments, order = _record_template(df.columns, nesting_sep)
+    fragments[-1] += delimiter
+    pieces_per_row = len(fragments) + len(order)
+    for start in range(0, len(df), WRITE_CHUNK_ROWS):
+        chunk = df.iloc[start : start + WRITE_CHUNK_ROWS]
+        num_rows = len(chunk)
+        pieces: list[str | None] = [None] * (num_rows * pieces_per_row)
+        for i, fragment in enumerate(fragments):
+            pieces[i * 2 :: pieces_per_row] = [fragment] * num_rows
+        for i, position in enumerate(order):
+            pieces[i * 2 + 1 :: pieces_per_row] = _encode_column(chunk.iloc[:, position])
+        yield "".join(pieces)  # type: ignore[arg-type]
+
+
+def write_json_records(df: pd.DataFrame, f: IO[str], lines: bool, nesting_sep: str | None = None) -> None:
+    """Write the rows of a DataFrame as JSONL (``lines``), or else as a JSON array of objects."""
+    if lines:
+        for text in iter_json_records_text(df, "\n", nesting_sep):
+            f.write(text)
+        return
+    f.write("[")
+    for i, text in enumerate(iter_json_records_text(df, ",", nesting_sep)):
+        if i:
+            f.write(",")
+        f.write(text[:-1])
+    f.write("]")
+
+
+def dumps_json_records(df: pd.DataFrame, nesting_sep: str | None = None) -> str:
+    """The rows of a DataFrame as the text of a JSON array of objects."""
+    buffer = io.StringIO()
+    write_json_records(df, buffer, lines=False, nesting_sep=nesting_sep)
+    return buffer.getvalue()
+
+
+def _column_values(series: pd.Series) -> list:
+    """The values of the column as Python objects, with missing values as None, and datetimes as ISO 8601 strings."""
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+        values = series.to_numpy()
+        python_values = values.tolist()
+        if dtype.kind == "f":
+            for i in np.flatnonzero(np.isnan(values)).tolist():
+                python_values[i] = None
+        return python_values
+    if _is_datetime(dtype):
+        python_values = _iso_timestamps(series)
+        is_null = series.isna().to_numpy()
+    else:
+        values = series.to_numpy(dtype=object)
+        python_values = values.tolist()
+        is_null = pd.isna(values)
+    for i in np.flatnonzero(is_null).tolist():
+        python_values[i] = None
+    return python_values
+
+
+def iter_record_chunks(df: pd.DataFrame) -> Iterator[list[dict]]:
+    """
+    The rows of a DataFrame as records (dicts) of Python values, in chunks of rows. The records are assembled from
+    whole columns of values, which is much faster than ``df.to_dict(orient="records")``.
+    """
+    keys = list(df.columns)
+    for start in range(0, len(df), WRITE_CHUNK_ROWS):
+        chunk = df.iloc[start : start + WRITE_CHUNK_ROWS]
+        columns = [_column_values(chunk.iloc[:, i]) for i in range(len(keys))]
+        if not keys:
+            yield [{} for _ in range(len(chunk))]
+            continue
+        yield [dict(zip(keys, row, strict=True)) for row in zip(*columns, strict=True)]
@@ -13,16 +13,19 @@ from pandas import __version__ as PD_VERSION_STR
 from tableconv.__version__ import __version__
 from tableconv.adapters.df import adapters, read_adapters, write_adapters
 from tableconv.adapters.df.base import NoConfigurationOptionsAvailable
+from tableconv.cache import clear_cache, get_cache_stats
 from tableconv.core import (
-    dump_multitable_to_url,
-    load_multitable_from_url,
+    DEFAULT_STREAM_BATCH_SIZE,
+    convert_multitable,
+    convert_via_duckdb_copy,
     load_url,
     parse_source_url,
     resolve_query_arg,
-    validate_coercion_schema,
 )
 from tableconv.exceptions import DataError, InvalidQueryError, InvalidURLError
+from tableconv.in_memory_query import reset_duckdb_session
 from tableconv.interactive import os_open, run_interactive_shell
+from tableconv.schema_coercion import validate_coercion_schema
 
 logger = logging.getLogger(__name__)
 
@@ -202,7 +205,8 @@ def main(argv=None):
         ),
         exit_on_error=False,
     )
-    parser.add_argument("SOURCE_URL", type=str, help="Specify the data source URL.")
+    # (Optional only for the sake of --cache-stats and --cache-clear)
+    parser.add_argument("SOURCE_URL", type=str, nargs="?", help="Specify the data source URL.")
     parser.add_argument(
         "-q",
         "-Q",
@@ -241,6 +245,14 @@ def main(argv=None):
     parser.add_argument(
         "--autocache", "--cache", action="store_true", help="Cache network data, and reuse cached data."
     )
+    parser.add_argument(
+        "--cache-ttl",
+        dest="cache_ttl",
+        type=int,
+        default=None,
+        help="With --autocache, reuse cached data of sources that cannot be revalidated (e.g. APIs) for at most this "
+        "many seconds.",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -302,11 +314,33 @@ def main(argv=None):
         "multi-tab spreadsheet, or an actual RDBMS (WARNING: This is an experimental mode, very rough, details "
         "undocumented)",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of tables to convert in parallel, in --multitable mode. (default: 1)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Convert the data in batches rather than loading the whole table into memory at once, to bound memory "
+        "usage for huge tables. Only some formats support streaming, others fall back to loading everything. "
+        "(WARNING: experimental feature)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        dest="batch_size",
+        type=int,
+        default=DEFAULT_STREAM_BATCH_SIZE,
+        help=f"Number of records per batch, in --stream mode. (default: {DEFAULT_STREAM_BATCH_SIZE})",
+    )
+    parser.add_argument("--cache-stats", action="store_true", help="Show --autocache cache usage, and exit.")
+    parser.add_argument("--cache-clear", action="store_true", help="Delete all --autocache cached data, and exit.")
     if argv and argv[0] in ("configure", "--configure"):
         # This is a hidden feature because it is very incomplete right now.
         run_configuration_mode(argv)
         sys.exit(0)
-
     try:
         args = parser.parse_args(argv)
         if args.quiet and args.verbose:
@@ -317,6 +351,14 @@ def main(argv=None):
             raise argparse.ArgumentError(
                 None, "Options --query and --interactive are incompatible, cannot specify both at once."
             )
+        if args.cache_stats or args.cache_clear:
+            if args.cache_clear:
+                clear_cache()
+            if args.cache_stats:
+                print(get_cache_stats())
+            sys.exit(0)
+        if args.SOURCE_URL is None:
+            raise argparse.ArgumentError(None, "the following arguments are required: SOURCE_URL")
         if not args.SOURCE_URL:
             raise argparse.ArgumentError(None, "SOURCE_URL empty")
     except argparse.ArgumentError as exc:
@@ -359,24 +401,31 @@ def main(argv=None):
 
         if args.multitable:
             # Crazy experimental feature. Undocumented. Low Quality.
-            df_multi_table = load_multitable_from_url(args.SOURCE_URL)
-            output = dump_multitable_to_url(df_multi_table, dest)
+            output = convert_multitable(args.SOURCE_URL, dest, jobs=args.jobs)
         else:
-            # Load source
-            table = load_url(
-                url=args.SOURCE_URL,
-                query=args.source_query,
-                filter_sql=args.intermediate_filter_sql,
-                schema_coercion=schema_coercion,
-                restrict_schema=args.restrict_schema,
-                autocache=args.autocache,
-            )
-            if args.debug_shell:
-                df = table.as_pandas_df()  # noqa: F841
-                breakpoint()
+            output = None
+            if not schema_coercion and not args.debug_shell and not args.autocache:
+                # Fast path: convert directly from file to file via DuckDB, without loading the data into pandas.
+                output = convert_via_duckdb_copy(args.SOURCE_URL, dest, args.source_query, args.intermediate_filter_sql)
+            if output is None:
+                # Load source
+                table = load_url(
+                    url=args.SOURCE_URL,
+                    query=args.source_query,
+                    filter_sql=args.intermediate_filter_sql,
+                    schema_coercion=schema_coercion,
+                    restrict_schema=args.restrict_schema,
+                    autocache=args.autocache,
+                    cache_ttl=args.cache_ttl,
+                    stream=args.stream,
+                    batch_size=args.batch_size,
+                )
+                if args.debug_shell:
+                    df = table.as_pandas_df()  # noqa: F841
+                    breakpoint()
 
-            # Dump to destination
-            output = table.dump_to_url(url=dest)
+                # Dump to destination
+                output = table.dump_to_url(url=dest)
     except (DataError, InvalidQueryError, InvalidURLError) as exc:
         abort_with_usage_error(exc)
 
@@ -404,6 +453,10 @@ def main_wrapper(argv):
         if exc.stderr and exc.stderr.strip():
             print(exc.stderr.strip())
         raise
+    finally:
+        # When running in the daemon, the process persists across invocations. Discard this invocation's DuckDB session,
+        # so that neither its data nor anything its queries created (tables, macros, settings) leak into the next one.
+        reset_duckdb_session()
 
 
 if __name__ == "__main__":
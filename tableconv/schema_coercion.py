@@ -0,0 +1,218 @@
+"""
+Schema coercion (``--coerce-schema``): converting columns into the types given by a schema, e.g. ``{id: int}``.
+
+Every type is coerced by vectorized pandas operations over the whole column (``pd.to_numeric``, ``pd.to_datetime``,
+etc), rather than per-row Python calls. Values that cannot be coerced are collected and reported per column.
+"""
+
+import decimal
+from collections.abc import Callable
+
+import pandas as pd
+
+from tableconv.exceptions import SchemaCoercionError
+
+# Number of example invalid values shown in error messages, per column.
+MAX_REPORTED_INVALID_VALUES = 3
+
+# The range of the "int" type. (Values outside of it are reported as invalid, same as non-integers)
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+
+# Times without a date, e.g. "12:00" or "10:30:00.5 PM". (Which pd.to_datetime would otherwise give today's date)
+TIME_ONLY_PATTERN = r"\d{1,2}:\d{2}(:\d{2}(\.\d+)?)?\s*([aApP]\.?[mM]\.?)?\s*((?i:z|utc|gmt)|[+-]\d{2}(:?\d{2})?)?"
+
+TRUE_STRINGS = {"true", "t", "yes", "y", "1"}
+FALSE_STRINGS = {"false", "f", "no", "n", "0"}
+
+
+def _normalize(series: pd.Series) -> pd.Series:
+    """Strip whitespace from strings, and convert empty strings into nulls."""
+    if series.dtype != object and not isinstance(series.dtype, pd.StringDtype):
+        return series
+    stripped = series.str.strip()
+    # (.str returns NaN for non-string values. Keep those as they were.)
+    normalized = stripped.where(stripped.notna(), series)
+    return normalized.mask(normalized.eq("") | normalized.isna(), None).astype(object)
+
+
+def _arrow_cast(series: pd.Series, arrow_type_name: str) -> pd.Series | None:
+    """
+    Fast path: cast a column of strings via Arrow's cast kernels, which are much faster than pd.to_numeric on strings.
+    Returns None if pyarrow is not installed, if the column is not entirely strings, or if any value fails to cast.
+    (The pandas-based path is then used instead, which also finds the invalid values to report)
+    """
+    if series.dtype != object and not isinstance(series.dtype, pd.StringDtype):
+        return None
+    try:
+        import pyarrow
+        import pyarrow.compute
+    except ImportError:
+        return None
+    arrow_type = {
+        "int": pyarrow.int64(),
+        "float": pyarrow.float64(),
+        "timestamptz": pyarrow.timestamp("ns", tz="UTC"),
+    }[arrow_type_name]
+    try:
+        array = pyarrow.array(series, type=pyarrow.string(), from_pandas=True)
+        array = pyarrow.compute.utf8_trim_whitespace(array)
+        array = pyarrow.compute.if_else(pyarrow.compute.equal(array, ""), None, array)
+        array = pyarrow.compute.cast(array, arrow_type)
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, pyarrow.ArrowNotImplementedError):
+        return None
+    if arrow_type_name == "int":
+        return pd.Series(array.to_pandas(types_mapper={arrow_type: pd.Int64Dtype()}.get), index=series.index)
+    return pd.Series(array.to_pandas(), index=series.index)
+
+
+def _no_invalid_values(series: pd.Series) -> pd.Series:
+    return pd.Series(False, index=series.index)
+
+
+def _coerce_str(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+    return series.astype("string"), _no_invalid_values(series)
+
+
+def _coerce_float(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+    result = _arrow_cast(series, "float")
+    if result is not None:
+        return result, _no_invalid_values(series)
+    values = _normalize(series)
+    result = pd.to_numeric(values, errors="coerce")
+    if result.dtype == bool:
+        result = result.astype(float)
+    return result.astype(float), result.isna() & values.notna()
+
+
+def _coerce_int(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+    result = _arrow_cast(series, "int")
+    if result is not None:
+        return result, _no_invalid_values(series)
+    values = _normalize(series)
+    if pd.api.types.is_signed_integer_dtype(values.dtype):
+        return values.astype("Int64"), _no_invalid_values(series)
+    result = pd.to_numeric(values, errors="coerce")
+    invalid = result.isna() & values.notna()
+    if pd.api.types.is_float_dtype(result.dtype):
+        # Integral floats (e.g. 1.0, or "1.0") are accepted, but not values like 1.5.
+        fractional = result.notna() & (result % 1 != 0)
+        invalid |= fractional
+        result = result.mask(fractional)
+    if not pd.api.types.is_bool_dtype(result.dtype):
+        # (e.g. uint64s, or huge floats. Note INT64_MAX is not exactly representable as a float, unlike 2**63)
+        out_of_range = result.notna() & ((result < INT64_MIN) | (result >= INT64_MAX + 1))
+        if out_of_range.any():
+            return pd.Series(pd.NA, index=series.index, dtype="Int64"), invalid | out_of_range
+    return result.astype("Int64"), invalid
+
+
+def _coerce_bool(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+    values = _normalize(series)
+    if pd.api.types.is_bool_dtype(values.dtype):
+        return values.astype("boolean"), _no_invalid_values(series)
+    as_strings = values.astype("string").str.lower()
+    result = pd.Series(pd.NA, index=series.index, dtype="boolean")
+    result[as_strings.isin(TRUE_STRINGS).fillna(False)] = True
+    result[as_strings.isin(FALSE_STRINGS).fillna(False)] = False
+    # (Python bools stringify as "True"/"False", and numbers like 1.0 as "1.0")
+    numbers = pd.to_numeric(values, errors="coerce")
+    is_number = result.isna() & numbers.isin([0, 1])
+    result[is_number] = numbers[is_number].astype(bool)
+    return result, result.isna() & values.notna()
+
+
+def _coerce_decimal(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+    values = _normalize(series)
+    # Check validity vectorized, then only construct a Decimal for each (valid) value.
+    numbers = pd.to_numeric(values, errors="coerce")
+    invalid = numbers.isna() & values.notna()
+    valid = values.notna() & ~invalid
+    result = pd.Series(None, index=series.index, dtype=object)
+    result[valid] = values[valid].astype(str).map(decimal.Decimal)
+    return result, invalid
+
+
+def _to_utc_datetime(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        return series.dt.tz_convert("UTC"), _no_invalid_values(series)
+    if pd.api.types.is_datetime64_dtype(series.dtype):
+        return series.dt.tz_localize("UTC"), _no_invalid_values(series)
+    result = _arrow_cast(series, "timestamptz")
+    if result is not None:
+        return result, _no_invalid_values(series)
+    values = _normalize(series)
+    # Strings without a UTC offset are assumed to be in UTC.
+    result = pd.to_datetime(values, errors="coerce", utc=True, format="mixed")
+    if values.dtype == object and values.notna().any():
+        time_only = values.str.fullmatch(TIME_ONLY_PATTERN).eq(True)
+        result = result.mask(time_only)
+    return result, result.isna() & values.notna()
+
+
+def _coerce_timestamp(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+    result, invalid = _to_utc_datetime(series)
+    return result.dt.tz_localize(None), invalid
+
+
+def _coerce_date(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+    result, invalid = _coerce_timestamp(series)
+    dates = pd.Series(None, index=series.index, dtype=object)
+    dates[result.notna()] = result[result.notna()].dt.date
+    return dates, invalid
+
+
+COERCIONS: dict[str, Callable[[pd.Series], tuple[pd.Series, pd.Series]]] = {
+    "str": _coerce_str,
+    "int": _coerce_int,
+    "float": _coerce_float,
+    "bool": _coerce_bool,
+    "decimal": _coerce_decimal,
+    # Timezone-aware, in UTC. (Values without a UTC offset are assumed to be in UTC)
+    "datetime": _to_utc_datetime,
+    "timestamptz": _to_utc_datetime,
+    # Timezone-naive, in UTC. (Values with a UTC offset are converted to UTC)
+    "timestamp": _coerce_timestamp,
+    # (Values with a UTC offset are converted to UTC first)
+    "date": _coerce_date,
+}
+
+
+def validate_coercion_schema(schema: dict[str, str]) -> None:
+    unsupported_schema_types = set(schema.values()) - set(COERCIONS)
+    if unsupported_schema_types:
+        raise ValueError(
+            f"Unsupported schema type(s): {', '.join(str(item) for item in unsupported_schema_types)}. "
+            + f"Please specify one of the supported types: {', '.join(COERCIONS)}."
+        )
+
+
+def coerce_schema(df: pd.DataFrame, schema: dict[str, str], restrict_schema: bool) -> pd.DataFrame:
+    validate_coercion_schema(schema)
+
+    # Add missing columns
+    for col in schema:
+        if col not in df.columns:
+            df[col] = None
+
+    # Coerce the type of pre-existing columns
+    errors = []
+    for col, col_type in schema.items():
+        try:
+            coerced, invalid = COERCIONS[col_type](df[col])
+        except (ValueError, TypeError, OverflowError) as exc:
+            errors.append(f'"{col}" to {col_type}: {exc.args[0] if exc.args else exc}')
+            continue
+        if invalid.any():
+            examples = ", ".join(repr(value) for value in df[col][invalid].head(MAX_REPORTED_INVALID_VALUES))
+            errors.append(f'"{col}" to {col_type}: {int(invalid.sum())} invalid value(s) (e.g. {examples})')
+            continue
+        df[col] = coerced
+    if errors:
+        raise SchemaCoercionError("Error in coercing schema: Error while coercing " + "; ".join(errors))
+
+    if restrict_schema:
+        # Drop all other columns
+        df = df[list(schema.keys())]
+
+    return df
@@ -0,0 +1,33 @@
+import json
+import os
+import time
+
+import pandas as pd
+
+from tableconv.cache import clear_cache, get_cache_key, list_entries, load_from_cache, save_to_cache
+
+URL = "postgres://example.com/db"
+
+
+def test_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr("tableconv.cache.CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr("tableconv.cache.ENTRIES_DIR", str(tmp_path / "cache" / "entries"))
+    df = pd.DataFrame({"id": [1, 2], "tags": [["a"], ["b", "c"]], "name": ["x", None]})
+    save_to_cache("RDBMSAdapter", URL, "SELECT 1", df)
+    pd.testing.assert_frame_equal(load_from_cache("RDBMSAdapter", URL, "SELECT 1"), df)
+    assert load_from_cache("RDBMSAdapter", URL, "SELECT 2") is None
+
+    # Eviction uses the TTL the data is cached with
+    save_to_cache("RDBMSAdapter", URL, "SELECT 2", df)
+    metadata_path = tmp_path / "cache" / "entries" / f"{get_cache_key('RDBMSAdapter', URL, 'SELECT 2')}.json"
+    metadata_path.write_text(json.dumps({**json.loads(metadata_path.read_text()), "created_at": time.time() - 100}))
+    save_to_cache("RDBMSAdapter", URL, "SELECT 3", df, ttl=50)
+    assert len(list_entries()) == 2
+    assert load_from_cache("RDBMSAdapter", URL, "SELECT 2") is None
+
+    # Clearing the cache leaves everything else in the tableconv cache directory alone
+    (tmp_path / "cache" / "other").write_text("")
+    clear_cache()
+    assert list_entries() == []
+    assert load_from_cache("RDBMSAdapter", URL, "SELECT 1") is None
+    assert os.listdir(tmp_path / "cache") == ["other"]
@@ -2,6 +2,7 @@ import ast
 import copy
 import filecmp
 import http.server
+import importlib.util
 import json
 import logging
 import re
@@ -13,6 +14,8 @@ import subprocess
 import threading
 import time
 
+import numpy as np
+import pandas as pd
 import pytest
 
 from tests.conftest import FIXTURES_DIR
@@ -105,6 +108,27 @@ def test_interactive(tmp_path):
     # assert re.match(r'/.{6}\[\.\.\.\]teractive0/test\.tsv=> ', stdout_lines.pop(0))
 
 
+def test_interactive_reload(tmp_path):
+    path = tmp_path / "test.csv"
+    path.write_text("a,b\n1,2\n3,4\n")
+    cmd = ["tableconv", str(path), "-i", "-o", "csv:-"]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    stdout, stderr = proc.communicate("SELECT max(a) AS s FROM data\n\\reload\nSELECT count(*) AS c\n", timeout=10)
+    assert "(Reloaded 2 rows)" in stderr
+    assert "s\n3\n" in stdout
+    assert "c\n2\n" in stdout
+
+
+def test_interactive_empty_filter(tmp_path):
+    path = tmp_path / "test.csv"
+    path.write_text("a,b\n1,2\n3,4\n")
+    cmd = ["tableconv", str(path), "-i", "-o", "csv:-", "--filter", "SELECT * FROM data WHERE a > 10"]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    stdout, stderr = proc.communicate("SELECT a, b FROM data\n", timeout=10)
+    assert "(0 rows)" in stderr
+    assert "a,b" not in stdout
+
+
 # @pytest.mark.skip('Broken')
 # def test_interactive_multi_input(tmp_path):
 #     proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
@@ -214,6 +238,89 @@ def test_no_data_sqlite3(tmp_path, invoke_cli):
     assert "empty" in stderr.lower()
 
 
+def test_sqlite_filter_pushdown(tmp_path, invoke_cli):
+    path = f"{tmp_path}/test.sqlite3"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INT, Email TEXT, score REAL)")
+    conn.executemany("INSERT INTO users VALUES (?, ?, ?)", [(i, f"{i}@example.com", i / 2) for i in range(10)])
+    conn.commit()
+    conn.close()
+
+    # Fully pushed down
+    stdout = invoke_cli(
+        [
+            f"{path}?table=users",
+            "-F",
+            "SELECT id, email AS e FROM data WHERE score >= 2 AND id != 5 LIMIT 2",
+            "-o",
+            "csv:-",
+        ]
+    )
+    assert stdout == "id,e\n4,4@example.com\n6,6@example.com\n"
+    # Partially pushed down
+    stdout = invoke_cli(
+        [f"{path}?table=users", "-F", "SELECT count(*) AS n FROM data WHERE id < 5 AND id % 2 = 0", "-o", "csv:-"]
+    )
+    assert stdout == "n\n3\n"
+    # Not pushed down: the subqueries need to see every row
+    stdout = invoke_cli(
+        [
+            f"{path}?table=users",
+            "-F",
+            "SELECT id, (SELECT count(*) FROM data) AS total FROM data"
+            " WHERE score >= 3 AND id > (SELECT avg(id) FROM data)",
+            "-o",
+            "csv:-",
+        ]
+    )
+    assert stdout == "id,total\n6,10\n7,10\n8,10\n9,10\n"
+
+    # String comparisons aren't pushed down, as the database may collate strings differently than DuckDB does
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE names (name TEXT COLLATE NOCASE)")
+    conn.executemany("INSERT INTO names VALUES (?)", [("a",), ("A",), ("B",)])
+    conn.commit()
+    conn.close()
+    for filter_sql, expected in [
+        ("SELECT * FROM data WHERE name = 'a'", "name\na\n"),
+        ("SELECT * FROM data WHERE name < 'a' LIMIT 5", "name\nA\nB\n"),
+    ]:
+        assert invoke_cli([f"{path}?table=names", "-F", filter_sql, "-o", "csv:-"]) == expected
+
+
+def test_sqlite_stream_errors(tmp_path, invoke_cli, monkeypatch):
+    import sqlalchemy.exc
+
+    path = f"{tmp_path}/test.sqlite3"
+    invoke_cli(["csv:-", "-o", f"{path}?table=test"], stdin=EXAMPLE_CSV_RAW)
+
+    def read_sql(*args, **kwargs):
+        # (e.g. a database that only fails part way through returning the results)
+        yield pd.DataFrame({"id": [1]})
+        raise sqlalchemy.exc.ProgrammingError("SELECT * FROM test", None, Exception("division by zero"))
+
+    monkeypatch.setattr("pandas.read_sql", read_sql)
+    _, stderr = invoke_cli(
+        [path, "-q", "SELECT * FROM test", "-o", "jsonl:-", "--stream"],
+        assert_nonzero_exit_code=True,
+        capture_stderr=True,
+    )
+    assert "division by zero" in stderr
+    assert "InvalidQueryError" in stderr
+
+
+def test_query_side_effects_do_not_persist(invoke_cli):
+    query = "CREATE TABLE leaked AS SELECT 1 AS x; SET VARIABLE leaked_var = 2; SELECT * FROM data"
+    assert invoke_cli(["csv:-", "-q", query, "-o", "csv:-"], stdin="a\n1\n") == "a\n1\n"
+    query = "SELECT * FROM data, leaked"
+    _, stderr = invoke_cli(["csv:-", "-q", query], stdin="a\n1\n", assert_nonzero_exit_code=True, capture_stderr=True)
+    assert "leaked does not exist" in stderr
+    stdout = invoke_cli(
+        ["csv:-", "-q", "SELECT getvariable('leaked_var') AS v FROM data", "-o", "jsonl:-"], stdin="a\n1\n"
+    )
+    assert stdout == '{"v":null}\n'
+
+
 def test_full_roundtrip_file_adapters(tmp_path, invoke_cli):
     """Go from json -> tsv -> csv -> python -> yaml -> jsonl -> parquet -> xlsx -> json and verify the json at the end
     is semantically identical to the json we started with."""
@@ -265,6 +372,234 @@ def test_sqlite_roundtrip(tmp_path, invoke_cli):
     assert stdout == EXAMPLE_CSV_RAW + "\n"
 
 
+def test_json_incremental_parsing(tmp_path, invoke_cli, monkeypatch):
+    monkeypatch.setattr("tableconv.json_data_model.CHUNK_SIZE", 7)
+    records = [{"id": 1, "user": {"name": "a", "geo": {"lat": 1.5}}}, {"user": {"name": "b"}, "id": 22, "tags": [1, 2]}]
+    (tmp_path / "test.json").write_text(json.dumps(records, indent=2))
+    (tmp_path / "test.jsonl").write_text("\n".join(json.dumps(record) for record in records) + "\n")
+    for scheme in ("json", "jsonl"):
+        stdout = invoke_cli([f"{tmp_path}/test.{scheme}", "-o", "csv:-"])
+        assert stdout == 'id,user.name,user.geo.lat,tags\n1,a,1.5,\n22,b,,"[1, 2]"\n'
+
+    (tmp_path / "bad.jsonl").write_text('{"a": 1}\n\n{"a": 2,}\n')
+    with pytest.raises(json.JSONDecodeError, match="line 3 column 9"):
+        invoke_cli([f"{tmp_path}/bad.jsonl", "-o", "csv:-"])
+    (tmp_path / "bad.json").write_text('[\n  {"a": 1},\n  {"a": 2}\n  {"a": 3}\n]')
+    with pytest.raises(json.JSONDecodeError, match="Expecting ',' delimiter: line 4 column 3"):
+        invoke_cli([f"{tmp_path}/bad.json", "-o", "csv:-"])
+
+
+def test_json_array_append(tmp_path, invoke_cli):
+    (tmp_path / "test.json").write_text('[\n  {"id": 1}\n]\n')
+    invoke_cli(["json:-", "-o", f"{tmp_path}/test.json?if_exists=append"], stdin='[{"id": 2, "a.b": 3}]')
+    invoke_cli(["json:-", "-o", f"{tmp_path}/test.json?if_exists=append&unnest=true"], stdin='[{"id": 3, "a.b": 4}]')
+    invoke_cli(
+        ["jsonl:-", "-o", f"{tmp_path}/test.json?if_exists=append", "--stream", "--batch-size", "1"],
+        stdin='{"id": 4}\n{"id": 5}\n',
+    )
+    assert (tmp_path / "test.json").read_text().endswith("]\n")
+    assert json.loads((tmp_path / "test.json").read_text()) == [
+        {"id": 1},
+        {"id": 2, "a.b": 3},
+        {"id": 3, "a": {"b": 4}},
+        {"id": 4},
+        {"id": 5},
+    ]
+
+    (tmp_path / "empty.json").write_text("[]")
+    invoke_cli(["json:-", "-o", f"{tmp_path}/empty.json?if_exists=append"], stdin='[{"id": 1}]')
+    assert json.loads((tmp_path / "empty.json").read_text()) == [{"id": 1}]
+
+    (tmp_path / "object.json").write_text('{"id": 1}')
+    _, stderr = invoke_cli(
+        ["json:-", "-o", f"{tmp_path}/object.json?if_exists=append"],
+        stdin='[{"id": 2}]',
+        assert_nonzero_exit_code=True,
+        capture_stderr=True,
+    )
+    assert "AppendSchemeConflictError" in stderr
+
+
+def test_msgpack_streaming(tmp_path, invoke_cli):
+    import msgpack
+
+    invoke_cli(["json:-", "-o", f"{tmp_path}/test.msgpack"], stdin='[{"id": 1, "user": {"name": "a"}}]')
+    invoke_cli(["json:-", "-o", f"{tmp_path}/test.msgpack?if_exists=append"], stdin='[{"id": 2}, {"id": 3}]')
+    with open(tmp_path / "test.msgpack", "ab") as f:
+        # (A stream of records can also be individual maps, rather than arrays of maps)
+        f.write(msgpack.packb({"id": 4, "user.name": "d"}))
+    expected = "id,user.name\n1,a\n2,\n3,\n4,d\n"
+    assert invoke_cli([f"{tmp_path}/test.msgpack", "-o", "csv:-"]) == expected
+    assert invoke_cli([f"{tmp_path}/test.msgpack", "-o", "csv:-", "--stream", "--batch-size", "2"]) == expected
+
+    _, stderr = invoke_cli(
+        ["json:-", "-o", f"{tmp_path}/test.msgpack?if_exists=fail"],
+        stdin='[{"id": 5}]',
+        assert_nonzero_exit_code=True,
+        capture_stderr=True,
+    )
+    assert "TableAlreadyExistsError" in stderr
+
+
+def test_yaml_multi_document_stream(tmp_path, invoke_cli):
+    (tmp_path / "test.yaml").write_text(
+        "kind: Pod\nmeta: {name: a}\n---\nkind: Service\n---\n- kind: Node\n  ready: true\n"
+    )
+    assert (
+        invoke_cli([f"{tmp_path}/test.yaml", "-o", "csv:-"]) == "kind,meta.name,ready\nPod,a,\nService,,\nNode,,True\n"
+    )
+
+    invoke_cli([f"{tmp_path}/test.yaml", "-o", f"{tmp_path}/out.yaml"])
+    assert (tmp_path / "out.yaml").read_text() == (
+        "-   kind: Pod\n    meta.name: a\n    ready: null\n"
+        "-   kind: Service\n    meta.name: null\n    ready: null\n"
+        "-   kind: Node\n    meta.name: null\n    ready: true\n"
+    )
+
+
+def test_avro_codecs_and_timestamps(tmp_path, invoke_cli):
+    query = "SELECT id, name, CAST(date AS TIMESTAMP) AS time FROM data"
+    # (snappy needs the optional cramjam package)
+    codecs = ("null", "deflate", "snappy") if importlib.util.find_spec("cramjam") else ("null", "deflate")
+    for codec in codecs:
+        invoke_cli(
+            ["json:-", "-q", query, "-o", f"{tmp_path}/{codec}.avro?codec={codec}&sync_interval=10"],
+            stdin='[{"id": 1, "name": "a", "date": "2026-01-01T12:00:00"}, {"id": 2, "name": "b", "date": null}]',
+        )
+    stdout = invoke_cli([f"{tmp_path}/*.avro", "-o", "jsonl:-"])
+    expected = '{"id":1,"name":"a","time":"2026-01-01T12:00:00.000Z"}\n{"id":2,"name":"b","time":null}\n'
+    assert stdout == len(codecs) * expected
+
+
+def test_avro_unavailable_codec(tmp_path, invoke_cli):
+    if importlib.util.find_spec("lz4"):
+        pytest.skip("lz4 is installed")
+    (tmp_path / "test.avro").write_bytes(b"unchanged")
+    _, stderr = invoke_cli(
+        ["json:-", "-o", f"{tmp_path}/test.avro?codec=lz4"],
+        stdin='[{"id": 1}]',
+        assert_nonzero_exit_code=True,
+        capture_stderr=True,
+    )
+    assert "InvalidParamsError" in stderr
+    assert "traceback" not in stderr.lower()
+    assert (tmp_path / "test.avro").read_bytes() == b"unchanged"
+
+
+def test_parquet_columns_row_groups_and_pushdown(tmp_path, invoke_cli):
+    import pyarrow
+    import pyarrow.parquet
+
+    df = pd.DataFrame({"a": range(100), "b": [f"v{i}" for i in range(100)], "c": np.arange(100) / 2})
+    path = f"{tmp_path}/test.parquet"
+    pyarrow.parquet.write_table(pyarrow.Table.from_pandas(df, preserve_index=False), path, row_group_size=10)
+
+    stdout = invoke_cli([f"{path}?columns=b,a&row_groups=1,8-9", "-q", "SELECT * FROM data LIMIT 2", "-o", "csv:-"])
+    assert stdout == "b,a\nv10,10\nv11,11\n"
+    stdout = invoke_cli([f"{path}?row_groups=9", "-o", "csv:-", "--stream", "--batch-size", "4"])
+    assert stdout.splitlines()[1:] == [f"{i},v{i},{i / 2}" for i in range(90, 100)]
+    stdout = invoke_cli([path, "-F", "SELECT b FROM data WHERE a BETWEEN 41 AND 42", "-o", "csv:-"])
+    assert stdout == "b\nv41\nv42\n"
+
+    # Subqueries need every row group, even the ones the WHERE conditions rule out.
+    query = (
+        "SELECT count(*) AS n, (SELECT count(*) FROM data) AS total FROM data"
+        " WHERE a >= 90 AND c > (SELECT avg(c) FROM data)"
+    )
+    for url in (f"{path}?columns=a,c", path):
+        assert invoke_cli([url, "-q", query, "-o", "csv:-"]) == "n,total\n10,100\n"
+
+
+def test_parquet_partitioned_dataset(tmp_path, invoke_cli):
+    stdin = "\n".join(json.dumps({"id": i, "date": f"2026-01-0{i % 2 + 1}", "region": "eu"}) for i in range(10))
+    dest = f"parquet://{tmp_path}/out?partition_by=date,region&max_rows_per_file=3&row_group_size=2&compression=zstd"
+    invoke_cli(["jsonl:-", "-o", dest], stdin=stdin)
+    assert sorted(path.relative_to(tmp_path / "out").as_posix() for path in (tmp_path / "out").rglob("*.parquet")) == [
+        f"date=2026-01-0{day}/region=eu/part-{i}.parquet" for day in (1, 2) for i in range(2)
+    ]
+    query = "SELECT date, count(*) AS n, sum(id) AS s FROM data GROUP BY date ORDER BY date"
+    stdout = invoke_cli([f"parquet://{tmp_path}/out/**/*.parquet", "-q", query, "-o", "csv:-"])
+    assert stdout == "date,n,s\n2026-01-01,5,20\n2026-01-02,5,25\n"
+
+    _, stderr = invoke_cli(["jsonl:-", "-o", dest], stdin=stdin, assert_nonzero_exit_code=True, capture_stderr=True)
+    assert "TableAlreadyExistsError" in stderr
+    invoke_cli(["jsonl:-", "-o", f"{dest}&if_exists=append", "--stream", "--batch-size", "4"], stdin=stdin)
+    stdout = invoke_cli([f"parquet://{tmp_path}/out/**/*.parquet", "-q", query, "-o", "csv:-"])
+    assert stdout == "date,n,s\n2026-01-01,10,40\n2026-01-02,10,50\n"
+
+
+def test_csv_arrow_engine(tmp_path, invoke_cli):
+    (tmp_path / "test.csv").write_text(EXAMPLE_CSV_RAW)
+    stdout = invoke_cli([f"{tmp_path}/test.csv?engine=arrow", "-o", "json:-"])
+    assert json.loads(stdout) == json.loads(EXAMPLE_JSON_RAW)
+    stdout = invoke_cli([f"{tmp_path}/test.csv?engine=arrow&header=None&skiprows=1&nrows=2", "-o", "tsv:-"])
+    assert stdout == "0\t1\t2\n1\tGeorge\t2023\n2\tSteven\t1950\n"
+
+    invoke_cli(["json:-", "-o", f"{tmp_path}/out.tsv?engine=arrow"], stdin=EXAMPLE_JSON_RAW)
+    stdout = invoke_cli([f"{tmp_path}/out.tsv", "-o", "tsv:-"])
+    assert stdout == EXAMPLE_TSV_RAW + "\n"
+
+
+def test_glob_and_directory_sources(tmp_path, invoke_cli):
+    (tmp_path / "2026-01.csv").write_text("a,b\n1,x\n")
+    (tmp_path / "2026-02.csv").write_text("a,c\n2,y\n")
+    (tmp_path / "2025-12.csv").write_text("a\n0\n")
+
+    stdout = invoke_cli([f"csv://{tmp_path}/2026-*.csv", "-o", "csv:-"])
+    assert stdout == "a,b,c\n1,x,\n2,,y\n"
+    stdout = invoke_cli([f"csv://{tmp_path}?source_file=true", "-q", "SELECT a, _source_file FROM data", "-o", "csv:-"])
+    assert stdout == f"a,_source_file\n0,{tmp_path}/2025-12.csv\n1,{tmp_path}/2026-01.csv\n2,{tmp_path}/2026-02.csv\n"
+    stdout = invoke_cli([f"csv://{tmp_path}?source_file=true", "-o", "jsonl:-"])
+    assert json.loads(stdout.splitlines()[-1]) == {
+        "a": 2,
+        "b": None,
+        "c": "y",
+        "_source_file": f"{tmp_path}/2026-02.csv",
+    }
+
+    _, stderr = invoke_cli(
+        [f"csv://{tmp_path}/2027-*.csv", "-o", "csv:-"], capture_stderr=True, assert_nonzero_exit_code=True
+    )
+    assert "No files found" in stderr
+
+
+def test_parquet_dataset_directory_roundtrip(tmp_path, invoke_cli):
+    records = [{"id": 1, "date": "2026-01-01", "n": 1}, {"id": 2, "date": "2026-01-02", "n": 2}]
+    records.append({"id": 3, "date": "2026-01-01", "n": 1})
+    stdin = "".join(json.dumps(record) + "\n" for record in records)
+    invoke_cli(["jsonl:-", "-o", f"parquet://{tmp_path}/ds?partition_by=date,n"], stdin=stdin)
+    (tmp_path / "ds" / "_SUCCESS").write_text("")
+
+    # (Partition columns go last)
+    expected = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+    query = "SELECT * FROM data ORDER BY id"
+    assert invoke_cli([f"parquet://{tmp_path}/ds", "-q", query, "-o", "jsonl:-"]) == expected
+    assert invoke_cli([f"parquet://{tmp_path}/ds?columns=id,n", "-q", query, "-o", "jsonl:-"]) == (
+        '{"id":1,"n":1}\n{"id":2,"n":2}\n{"id":3,"n":1}\n'
+    )
+    # (Partition values are typed the same as pyarrow types them, e.g. dates are left as strings)
+    query = "SELECT typeof(date) AS date, typeof(n) AS n FROM data LIMIT 1"
+    assert invoke_cli([f"parquet://{tmp_path}/ds", "-q", query, "-o", "csv:-"]) == "date,n\nVARCHAR,INTEGER\n"
+    stdout = invoke_cli([f"parquet://{tmp_path}/ds", "-o", "jsonl:-"])
+    assert sorted(stdout.splitlines()) == expected.splitlines()
+    stdout = invoke_cli([f"parquet://{tmp_path}/ds", "-o", "jsonl:-", "--stream"])
+    assert sorted(stdout.splitlines()) == expected.splitlines()
+
+
+def test_multitable_jobs(tmp_path, invoke_cli):
+    (tmp_path / "src").mkdir()
+    for name in ("a", "b", "c"):
+        (tmp_path / "src" / f"{name}.csv").write_text(EXAMPLE_CSV_RAW)
+
+    # Files to files (worker processes), then files to sqlite (worker threads, but dumped one table at a time)
+    invoke_cli([f"csv://{tmp_path}/src", "-o", f"json://{tmp_path}/dest", "--multitable", "--jobs", "2"])
+    assert sorted(path.name for path in (tmp_path / "dest").iterdir()) == ["a.json", "b.json", "c.json"]
+    invoke_cli([f"json://{tmp_path}/dest", "-o", f"sqlite://{tmp_path}/db.db", "--multitable", "-j", "2"])
+    for name in ("a", "b", "c"):
+        stdout = invoke_cli([f"sqlite://{tmp_path}/db.db?table={name}", "-o", "csv:-"])
+        assert stdout == EXAMPLE_CSV_RAW + "\n"
+
+
 def test_sqlite_roundtrip_query(tmp_path, invoke_cli):
     invoke_cli(["csv:-", "-o", f"sqlite://{tmp_path}/db.db?table=test"], stdin=EXAMPLE_CSV_RAW)
     stdout = invoke_cli(
@@ -373,3 +708,158 @@ def test_fsspec_html_table_extraction(invoke_cli):
         httpd.shutdown()
         httpd.server_close()
         server_thread.join()
+
+
+@pytest.mark.parametrize("dest_scheme", ["csv", "tsv", "json", "jsonl", "parquet", "sql_values"])
+def test_stream_matches_non_stream(tmp_path, invoke_cli, dest_scheme):
+    invoke_cli([FIXTURES_DIR / "cities.csv", "-o", f"{tmp_path}/expected.{dest_scheme}"])
+    invoke_cli(
+        [FIXTURES_DIR / "cities.csv", "-o", f"{tmp_path}/streamed.{dest_scheme}", "--stream", "--batch-size", "7"]
+    )
+    if dest_scheme == "parquet":
+        expected = invoke_cli([f"{tmp_path}/expected.{dest_scheme}", "-o", "csv:-"])
+        streamed = invoke_cli([f"{tmp_path}/streamed.{dest_scheme}", "-o", "csv:-"])
+        assert streamed == expected
+    else:
+        assert filecmp.cmp(f"{tmp_path}/expected.{dest_scheme}", f"{tmp_path}/streamed.{dest_scheme}", shallow=False)
+
+
+def test_stream_compressed_csv(tmp_path, invoke_cli):
+    invoke_cli(
+        [FIXTURES_DIR / "cities.csv", "-o", f"csv.gz:{tmp_path}/streamed.csv.gz", "--stream", "--batch-size", "7"]
+    )
+    assert invoke_cli([f"{tmp_path}/streamed.csv.gz", "-o", "csv:-"]) == invoke_cli(
+        [FIXTURES_DIR / "cities.csv", "-o", "csv:-"]
+    )
+
+
+def test_cache(tmp_path, invoke_cli, monkeypatch):
+    monkeypatch.setattr("tableconv.cache.CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr("tableconv.cache.ENTRIES_DIR", str(tmp_path / "cache" / "entries"))
+
+    # Local files are revalidated against their mtime
+    with open(tmp_path / "test.csv", "w") as f:
+        f.write("a\n1\n")
+    assert invoke_cli([tmp_path / "test.csv", "--autocache", "-o", "csv:-"]) == "a\n1\n"
+    assert "Entries: 1" in invoke_cli(["--cache-stats"])
+    with open(tmp_path / "test.csv", "w") as f:
+        f.write("a\n22\n")
+    assert invoke_cli([tmp_path / "test.csv", "--autocache", "-o", "csv:-"]) == "a\n22\n"
+
+    # Directories are revalidated against the files they contain
+    (tmp_path / "dir").mkdir()
+    (tmp_path / "dir" / "1.csv").write_text("a\n1\n")
+    assert invoke_cli([f"csv://{tmp_path}/dir", "--autocache", "-o", "csv:-"]) == "a\n1\n"
+    (tmp_path / "dir" / "2.csv").write_text("a\n2\n")
+    assert invoke_cli([f"csv://{tmp_path}/dir", "--autocache", "-o", "csv:-"]) == "a\n1\n2\n"
+
+    # File to file conversions with --autocache go through the cache too (rather than the DuckDB COPY fast path)
+    (tmp_path / "test2.csv").write_text("a\n1\n")
+    invoke_cli([tmp_path / "test2.csv", "--autocache", "-o", f"{tmp_path}/cached.jsonl"])
+    assert "Entries: 3" in invoke_cli(["--cache-stats"])
+    invoke_cli(["-v", "--cache-clear"])
+    assert "Entries: 0" in invoke_cli(["--quiet", "--cache-stats"])
+
+
+def test_file_to_file_conversion_roundtrip(tmp_path, invoke_cli):
+    expected = invoke_cli([FIXTURES_DIR / "cities.csv", "-o", "csv:-"])
+    invoke_cli([FIXTURES_DIR / "cities.csv", "-o", f"{tmp_path}/cities.parquet"])
+    invoke_cli([f"{tmp_path}/cities.parquet", "-o", f"{tmp_path}/cities.jsonl"])
+    invoke_cli([f"{tmp_path}/cities.jsonl", "-o", f"{tmp_path}/cities2.parquet"])
+    invoke_cli([f"{tmp_path}/cities2.parquet", "-o", f"{tmp_path}/cities.csv"])
+    with open(f"{tmp_path}/cities.csv") as f:
+        assert f.read() == expected
+
+    # The destination must be left alone if the conversion fails
+    _, stderr = invoke_cli(
+        [FIXTURES_DIR / "cities.csv", "-o", f"{tmp_path}/cities.jsonl"],
+        assert_nonzero_exit_code=True,
+        capture_stderr=True,
+    )
+    assert "already exists" in stderr
+
+
+def test_stream_jsonl_schema_change(tmp_path, invoke_cli):
+    with open(f"{tmp_path}/test.jsonl", "w") as f:
+        f.write('{"a": 1}\n{"a": 2}\n{"a": 3, "b": 4}\n')
+    _, stderr = invoke_cli(
+        [f"{tmp_path}/test.jsonl", "-o", "csv:-", "--stream", "--batch-size", "2"],
+        assert_nonzero_exit_code=True,
+        capture_stderr=True,
+    )
+    assert "traceback" not in stderr.lower()
+    assert "schema changed mid-stream" in stderr.lower()
+
+
+def test_query_nested_json_file(tmp_path, invoke_cli):
+    with open(f"{tmp_path}/test.json", "w") as f:
+        f.write(
+            '[{"id": 1, "meta": {"date": "2020-01-01", "n": 5}}, {"id": 2, "meta": {"date": "2021-06-01", "n": 7}}]'
+        )
+    stdout = invoke_cli(
+        [f"{tmp_path}/test.json", "-q", 'SELECT id, "meta.date" FROM data WHERE "meta.n" > 6', "-o", "json:-"]
+    )
+    assert json.loads(stdout) == [{"id": 2, "meta.date": "2021-06-01"}]
+
+
+def test_query_nested_arrays(invoke_cli):
+    stdin = '[{"id": 1, "tags": ["a", "b"]}, {"id": 2, "tags": []}, {"id": 3, "tags": ["c"]}]'
+    stdout = invoke_cli(["json:-", "-F", "SELECT * FROM data", "-o", "json:-"], stdin=stdin)
+    assert json.loads(stdout) == json.loads(stdin)
+    stdout = invoke_cli(
+        ["json:-", "-F", "SELECT id, unnest(tags) AS tag, tags[1] AS first FROM data", "-o", "json:-"], stdin=stdin
+    )
+    assert json.loads(stdout) == [
+        {"id": 1, "tag": "a", "first": "a"},
+        {"id": 1, "tag": "b", "first": "a"},
+        {"id": 3, "tag": "c", "first": "c"},
+    ]
+
+
+def test_query_csv_file_matches_stdin(invoke_cli):
+    query = "SELECT City, LatD FROM data WHERE State = 'OH' ORDER BY City"
+    stdout = invoke_cli([FIXTURES_DIR / "cities.csv", "-q", query, "-o", "csv:-"])
+    stdout_stdin = invoke_cli(["csv:-", "-q", query, "-o", "csv:-"], stdin=open(FIXTURES_DIR / "cities.csv").read())
+    assert stdout == stdout_stdin
+    assert stdout.startswith("City,LatD\nSandusky,41\n")
+
+
+def test_query_csv_file_na_values(tmp_path, invoke_cli):
+    csv_text = "name,val\nx,NA\nN/A,3.5\nnull, NA\ny,1\n  None,2\n"
+    (tmp_path / "test.csv").write_text(csv_text)
+    query = "SELECT sum(val) AS total, count(name) AS names, count(val) AS vals FROM data"
+    stdout = invoke_cli([f"{tmp_path}/test.csv", "-q", query, "-o", "csv:-"])
+    assert stdout == "total,names,vals\n6.5,2,3\n"
+    query = "SELECT * FROM data"
+    stdout = invoke_cli([f"{tmp_path}/test.csv", "-q", query, "-o", "jsonl:-"])
+    assert stdout == invoke_cli(["csv:-", "-q", query, "-o", "jsonl:-"], stdin=csv_text)
+
+
+def test_query_file_types_match_stdin(tmp_path, invoke_cli):
+    # pandas' type inference, e.g. "007" is an int and "0x1F" a string, unlike DuckDB's own CSV sniffer.
+    csv_text = "a,b,c,d,e,f\n007,+5,0x1F,00.5,True,\n10,3,4,1e5,false,\n,-1,5,inf,TRUE,\n"
+    (tmp_path / "test.csv").write_text(csv_text)
+    query = "SELECT *, a + b AS s, length(c) AS n FROM data"
+    stdout = invoke_cli([f"{tmp_path}/test.csv", "-q", query, "-o", "jsonl:-"])
+    assert stdout == invoke_cli(["csv:-", "-q", query, "-o", "jsonl:-"], stdin=csv_text)
+    first_row = {"a": 7.0, "b": 5, "c": "0x1F", "d": 0.5, "e": True, "f": None, "s": 12.0, "n": 4}
+    assert json.loads(stdout.splitlines()[0]) == first_row
+
+    # Repeated and empty headers, and numbers that overflow an int64/double, are also read the same as pandas reads them
+    for csv_text, first_row in [
+        ("a,a,\n1,2,3\n", {"a": 1, "a.1": 2, "Unnamed: 2": 3}),
+        ("a,b\n1e400,1e-400\n1,2\n", {"a": "1e400", "b": 0.0}),
+        ("a,b\n12345678901234567890123,9223372036854775808\n1,2\n", {"a": "12345678901234567890123", "b": 2**63}),
+    ]:
+        (tmp_path / "test.csv").write_text(csv_text)
+        stdout = invoke_cli([f"{tmp_path}/test.csv", "-q", "SELECT * FROM data", "-o", "jsonl:-"])
+        assert stdout == invoke_cli(["csv:-", "-q", "SELECT * FROM data", "-o", "jsonl:-"], stdin=csv_text)
+        assert json.loads(stdout.splitlines()[0]) == first_row
+
+    # Values of mixed types are read like pandas reads them, not as JSON text.
+    jsonl_text = '{"x": 1}\n{"x": "s"}\n'
+    (tmp_path / "test.jsonl").write_text(jsonl_text)
+    query = "SELECT x, length(x) AS n FROM data"
+    stdout = invoke_cli([f"{tmp_path}/test.jsonl", "-q", query, "-o", "jsonl:-"])
+    assert stdout == invoke_cli(["jsonl:-", "-q", query, "-o", "jsonl:-"], stdin=jsonl_text)
+    assert stdout.splitlines()[1] == '{"x":"s","n":1}'
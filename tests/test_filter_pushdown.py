@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from tableconv.adapters.df.pandas_io import ParquetAdapter
+from tableconv.filter_pushdown import plan_filter_pushdown
+
+
+def test_subqueries_not_pushed_down():
+    assert plan_filter_pushdown("SELECT * FROM data WHERE id = 1 AND id IN (SELECT id FROM data)") is None
+
+
+def test_parquet_pushdown(tmp_path):
+    import pyarrow
+    import pyarrow.parquet
+
+    df = pd.DataFrame({"a": range(100), "b": [f"v{i}" for i in range(100)], "c": np.arange(100) / 2})
+    path = f"{tmp_path}/test.parquet"
+    pyarrow.parquet.write_table(pyarrow.Table.from_pandas(df, preserve_index=False), path, row_group_size=10)
+
+    # Only the referenced columns, and the row groups that may have matching rows, are read.
+    pushdown = plan_filter_pushdown("SELECT a FROM data WHERE a > 85 AND c < 45")
+    table = ParquetAdapter.load_file_arrow("parquet", path, {"pushdown": pushdown})
+    assert table.column_names == ["a", "c"]
+    assert table["a"].to_pylist() == list(range(80, 90))
+    pushdown = plan_filter_pushdown("SELECT * FROM data WHERE b = 'v5' OR a = 99")
+    assert ParquetAdapter.load_file_arrow("parquet", path, {"pushdown": pushdown}).num_rows == 100
@@ -0,0 +1,63 @@
+import gc
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from tableconv.core import convert_via_duckdb_copy
+from tableconv.in_memory_query import query_in_memory
+
+
+def test_session_does_not_keep_queried_dfs_alive():
+    refs = []
+    for _ in range(5):
+        df = pd.DataFrame({"a": np.arange(1000)})
+        refs.append(weakref.ref(df))
+        assert query_in_memory([("data", df)], "SELECT count(*) AS n FROM data")["n"][0] == 1000
+        del df
+    gc.collect()
+    # (Only the table of the last query is still registered)
+    assert [ref() is not None for ref in refs] == [False, False, False, False, True]
+
+
+def test_duckdb_copy_na_values(tmp_path, invoke_cli):
+    csv_text = "name,val\nx,NA\nN/A,3.5\nnull, NA\ny,1\n"
+    (tmp_path / "test.csv").write_text(csv_text)
+    for dest_scheme in ("jsonl", "parquet"):
+        # (Via the DuckDB COPY fast path, vs via pandas)
+        assert convert_via_duckdb_copy(f"{tmp_path}/test.csv", f"{tmp_path}/fast.{dest_scheme}") is not None
+        invoke_cli(["csv:-", "-o", f"{tmp_path}/slow.{dest_scheme}"], stdin=csv_text)
+        assert invoke_cli([f"{tmp_path}/fast.{dest_scheme}", "-o", "jsonl:-"]) == invoke_cli(
+            [f"{tmp_path}/slow.{dest_scheme}", "-o", "jsonl:-"]
+        )
+    assert (
+        convert_via_duckdb_copy(f"{tmp_path}/test.csv", f"{tmp_path}/unix.jsonl", "SELECT from_unix(val) FROM data")
+        is None
+    )
+
+
+def test_duckdb_copy_types(tmp_path, invoke_cli):
+    csv_text = "id,code,hex,ratio\n007,+5,0x1F,00.5\n10,3,4,1e5\n"
+    (tmp_path / "test.csv").write_text(csv_text)
+    assert convert_via_duckdb_copy(f"{tmp_path}/test.csv", f"{tmp_path}/fast.jsonl") is not None
+    invoke_cli(["csv:-", "-o", f"{tmp_path}/slow.jsonl"], stdin=csv_text)
+    assert (tmp_path / "fast.jsonl").read_text() == (tmp_path / "slow.jsonl").read_text()
+    assert (tmp_path / "fast.jsonl").read_text().startswith('{"id":7,"code":5,"hex":"0x1F","ratio":0.5}\n')
+
+    # Repeated headers and numbers that overflow an int64/double can't be copied by DuckDB exactly either.
+    for csv_text in ("a,a\n1,2\n", "a\n1e400\n1\n", "a\n9223372036854775808\n"):
+        (tmp_path / "test.csv").write_text(csv_text)
+        assert convert_via_duckdb_copy(f"{tmp_path}/test.csv", f"{tmp_path}/overflow.parquet") is None
+        assert not (tmp_path / "overflow.parquet").exists()
+        invoke_cli([f"{tmp_path}/test.csv", "-o", f"{tmp_path}/overflow.parquet"])
+        assert invoke_cli([f"{tmp_path}/overflow.parquet", "-o", "jsonl:-"]) == invoke_cli(
+            ["csv:-", "-o", "jsonl:-"], stdin=csv_text
+        )
+        (tmp_path / "overflow.parquet").unlink()
+
+    # Mixed types can't be copied by DuckDB exactly, so are converted via pandas.
+    jsonl_text = '{"x": 1, "y": "a"}\n{"x": "s", "y": "b"}\n'
+    (tmp_path / "test.jsonl").write_text(jsonl_text)
+    assert convert_via_duckdb_copy(f"{tmp_path}/test.jsonl", f"{tmp_path}/fast.csv") is None
+    invoke_cli([f"{tmp_path}/test.jsonl", "-o", f"{tmp_path}/slow.csv"])
+    assert (tmp_path / "slow.csv").read_text() == "x,y\n1,a\ns,b\n"
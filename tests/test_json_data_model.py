@@ -0,0 +1,101 @@
+import datetime
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tableconv.json_data_model import dumps_json_records, flatten_records, load_jsonl_parallel, write_json_records
+
+
+def test_jsonl_parallel_load(tmp_path):
+    records = [{"id": i, "user": {"name": f"u{i}"}, **({"extra": True} if i % 7 == 0 else {})} for i in range(100)]
+    (tmp_path / "test.jsonl").write_text("\n".join(json.dumps(record) for record in records) + "\n")
+    df = load_jsonl_parallel(str(tmp_path / "test.jsonl"), ".", jobs=2)
+    pd.testing.assert_frame_equal(df, pd.json_normalize(records))
+
+    lines = [json.dumps(record) for record in records]
+    lines[80] = '{"id": 80,}'
+    (tmp_path / "bad.jsonl").write_text("\n".join(lines))
+    with pytest.raises(json.JSONDecodeError, match="line 81 column 11"):
+        load_jsonl_parallel(str(tmp_path / "bad.jsonl"), ".", jobs=2)
+
+
+def test_flatten_records():
+    records = [
+        {"user": {"name": "a", "geo": {}}, "id": 1},
+        {"id": 2, "user": "b", 3: True},
+        {"user": {"geo": {"lat": 1.5}, "name": "c"}},
+    ]
+    for sep in (".", "__"):
+        pd.testing.assert_frame_equal(flatten_records(records, sep), pd.json_normalize(records, sep=sep))
+        pd.testing.assert_frame_equal(flatten_records(iter(records), sep), pd.json_normalize(records, sep=sep))
+
+
+def test_json_records_writer():
+    df = pd.DataFrame(
+        {
+            "id": [1, 2],
+            "user.name": ['a/é"', None],
+            "score": [0.1, np.nan],
+            "user.geo.lat": [1.5, np.inf],
+            "time": pd.to_datetime(["2026-01-01 12:00:00.5", None]),
+            "ok": [True, False],
+            "tags": [[1, 2], None],
+            "count": pd.array([None, 3], dtype="Int64"),
+        }
+    )
+    records = [
+        {
+            "id": 1,
+            "user.name": 'a/é"',
+            "score": 0.1,
+            "user.geo.lat": 1.5,
+            "time": "2026-01-01T12:00:00.500",
+            "ok": True,
+            "tags": [1, 2],
+            "count": None,
+        },
+        {
+            "id": 2,
+            "user.name": None,
+            "score": None,
+            "user.geo.lat": None,
+            "time": None,
+            "ok": False,
+            "tags": None,
+            "count": 3,
+        },
+    ]
+    buffer = io.StringIO()
+    write_json_records(df, buffer, lines=True)
+    assert [json.loads(line) for line in buffer.getvalue().splitlines()] == records
+    assert json.loads(dumps_json_records(df)) == records
+    assert json.loads(dumps_json_records(df, nesting_sep="."))[0] == {
+        "id": 1,
+        "user": {"name": 'a/é"', "geo": {"lat": 1.5}},
+        "score": 0.1,
+        "time": "2026-01-01T12:00:00.500",
+        "ok": True,
+        "tags": [1, 2],
+        "count": None,
+    }
+    assert dumps_json_records(df.iloc[:0]) == "[]"
+
+    # Floats and dates are formatted the same as pd.DataFrame.to_json(date_format="iso") formats them
+    df = pd.DataFrame(
+        {
+            "float": [0.1 + 0.2, 1.23456789012345, 1e20, -np.inf],
+            "float32": np.array([0.1, 1 / 3, 1.5, np.nan], dtype=np.float32),
+            "object": [datetime.date(2020, 1, 1), pd.Timestamp("2020-01-01 01:00", tz="US/Eastern"), 0.1 + 0.2, "x"],
+        }
+    )
+    assert dumps_json_records(df) == df.to_json(orient="records", date_format="iso")
+    assert json.loads(dumps_json_records(df))[0] == {
+        "float": 0.3,
+        "float32": 0.1000000015,
+        "object": "2020-01-01T00:00:00.000",
+    }
+    with pytest.raises(ValueError, match='column "user.name.first" conflicts with column "user.name"'):
+        dumps_json_records(pd.DataFrame(columns=["user.name", "user.name.first"]), nesting_sep=".")
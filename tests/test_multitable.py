@@ -0,0 +1,24 @@
+import concurrent.futures
+import time
+
+from tableconv.core import _run_bounded, convert_multitable
+from tests.fixtures.example_raw import EXAMPLE_CSV_RAW
+
+
+def test_run_bounded_keeps_task_order():
+    def task(delay, value):
+        time.sleep(delay)
+        return value
+
+    tasks = [(f"t{i}", task, (delay, i)) for i, delay in enumerate([0.2, 0, 0.1, 0, 0])]
+    with concurrent.futures.ThreadPoolExecutor(3) as executor:
+        assert list(_run_bounded(executor, tasks, 3, action="Loaded")) == [0, 1, 2, 3, 4]
+
+
+def test_convert_multitable_jobs_output(tmp_path):
+    (tmp_path / "src").mkdir()
+    for name in ("a", "b"):
+        (tmp_path / "src" / f"{name}.csv").write_text(EXAMPLE_CSV_RAW)
+    for jobs in (1, 2):
+        dest_url = f"json://{tmp_path}/dest{jobs}"
+        assert convert_multitable(f"csv://{tmp_path}/src", dest_url, jobs=jobs) == dest_url
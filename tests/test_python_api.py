@@ -1,5 +1,8 @@
+import datetime
 import filecmp
 
+import pytest
+
 import tableconv
 from tests.conftest import FIXTURES_DIR
 from tests.fixtures.example_raw import EXAMPLE_RECORDS
@@ -13,3 +16,49 @@ def test_tsv_to_csv(tmp_path):
 def test_export_as_dict_records(tmp_path):
     records = tableconv.load_url(FIXTURES_DIR / "example.tsv").as_dict_records()
     assert records == EXAMPLE_RECORDS
+
+
+def test_arrow_roundtrip(tmp_path):
+    pyarrow = pytest.importorskip("pyarrow")
+    table = tableconv.IntermediateExchangeTable(from_arrow=pyarrow.Table.from_pylist(EXAMPLE_RECORDS))
+    table.dump_to_url(f"parquet://{tmp_path}/test.parquet")
+    table = tableconv.load_url(f"parquet://{tmp_path}/test.parquet", filter_sql="SELECT * FROM data ORDER BY id")
+    assert isinstance(table.as_arrow(), pyarrow.Table)
+    assert table.as_arrow().to_pylist() == EXAMPLE_RECORDS
+    assert table.as_dict_records() == EXAMPLE_RECORDS
+
+
+def test_transform_in_memory():
+    table = tableconv.load_url(FIXTURES_DIR / "example.tsv")
+    df = table.as_pandas_df()
+    assert table.transform_in_memory("SELECT id FROM data ORDER BY id DESC").as_dict_records()[0] == {"id": 3}
+    # The persistent DuckDB session keeps the table registered, but picks up changes to it.
+    df["double_id"] = df["id"] * 2
+    result = table.transform_in_memory("SELECT double_id FROM data ORDER BY id DESC")
+    assert result.as_dict_records()[0] == {"double_id": 6}
+    with pytest.raises(tableconv.EmptyDataError):
+        table.transform_in_memory("SELECT * FROM data WHERE id > 100")
+
+
+def test_get_json_schema():
+    table = tableconv.IntermediateExchangeTable(
+        from_dict_records=[
+            {"id": 1, "name": "a", "tags": ["x"], "score": 1.5, "created": datetime.datetime(2020, 1, 1)},
+            {"id": 2, "name": None, "tags": [], "score": None, "created": None},
+        ]
+    )
+    assert table.get_json_schema()["properties"] == {
+        "id": {"type": "integer"},
+        "name": {"type": ["string", "null"]},
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "score": {"type": ["number", "null"]},
+        "created": {"type": ["string", "null"], "format": "date-time"},
+    }
+
+
+def test_get_json_schema_sparse_column():
+    records = [{"id": i, "note": None} for i in range(100_000)]
+    records[5]["note"] = "a"
+    records[70_000]["note"] = "b"
+    table = tableconv.IntermediateExchangeTable(from_dict_records=records)
+    assert table.get_json_schema()["properties"]["note"] == {"type": ["string", "null"]}
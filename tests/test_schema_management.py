@@ -32,21 +32,12 @@ def test_coerce_strings(invoke_cli):
 
 
 def test_coerce_integers(invoke_cli):
-    """
-    Note: Setting schema to 'int' will actually give us floats for the COERCION_TESTS_JSON_RAW sample data set.
-    This is a bug, unfortunately, and not desired.
-
-    This test serves more as docummentation of existing behavior, rather than verifying there are no bugs. This is a
-    bug...
-
-    Details at https://github.com/personalcomputer/tableconv/blob/f9f9f3c/tableconv/core.py#L209
-    """
     cmd = ["json:-", "--coerce-schema", "{id: int, name: str}", "-o", "json:-"]
     assert invoke_cli(cmd, stdin=COERCION_TESTS_JSON_RAW) == jsmin(
         json.dumps(
             [
-                {"id": 1.0, "name": "Anatoly"},
-                {"id": 2.0, "name": "Bobby"},
+                {"id": 1, "name": "Anatoly"},
+                {"id": 2, "name": "Bobby"},
                 {"id": None, "name": "Alice"},
                 {"id": None, "name": "Sofia"},
             ]
@@ -65,6 +56,17 @@ def test_coerce_integers_invalid(invoke_cli):
     )
     assert "error" in stderr.lower()
     assert "schema" in stderr.lower()
+    assert '"name" to int: 4 invalid' in stderr
+    assert "'Anatoly', 'Bobby', 'Alice'" in stderr
+
+
+def test_coerce_integers_out_of_range(invoke_cli):
+    cmd = ["json:-", "--coerce-schema", "{id: int}", "-o", "json:-"]
+    stdin = '[{"id": 9223372036854775807}, {"id": -9223372036854775808}]'
+    assert invoke_cli(cmd, stdin=stdin) == jsmin(stdin)
+    for stdin in ('[{"id": 9223372036854775808}]', '[{"id": "-9223372036854775809"}]', '[{"id": 1e300}]'):
+        _, stderr = invoke_cli(cmd, stdin=stdin, assert_nonzero_exit_code=True, capture_stderr=True)
+        assert '"id" to int: 1 invalid value(s)' in " ".join(stderr.split())
 
 
 def test_coerce_floats(invoke_cli):
@@ -104,6 +106,33 @@ def test_coerce_datetimes(invoke_cli):
     ]
 
 
+def test_coerce_datetimes_mixed_offsets(invoke_cli):
+    """Values without a UTC offset are assumed to be in UTC, regardless of the offsets of the other values."""
+    cmd = ["json:-", "--coerce-schema", "{time: datetime}", "-o", "csv:-"]
+    stdin = json.dumps([{"time": "2024-01-02T03:04:05+02:00"}, {"time": "2024-03-01 00:00:00"}])
+    assert invoke_cli(cmd, stdin=stdin) == "time\n2024-01-02 01:04:05+00:00\n2024-03-01 00:00:00+00:00\n"
+
+
+def test_coerce_datetimes_time_only(invoke_cli):
+    """Times without a date are invalid, rather than being given today's date."""
+    cmd = ["json:-", "--coerce-schema", "{time: datetime}", "-o", "json:-"]
+    stdin = json.dumps([{"time": "2024-01-02 12:00"}, {"time": "12:00"}, {"time": "10:30:00 PM"}])
+    _, stderr = invoke_cli(cmd, stdin=stdin, assert_nonzero_exit_code=True, capture_stderr=True)
+    assert "\"time\" to datetime: 2 invalid value(s) (e.g. '12:00', '10:30:00 PM')" in " ".join(stderr.split())
+
+
+def test_coerce_bools_dates_and_decimals(invoke_cli):
+    cmd = ["json:-", "--coerce-schema", "{flag: bool, day: date, amount: decimal}", "-o", "csv:-"]
+    stdin = json.dumps(
+        [
+            {"flag": "Yes", "day": "2022-01-18T22:00:00Z", "amount": "1.10"},
+            {"flag": 0, "day": "2022-01-17", "amount": 3},
+            {"flag": None, "day": "", "amount": None},
+        ]
+    )
+    assert invoke_cli(cmd, stdin=stdin) == "flag,day,amount\nTrue,2022-01-18,1.10\nFalse,2022-01-17,3\n,,\n"
+
+
 def test_restrict_scheme(invoke_cli):
     """Test ignoring extraneous columns in a file (ignoring "id" column)"""
     cmd = [